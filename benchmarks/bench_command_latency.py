@@ -0,0 +1,222 @@
+"""Benchmark de latence commande → confirmation.
+
+Pilote les vraies entités de l'intégration (climate, select, switch, number)
+contre le simulateur local et mesure, pour chaque type de commande :
+
+- la latence jusqu'à la confirmation (premier état du coordinator qui
+  reflète la nouvelle valeur) ;
+- la latence jusqu'à la fin de la commande (debounce, PATCH et boucle de
+  confirmation terminés) ;
+- le nombre de requêtes HTTP envoyées par commande.
+
+Exemple :
+
+    python benchmarks/bench_command_latency.py --lag 1.5 --commands 10
+    python benchmarks/bench_command_latency.py --kinds select,switch --json results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import harness  # noqa: F401  (configure sys.path)
+from harness import async_setup_goodhome, async_start_hass, summarize
+
+from goodhome_simulator import GoodHomeSimulator
+from custom_components.goodhome.climate import GoodHomeClimate, PRESET_COMFORT, PRESET_ECO
+from custom_components.goodhome.goodhome_api import GoodHomeAPI
+from custom_components.goodhome.number import GoodHomeTemperatureNumber
+from custom_components.goodhome.select import GoodHomeTargetModeSelect, TARGET_MODES
+from custom_components.goodhome.switch import GoodHomeSwitch
+
+KINDS = ["climate_temperature", "climate_preset", "select", "switch", "number"]
+
+
+def _state_of(coordinator, device_id):
+    for device in coordinator.data or []:
+        if device["id"] == device_id:
+            return device.get("state") or {}
+    return {}
+
+
+def _build_commands(kind, entities, coordinator, count):
+    """Yield (entity, command coroutine factory, confirmation check) tuples."""
+    by_class = {
+        "climate_temperature": GoodHomeClimate,
+        "climate_preset": GoodHomeClimate,
+        "select": GoodHomeTargetModeSelect,
+        "switch": GoodHomeSwitch,
+        "number": GoodHomeTemperatureNumber,
+    }
+    candidates = [
+        e for domain in entities.values() for e in domain if type(e) is by_class[kind]
+    ]
+    if kind == "switch":
+        candidates = [e for e in candidates if e._parameter_name == "window"]
+    if kind == "number":
+        candidates = [e for e in candidates if e._parameter_name == "comfTemp"]
+
+    for index in range(count):
+        entity = candidates[index % len(candidates)]
+        device_id = entity._device_id
+        state = _state_of(coordinator, device_id)
+
+        if kind == "climate_temperature":
+            value = 22.5 if state.get("targetTemp") != 22.5 else 21.0
+            yield entity, lambda e=entity, v=value: e.async_set_temperature(temperature=v), \
+                lambda s, v=value: s.get("targetTemp") == v
+        elif kind == "climate_preset":
+            preset, mode = (PRESET_ECO, 10) if state.get("targetMode") != 10 else (PRESET_COMFORT, 9)
+            yield entity, lambda e=entity, p=preset: e.async_set_preset_mode(p), \
+                lambda s, m=mode: s.get("targetMode") == m
+        elif kind == "select":
+            option = "Manuel Éco" if state.get("targetMode") != 2 else "Manuel Confort"
+            yield entity, lambda e=entity, o=option: e.async_select_option(o), \
+                lambda s, m=TARGET_MODES[option]: s.get("targetMode") == m
+        elif kind == "switch":
+            turn_on = not state.get("window")
+            command = (lambda e=entity: e.async_turn_on()) if turn_on else (lambda e=entity: e.async_turn_off())
+            yield entity, command, lambda s, v=turn_on: s.get("window") == v
+        elif kind == "number":
+            value = 21.5 if state.get("comfTemp") != 21.5 else 19.5
+            yield entity, lambda e=entity, v=value: e.async_set_native_value(v), \
+                lambda s, v=value: s.get("comfTemp") == v
+
+
+def _request_count(simulator):
+    """Return the number of HTTP requests served by the simulator so far."""
+    stats = dict(simulator.cloud.stats)
+    return sum(count for key, count in stats.items() if not key.startswith("status_"))
+
+
+async def _run_kind(hass, simulator, coordinator, entities, kind, count):
+    """Run `count` sequential commands of one kind."""
+    confirm, complete, requests, errors = [], [], [], 0
+
+    for entity, command, check in _build_commands(kind, entities, coordinator, count):
+        device_id = entity._device_id
+        confirmed_at = None
+        start = time.monotonic()
+
+        def on_update(check=check, device_id=device_id):
+            nonlocal confirmed_at
+            if confirmed_at is None and check(_state_of(coordinator, device_id)):
+                confirmed_at = time.monotonic()
+
+        # Suivre les tâches créées par la commande (debounce, confirmation...)
+        tasks = []
+        create_task = hass.async_create_task
+
+        def tracking_create_task(target, *args, **kwargs):
+            task = create_task(target, *args, **kwargs)
+            tasks.append(task)
+            return task
+
+        hass.async_create_task = tracking_create_task
+        remove = coordinator.async_add_listener(on_update)
+        # Les sondages de confirmation ne notifient que les entités de l'appareil
+        remove_device = coordinator.async_add_device_listener(device_id, on_update)
+        before = _request_count(simulator)
+        try:
+            await command()
+            await hass.async_block_till_done()
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        except Exception as err:  # noqa: BLE001
+            errors += 1
+            logging.getLogger(__name__).warning(f"{kind} command failed: {err!r}")
+        finally:
+            remove()
+            remove_device()
+            hass.async_create_task = create_task
+        end = time.monotonic()
+        after = _request_count(simulator)
+
+        complete.append(end - start)
+        requests.append(after - before)
+        if confirmed_at is not None:
+            confirm.append(confirmed_at - start)
+
+    return {
+        "commands": count,
+        "errors": errors,
+        "unconfirmed": count - len(confirm),
+        "confirmation_latency": summarize(confirm),
+        "completion_latency": summarize(complete),
+        "requests_per_command": sum(requests) / len(requests) if requests else None,
+    }
+
+
+async def async_main(args):
+    """Run the benchmark."""
+    simulator = GoodHomeSimulator(
+        devices=args.devices,
+        command_lag=args.lag,
+        latency=args.latency,
+        seed=args.seed,
+    ).start()
+    hass = await async_start_hass()
+    api = GoodHomeAPI(None, None, "bench@example.com", "bench", base_url=simulator.url)
+    try:
+        await hass.async_add_executor_job(api.login)
+        coordinator, entities = await async_setup_goodhome(hass, api)
+        await hass.async_block_till_done()
+
+        results = {
+            "devices": args.devices,
+            "command_lag": args.lag,
+            "latency": args.latency,
+            "kinds": {},
+        }
+        for kind in args.kinds:
+            results["kinds"][kind] = await _run_kind(
+                hass, simulator, coordinator, entities, kind, args.commands
+            )
+            _print_kind(kind, results["kinds"][kind])
+        return results
+    finally:
+        await hass.async_stop(force=True)
+        api.close()
+        simulator.stop()
+
+
+def _fmt(value):
+    return "   -  " if value is None else f"{value:6.2f}"
+
+
+def _print_kind(kind, result):
+    confirm = result["confirmation_latency"]
+    complete = result["completion_latency"]
+    print(
+        f"{kind:20} n={result['commands']:<3} err={result['errors']:<2} "
+        f"unconf={result['unconfirmed']:<2} "
+        f"confirm p50/p95/p99={_fmt(confirm['p50'])}/{_fmt(confirm['p95'])}/{_fmt(confirm['p99'])}s "
+        f"done p50/p95/p99={_fmt(complete['p50'])}/{_fmt(complete['p95'])}/{_fmt(complete['p99'])}s "
+        f"req/cmd={result['requests_per_command']:.1f}"
+    )
+
+
+def main():
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description="GoodHome command-to-confirmation latency benchmark")
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--lag", type=float, default=2.0, help="délai d'application des commandes côté appareil (s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence réseau simulée par requête (s)")
+    parser.add_argument("--commands", type=int, default=5, help="commandes par type")
+    parser.add_argument("--kinds", type=lambda v: v.split(","), default=KINDS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.ERROR)
+    results = asyncio.run(async_main(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Benchmark de passage à l'échelle (100 à 5000 thermostats simulés).
+
+Pour chaque taille de parc, mesure avec les vraies plateformes :
+
+- le temps de mise en place (premier refresh, construction et ajout des
+  entités de toutes les plateformes) ;
+- le temps CPU d'un tick du coordinator (lecture HTTP, décodage, mise à
+  jour de toutes les entités) ;
+- la mémoire allouée par appareil (tracemalloc, passe séparée) ;
+- le nombre d'écritures d'état par tick.
+
+Les résultats sont comparés à `fleet_baseline.json` : le script échoue
+(code 1) si une métrique dépasse la référence de plus de `--tolerance`, ou
+si le nombre d'appareils ou d'entités diffère (référence périmée). Les
+temps dépendent de la machine : régénérer la référence avec
+`--update-baseline` avant de comparer sur un autre poste, et dans chaque
+commit qui modifie le chemin mesuré (coordinator, décodage, entités).
+
+    python benchmarks/bench_fleet.py --sizes 100,500,1000
+    python benchmarks/bench_fleet.py --sizes 100,1000,5000 --update-baseline
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import harness  # noqa: F401  (configure sys.path)
+from harness import async_setup_goodhome, async_start_hass
+
+from homeassistant.helpers.entity import Entity
+
+from goodhome_simulator import GoodHomeSimulator
+from custom_components.goodhome.goodhome_api import GoodHomeAPI
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fleet_baseline.json")
+METRICS = ["setup_s", "tick_cpu_ms", "memory_per_device_kb", "state_writes_per_tick"]
+# Doivent être identiques à la référence : sinon les temps ne sont pas comparables
+COUNTS = ["devices", "entities"]
+
+
+async def _async_setup(size, seed):
+    """Start a simulator with `size` devices and set up the integration."""
+    # tick=0 : chaque lecture change l'état, donc chaque tick met à jour les entités
+    simulator = GoodHomeSimulator(devices=size, tick=0, seed=seed).start()
+    hass = await async_start_hass()
+    api = GoodHomeAPI(None, None, "bench@example.com", "bench", base_url=simulator.url)
+    await hass.async_add_executor_job(api.login)
+    start = time.perf_counter()
+    coordinator, entities = await async_setup_goodhome(hass, api)
+    await hass.async_block_till_done()
+    setup = time.perf_counter() - start
+    return simulator, hass, api, coordinator, entities, setup
+
+
+async def _async_teardown(simulator, hass, api, coordinator):
+    # Toutes les tailles partagent la même boucle : arrêter le rafraîchissement planifié
+    await coordinator.async_shutdown()
+    await hass.async_stop(force=True)
+    api.close()
+    simulator.stop()
+
+
+async def _async_measure(size, ticks, seed):
+    """Measure setup time, per-tick CPU and state writes for one fleet size."""
+    simulator, hass, api, coordinator, entities, setup = await _async_setup(size, seed)
+    try:
+        writes = 0
+        async_write_ha_state = Entity.async_write_ha_state
+
+        def counting_async_write_ha_state(self):
+            nonlocal writes
+            writes += 1
+            return async_write_ha_state(self)
+
+        Entity.async_write_ha_state = counting_async_write_ha_state
+        cpu = []
+        try:
+            for _ in range(ticks):
+                # Ne pas réutiliser le résultat de la fenêtre de déduplication
+                api._flight.forget()
+                start = time.process_time()
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+                cpu.append(time.process_time() - start)
+        finally:
+            Entity.async_write_ha_state = async_write_ha_state
+
+        return {
+            "devices": size,
+            "entities": sum(len(e) for e in entities.values()),
+            "setup_s": round(setup, 3),
+            "tick_cpu_ms": round(sorted(cpu)[len(cpu) // 2] * 1000, 2),
+            "state_writes_per_tick": round(writes / ticks, 1),
+        }
+    finally:
+        await _async_teardown(simulator, hass, api, coordinator)
+
+
+async def _async_measure_memory(size, seed):
+    """Measure memory allocated per device by the integration (separate pass)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    simulator, hass, api, coordinator, entities, _ = await _async_setup(size, seed)
+    try:
+        api._flight.forget()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        await _async_teardown(simulator, hass, api, coordinator)
+    return round((current - before) / size / 1024, 2)
+
+
+def _compare(results, baseline, tolerance):
+    """Return the list of regressions against the baseline."""
+    regressions = []
+    for size, result in results.items():
+        reference = baseline.get(size)
+        if reference is None:
+            continue
+        for count in COUNTS:
+            if reference.get(count) != result[count]:
+                regressions.append(
+                    f"{size} devices: {count} = {result[count]} != {reference.get(count)} "
+                    f"(baseline is stale, regenerate it with --update-baseline)"
+                )
+        for metric in METRICS:
+            if metric not in reference or reference[metric] in (None, 0):
+                continue
+            limit = reference[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{size} devices: {metric} = {result[metric]} > {limit:.2f} "
+                    f"(baseline {reference[metric]})"
+                )
+    return regressions
+
+
+async def async_main(args):
+    """Run the benchmark for every size."""
+    results = {}
+    for size in args.sizes:
+        result = await _async_measure(size, args.ticks, args.seed)
+        result["memory_per_device_kb"] = await _async_measure_memory(size, args.seed)
+        results[str(size)] = result
+        print(
+            f"{size:>5} devices  {result['entities']:>6} entities  "
+            f"setup {result['setup_s']:8.2f}s  tick CPU {result['tick_cpu_ms']:9.1f}ms  "
+            f"mem {result['memory_per_device_kb']:7.1f}KB/device  "
+            f"writes/tick {result['state_writes_per_tick']:8.1f}"
+        )
+    return results
+
+
+def main():
+    """Parse arguments, run and compare with the baseline."""
+    parser = argparse.ArgumentParser(description="GoodHome fleet-scale benchmark")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[100, 500, 1000])
+    parser.add_argument("--ticks", type=int, default=5, help="ticks mesurés par taille (médiane)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="régression tolérée (0.25 = +25 %%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    results = asyncio.run(async_main(args))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found, run with --update-baseline first")
+        return
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions = _compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark sur trafic réel rejoué.
+
+Rejoue un enregistrement (`tools/goodhome_record.py`) à travers les vraies
+plateformes de l'intégration, sans réseau, et mesure pour chaque tick du
+coordinator le temps CPU et le nombre d'écritures d'état. Les réponses
+enregistrées (304 compris) sont servies dans l'ordre, en boucle.
+
+    python benchmarks/bench_replay.py recordings/maison.jsonl.gz --ticks 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import harness  # noqa: F401  (configure sys.path)
+from harness import async_setup_goodhome, async_start_hass, summarize
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.goodhome.goodhome_api import BASE_URL, GoodHomeAPI
+from custom_components.goodhome.traffic import ReplayTransport
+
+
+async def async_main(args):
+    """Replay the recording and measure every tick."""
+    transport = ReplayTransport(args.recording, latency=args.latency)
+    base_url = transport.header.get("base_url") or BASE_URL
+    hass = await async_start_hass()
+    # Identifiants fictifs : ceux de l'enregistrement nettoyé
+    api = GoodHomeAPI(None, None, "user1@example.com", "password", base_url=base_url, transport=transport)
+    # Ne mesurer que l'intégration, pas le limiteur de débit
+    api.limiter.configure(api, 1000, 1000)
+
+    writes = 0
+    async_write_ha_state = Entity.async_write_ha_state
+
+    def counting_async_write_ha_state(self):
+        nonlocal writes
+        writes += 1
+        return async_write_ha_state(self)
+
+    coordinator = None
+    try:
+        if not await hass.async_add_executor_job(api.login):
+            # Enregistrement commencé après le login : utiliser le compte fictif
+            api.user_id, api.token = "user-1", "token-1"
+        coordinator, entities = await async_setup_goodhome(hass, api)
+        await hass.async_block_till_done()
+
+        Entity.async_write_ha_state = counting_async_write_ha_state
+        cpu, writes_per_tick = [], []
+        for _ in range(args.ticks):
+            api._flight.forget()
+            before = writes
+            start = time.process_time()
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+            cpu.append(time.process_time() - start)
+            writes_per_tick.append(writes - before)
+    finally:
+        Entity.async_write_ha_state = async_write_ha_state
+        if coordinator is not None:
+            await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+        api.close()
+
+    results = {
+        "recording": args.recording,
+        "devices": len(coordinator.data or []),
+        "entities": sum(len(e) for e in entities.values()),
+        "ticks": args.ticks,
+        "tick_cpu_ms": summarize([value * 1000 for value in cpu]),
+        "state_writes_per_tick": sum(writes_per_tick) / len(writes_per_tick) if writes_per_tick else 0,
+        "served": transport.served,
+        "misses": transport.misses,
+    }
+    tick = results["tick_cpu_ms"]
+    print(
+        f"{results['devices']} devices  {results['entities']} entities  "
+        f"tick CPU p50/p95/max={tick['p50']:.1f}/{tick['p95']:.1f}/{tick['max']:.1f}ms  "
+        f"writes/tick {results['state_writes_per_tick']:.1f}  "
+        f"served {transport.served}  misses {transport.misses}"
+    )
+    return results
+
+
+def main():
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description="GoodHome replayed-traffic benchmark")
+    parser.add_argument("recording", help="fichier produit par tools/goodhome_record.py")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--latency", action="store_true", help="reproduire la durée enregistrée des échanges")
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.ERROR)
+    results = asyncio.run(async_main(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Outils communs aux benchmarks GoodHome.
+
+Démarre un coeur Home Assistant minimal (registres, états, executor) et
+installe les vraies plateformes de l'intégration sur un `GoodHomeAPI`
+pointant vers le simulateur local ou vers un transport de rejeu.
+"""
+import logging
+import math
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant import loader  # noqa: E402
+from homeassistant.helpers import device_registry as dr  # noqa: E402
+from homeassistant.helpers import entity, entity_registry as er  # noqa: E402
+from homeassistant.helpers.entity_platform import EntityPlatform  # noqa: E402
+
+from custom_components.goodhome import (  # noqa: E402
+    DOMAIN,
+    PLATFORMS,
+    binary_sensor,
+    climate,
+    number,
+    select,
+    sensor,
+    switch,
+)
+from custom_components.goodhome.coordinator import GoodHomeCoordinator  # noqa: E402
+
+PLATFORM_MODULES = {
+    "climate": climate,
+    "sensor": sensor,
+    "binary_sensor": binary_sensor,
+    "switch": switch,
+    "select": select,
+    "number": number,
+}
+
+_LOGGER = logging.getLogger("goodhome.benchmarks")
+
+
+async def async_start_hass(config_dir=None):
+    """Return a minimal running Home Assistant core."""
+    if config_dir is None:
+        config_dir = tempfile.mkdtemp(prefix="goodhome-bench-")
+    hass = HomeAssistant(config_dir)
+    hass.config.set_time_zone("UTC")
+    loader.async_setup(hass)
+    entity.async_setup(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    return hass
+
+
+async def async_setup_goodhome(hass, api, options=None):
+    """Set up the GoodHome platforms for `api`, like a config entry would.
+
+    Retourne (coordinator, entities_by_domain).
+    """
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="GoodHome (benchmark)",
+        data={},
+        source="user",
+        options=options or {},
+    )
+    coordinator = GoodHomeCoordinator(hass, api)
+    await coordinator.async_refresh()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        "coordinator": coordinator,
+        "api": api,
+    }
+
+    entities_by_domain = {}
+    for domain in PLATFORMS:
+        domain = str(domain)
+        platform = EntityPlatform(
+            hass=hass,
+            logger=_LOGGER,
+            domain=domain,
+            platform_name=DOMAIN,
+            platform=None,
+            scan_interval=timedelta(seconds=30),
+            entity_namespace=None,
+        )
+        collected = []
+
+        def add_entities(new_entities, update_before_add=False, collected=collected):
+            collected.append((list(new_entities), update_before_add))
+
+        await PLATFORM_MODULES[domain].async_setup_entry(hass, entry, add_entities)
+        entities_by_domain[domain] = []
+        for new_entities, update_before_add in collected:
+            await platform.async_add_entities(new_entities, update_before_add)
+            entities_by_domain[domain].extend(new_entities)
+
+    return coordinator, entities_by_domain
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of `values` (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values):
+    """Return p50/p95/p99/max of a list of durations."""
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
@@ -1,79 +1,176 @@
 """GoodHome Integration pour Home Assistant."""
 import logging
 import asyncio
-from datetime import timedelta
+import hashlib
 
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import discovery
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util, slugify
 
-from .goodhome_api import GoodHomeAPI
+from .const import (
+    CONF_BASE_URL,
+    CONF_COMMAND_TIMEOUT,
+    CONF_CONFIRM_FIRST_DELAY,
+    CONF_CONFIRM_MAX_DELAY,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_CONNECT_TIMEOUT,
+    CONF_DEBOUNCE_MODE,
+    CONF_DEBOUNCE_SETPOINT,
+    CONF_DEBOUNCE_SWITCH,
+    CONF_DEBOUNCE_TEMPERATURE,
+    CONF_IO_WORKERS,
+    CONF_POLL_TIMEOUT,
+    CONF_RATE_BURST,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_UNKNOWN_FIELDS,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_CONFIRM_FIRST_DELAY,
+    DEFAULT_CONFIRM_MAX_DELAY,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_DEBOUNCE_MODE,
+    DEFAULT_DEBOUNCE_SETPOINT,
+    DEFAULT_DEBOUNCE_SWITCH,
+    DEFAULT_DEBOUNCE_TEMPERATURE,
+    DEFAULT_IO_WORKERS,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_UNKNOWN_FIELDS,
+)
+from .coordinator import GoodHomeCoordinator
+from .goodhome_api import BASE_URL, GoodHomeAPI
+from .prometheus import GoodHomeMetricsView
+from .profiler import DEFAULT_DURATION, DEFAULT_INTERVAL_MS, MODE_SAMPLING, MODES, ProfileSession
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "goodhome"
 PLATFORMS = [Platform.CLIMATE, Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SWITCH, Platform.SELECT, Platform.NUMBER]
 
+SERVICE_PROFILE = "profile"
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional("mode", default=MODE_SAMPLING): vol.In(MODES),
+    vol.Optional("duration", default=DEFAULT_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600)),
+    vol.Optional("allocations", default=0): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+    vol.Optional("interval_ms", default=DEFAULT_INTERVAL_MS): vol.All(vol.Coerce(float), vol.Range(min=1, max=1000)),
+})
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the GoodHome component from yaml configuration."""
     hass.data.setdefault(DOMAIN, {})
     
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        hass.services.async_register(DOMAIN, SERVICE_PROFILE, _async_profile_service(hass), schema=PROFILE_SCHEMA)
+    
+    # Métriques au format Prometheus (état en mémoire uniquement)
+    hass.http.register_view(GoodHomeMetricsView())
+    
     if DOMAIN not in config:
         return True
     
-    conf = config[DOMAIN]
+    # Plusieurs comptes possibles : chaque compte a ses propres données
+    confs = config[DOMAIN]
+    if not isinstance(confs, list):
+        confs = [confs]
+    
+    for conf in confs:
+        await _async_setup_yaml_account(hass, config, conf)
+    
+    return True
+
+async def _async_setup_yaml_account(hass: HomeAssistant, config: dict, conf: dict) -> None:
+    """Set up one GoodHome account from yaml configuration."""
     user_id = conf.get("user_id")
     token = conf.get("token")
     email = conf.get("email")
     password = conf.get("password")
+    base_url = conf.get(CONF_BASE_URL, BASE_URL)
     
     if (user_id and token) or (email and password):
-        api = GoodHomeAPI(user_id, token, email, password)
+        api = GoodHomeAPI(user_id, token, email, password, base_url=base_url)
         
         # Si email/password fournis, obtenir un nouveau token
         if email and password and not token:
-            await hass.async_add_executor_job(api.login)
+            await api.executor.async_run(api.login)
         
-        async def async_update_data():
-            """Fetch data from API."""
-            try:
-                devices = await hass.async_add_executor_job(api.get_devices)
-                return devices
-            except Exception as err:
-                raise UpdateFailed(f"Error communicating with API: {err}")
-        
-        coordinator = DataUpdateCoordinator(
-            hass,
-            _LOGGER,
-            name="goodhome",
-            update_method=async_update_data,
-            update_interval=timedelta(seconds=60),
-        )
+        coordinator = GoodHomeCoordinator(hass, api)
+        # Une clé par compte pour ne pas écraser un autre compte ; l'email et
+        # l'identifiant sont hachés (clé reprise dans les métriques et le stockage)
+        account = f"yaml_{hashlib.sha256((email or user_id).encode()).hexdigest()[:12]}"
+        # Commandes non confirmées lors de l'arrêt précédent, rejouées après le premier rafraîchissement
+        await coordinator.journal.async_load(f"{DOMAIN}.journal.{slugify(account)}")
         
         # Pour une configuration YAML, utiliser async_refresh au lieu de async_config_entry_first_refresh
         await coordinator.async_refresh()
         
-        hass.data[DOMAIN]["coordinator"] = coordinator
-        hass.data[DOMAIN]["api"] = api
+        hass.data[DOMAIN][account] = {
+            "coordinator": coordinator,
+            "api": api,
+        }
         
         # Register identify service
-        async def async_identify_device(call):
-            """Handle the identify device service call."""
-            device_id = call.data.get("device_id")
-            if device_id:
-                await hass.async_add_executor_job(api.identify_device, device_id)
-        
-        hass.services.async_register(DOMAIN, "identify_device", async_identify_device)
+        if not hass.services.has_service(DOMAIN, "identify_device"):
+            async def async_identify_device(call):
+                """Handle the identify device service call."""
+                device_id = call.data.get("device_id")
+                if device_id:
+                    device_api = _find_api_for_device(hass, device_id)
+                    if device_api is not None:
+                        await device_api.executor.async_run(device_api.identify_device, device_id)
+            
+            hass.services.async_register(DOMAIN, "identify_device", async_identify_device)
         
         # Charger les plateformes
         for platform in PLATFORMS:
             hass.async_create_task(
-                discovery.async_load_platform(hass, platform, DOMAIN, {}, config)
+                discovery.async_load_platform(hass, platform, DOMAIN, {"account": account}, config)
             )
+
+def _async_profile_service(hass: HomeAssistant):
+    """Return the handler of the profile service."""
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the integration hot paths for the requested duration."""
+        session = ProfileSession(call.data["mode"], call.data["allocations"], call.data["interval_ms"])
+        try:
+            # Démarré sur la boucle d'événements : c'est elle que cProfile observe
+            session.start()
+        except RuntimeError as err:
+            raise HomeAssistantError(str(err)) from err
+        
+        async def async_finish(_now):
+            session.stop()
+            base_path = hass.config.path(f"goodhome_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}")
+            paths = await hass.async_add_executor_job(session.write, base_path)
+            _LOGGER.info(f"GoodHome profile written to {', '.join(paths)}")
+            persistent_notification.async_create(
+                hass,
+                "\n".join(f"- `{path}`" for path in paths),
+                title="GoodHome profile",
+                notification_id="goodhome_profile",
+            )
+        
+        async_call_later(hass, call.data["duration"], async_finish)
     
-    return True
+    return async_profile
+
+def _find_api_for_device(hass: HomeAssistant, device_id: str):
+    """Return the API of the account owning a device."""
+    for account in hass.data.get(DOMAIN, {}).values():
+        coordinator = account["coordinator"]
+        for device in coordinator.data or []:
+            if device["id"] == device_id:
+                return account["api"]
+    return None
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up GoodHome from a config entry."""
@@ -82,31 +179,60 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     user_id = entry.data.get("user_id")
     token = entry.data.get("token")
     
+    base_url = entry.data.get(CONF_BASE_URL, BASE_URL)
+    
     # Priorité à email/password si disponibles
     if email and password:
-        api = GoodHomeAPI(None, None, email, password)
-        # Obtenir le token
-        await hass.async_add_executor_job(api.login)
+        api = GoodHomeAPI(None, None, email, password, base_url=base_url)
     else:
-        api = GoodHomeAPI(user_id, token)
+        api = GoodHomeAPI(user_id, token, base_url=base_url)
     
-    async def async_update_data():
-        """Fetch data from API."""
-        try:
-            devices = await hass.async_add_executor_job(api.get_devices)
-            return devices
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}")
-    
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="goodhome",
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=60),
+    # Délais par requête et budgets par opération
+    options = entry.options
+    api.set_timeouts(
+        connect=options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        read=options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        command=options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+        poll=options.get(CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT),
     )
+    api.set_unknown_fields(options.get(CONF_UNKNOWN_FIELDS, DEFAULT_UNKNOWN_FIELDS))
     
-    await coordinator.async_config_entry_first_refresh()
+    # Budget de requêtes partagé par les comptes de l'hôte : le plus grand demandé
+    api.limiter.configure(
+        api,
+        options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        options.get(CONF_RATE_BURST, DEFAULT_RATE_BURST),
+    )
+    # Threads de l'hôte : le plus grand nombre demandé par ses comptes
+    api.executor.configure(api, options.get(CONF_IO_WORKERS, DEFAULT_IO_WORKERS))
+    
+    if email and password:
+        # Obtenir le token
+        await api.executor.async_run(api.login)
+    
+    coordinator = GoodHomeCoordinator(hass, api)
+    # Sondages de confirmation des commandes
+    coordinator.set_confirmation_schedule(
+        options.get(CONF_CONFIRM_FIRST_DELAY, DEFAULT_CONFIRM_FIRST_DELAY),
+        options.get(CONF_CONFIRM_MAX_DELAY, DEFAULT_CONFIRM_MAX_DELAY),
+        options.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT),
+    )
+    # Regroupement des modifications rapprochées avant l'envoi des commandes
+    coordinator.set_debounce_delays(
+        options.get(CONF_DEBOUNCE_TEMPERATURE, DEFAULT_DEBOUNCE_TEMPERATURE),
+        options.get(CONF_DEBOUNCE_SETPOINT, DEFAULT_DEBOUNCE_SETPOINT),
+        options.get(CONF_DEBOUNCE_MODE, DEFAULT_DEBOUNCE_MODE),
+        options.get(CONF_DEBOUNCE_SWITCH, DEFAULT_DEBOUNCE_SWITCH),
+    )
+    # Commandes non confirmées lors de l'arrêt précédent, rejouées après le premier rafraîchissement
+    await coordinator.journal.async_load(f"{DOMAIN}.journal.{entry.entry_id}")
+    
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        await coordinator.async_shutdown()
+        await hass.async_add_executor_job(api.close)
+        raise
     
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
@@ -116,13 +242,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Confirmations et rejeux arrêtés avant de libérer le pool de threads de l'hôte
+        await data["coordinator"].async_shutdown()
+        await hass.async_add_executor_job(data["api"].close)
     
     return unload_ok
@@ -12,7 +12,11 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the GoodHome binary sensor platform (YAML config)."""
-    coordinator = hass.data["goodhome"]["coordinator"]
+    if discovery_info is None:
+        return
+    
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
     
     devices = coordinator.data
     entities = []
@@ -116,12 +120,16 @@ class GoodHomeBinarySensor(CoordinatorEntity, BinarySensorEntity):
             "model": "Thermostat",
         }
     
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+    
     def _get_device(self):
-        """Get device from coordinator data."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def available(self):
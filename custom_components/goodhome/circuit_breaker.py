@@ -0,0 +1,115 @@
+"""Disjoncteur (circuit breaker) pour les pannes du cloud GoodHome."""
+import logging
+import random
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"  # Fonctionnement normal
+STATE_OPEN = "open"  # Cloud en panne : les opérations échouent immédiatement
+STATE_HALF_OPEN = "half_open"  # Une seule opération de test autorisée
+
+CIRCUIT_STATES = [STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN]
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with exponential backoff and jitter."""
+
+    def __init__(self, failure_threshold, base_delay, max_delay, jitter=0.2):
+        """Initialize the breaker."""
+        self._lock = threading.Lock()
+        self._failure_threshold = failure_threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._jitter = jitter
+        self._state = STATE_CLOSED
+        self._failures = 0  # Échecs consécutifs
+        self._opens = 0  # Ouvertures consécutives (pour le backoff)
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+        self._last_error = None
+
+    @property
+    def state(self):
+        """Return the current state."""
+        with self._lock:
+            return self._state
+
+    def admit(self):
+        """Decide whether a logical operation may run.
+
+        Retourne (autorisé, sonde) : en état semi-ouvert, seule l'opération
+        de test (sonde) passe, les autres échouent immédiatement.
+        """
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True, False
+            if self._state == STATE_OPEN and time.monotonic() >= self._open_until:
+                self._state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                _LOGGER.debug("Circuit half-open, sending probe to GoodHome cloud")
+                return True, True
+            self._rejected += 1
+            return False, False
+
+    def end_probe(self):
+        """Release the probe slot if the probe recorded no outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        """Record a successful request."""
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                _LOGGER.info("GoodHome cloud reachable again, closing circuit")
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._opens = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error=None):
+        """Record a failed request (network error or server error)."""
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error is not None else None
+            # Circuit déjà ouvert : requêtes en vol, nouveaux essais ou refresh
+            # imbriqué qui échouent en retard, sans relancer le backoff
+            if self._state == STATE_OPEN:
+                return
+            if self._state == STATE_HALF_OPEN or self._failures >= self._failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        """Open the circuit for an exponentially growing, jittered delay."""
+        delay = min(self._max_delay, self._base_delay * (2 ** self._opens))
+        delay *= random.uniform(1 - self._jitter, 1 + self._jitter)
+        if self._state == STATE_CLOSED:
+            _LOGGER.warning(
+                f"GoodHome cloud unreachable after {self._failures} failures "
+                f"({self._last_error}), pausing requests for {delay:.0f}s"
+            )
+        else:
+            _LOGGER.debug(f"Circuit probe failed, next probe in {delay:.0f}s")
+        self._state = STATE_OPEN
+        self._opens += 1
+        self._open_until = time.monotonic() + delay
+        self._probe_in_flight = False
+
+    def stats(self):
+        """Return a snapshot of the breaker state."""
+        with self._lock:
+            retry_in = None
+            if self._state == STATE_OPEN:
+                retry_in = max(0.0, round(self._open_until - time.monotonic(), 1))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "consecutive_opens": self._opens,
+                "next_probe_in": retry_in,
+                "rejected_operations": self._rejected,
+                "last_error": self._last_error,
+            }
@@ -0,0 +1,223 @@
+"""Gestionnaire de connexions GoodHome partagé entre tous les comptes."""
+import json
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import CircuitBreaker
+from .const import (
+    CIRCUIT_BASE_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_DELAY,
+    DEFAULT_IO_WORKERS,
+    DEFAULT_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    MAX_IO_WORKERS,
+)
+from .executor import IOExecutor
+from .rate_limiter import TokenBucketLimiter
+from .single_flight import SingleFlight
+
+_LOGGER = logging.getLogger(__name__)
+
+# Taille du pool de connexions HTTP par hôte (partagé par tous les comptes)
+POOL_MAXSIZE = MAX_IO_WORKERS
+# Durée de vie par défaut d'une session Socket.io si le serveur ne l'annonce pas
+DEFAULT_PING_INTERVAL = 25
+
+
+def generate_t_param():
+    """Generate a t parameter similar to Socket.io."""
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
+    timestamp = int(time.time() * 1000)
+    result = ""
+    num = timestamp
+
+    for _ in range(7):
+        idx = num % 64
+        result = alphabet[idx] + result
+        num = num // 64
+
+    return result
+
+
+class SocketTransport:
+    """Socket.io-v2 polling transport shared by every account of a host.
+
+    Le handshake est fait une fois par compte puis réutilisé tant que la
+    session n'a pas dépassé l'intervalle de ping annoncé par le serveur.
+    """
+
+    def __init__(self, base_url, session):
+        """Initialize the transport."""
+        self._base_url = base_url
+        self._session = session
+        self._lock = threading.Lock()
+        # Un seul handshake en cours par (user_id, token) ; les comptes de
+        # l'hôte font le leur en parallèle
+        self._handshakes = SingleFlight(0)
+        # (user_id, token) -> (sid, expires_at)
+        self._sessions = {}
+
+    def _cached_sid(self, key):
+        with self._lock:
+            cached = self._sessions.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def connect(self, user_id, token, send=None, force=False):
+        """Return a valid SID for the account, doing the handshake if needed.
+
+        `send` permet à l'appelant de faire passer les requêtes par son propre
+        chemin d'envoi (rate limit, timeouts, ...). Les appels concurrents
+        attendent le handshake en cours et réutilisent sa session. Lève une
+        exception si le handshake échoue.
+        """
+        key = (user_id, token)
+        if not force:
+            sid = self._cached_sid(key)
+            if sid is not None:
+                return sid
+
+        return self._handshakes.do(key, lambda: self._handshake(key, send))
+
+    def _handshake(self, key, send):
+        user_id, token = key
+        if send is None:
+            send = self._session.request
+
+        headers = {
+            "accept": "*/*",
+            "accept-encoding": "gzip, deflate, br",
+            "user-agent": "GoodHome/2010301 CFNetwork/3826.600.41 Darwin/24.6.0",
+            "accept-language": "fr-FR,fr;q=0.9",
+            "authorization": f"Bearer {token}",
+        }
+        url = (
+            f"{self._base_url}/socket.io-v2/?EIO=3&transport=polling"
+            f"&userId={user_id}&t={generate_t_param()}"
+        )
+        response = send("GET", url, headers=headers)
+        response.raise_for_status()
+
+        sid, ping_interval = self._parse_handshake(response.text)
+        if sid is None:
+            raise ValueError("Failed to get SID from response")
+
+        # Maintenir la connexion
+        url2 = f"{url.rsplit('&t=', 1)[0]}&t={generate_t_param()}&sid={sid}"
+        send("GET", url2, headers=headers)
+
+        now = time.monotonic()
+        with self._lock:
+            # Purger les sessions expirées (tokens renouvelés, comptes retirés)
+            self._sessions = {
+                k: v for k, v in self._sessions.items() if v[1] > now and k[0] != user_id
+            }
+            self._sessions[key] = (sid, now + ping_interval)
+        return sid
+
+    def forget(self, user_id):
+        """Drop the cached session(s) of an account."""
+        with self._lock:
+            self._sessions = {k: v for k, v in self._sessions.items() if k[0] != user_id}
+
+    @staticmethod
+    def _parse_handshake(text):
+        """Extract SID and ping interval (seconds) from an engine.io v3 handshake."""
+        if '"sid":"' not in text:
+            return None, DEFAULT_PING_INTERVAL
+
+        sid_start = text.find('"sid":"') + 7
+        sid_end = text.find('"', sid_start)
+        sid = text[sid_start:sid_end]
+
+        ping_interval = DEFAULT_PING_INTERVAL
+        # Paquet de la forme `97:0{"sid":...,"pingInterval":25000,...}`
+        start = text.find("{")
+        end = text.find("}", start)
+        if start != -1 and end != -1:
+            try:
+                payload = json.loads(text[start:end + 1])
+                ping_interval = payload.get("pingInterval", ping_interval * 1000) / 1000
+            except ValueError:
+                pass
+        return sid, ping_interval
+
+
+class GoodHomeHost:
+    """Transport shared by every account talking to the same GoodHome host."""
+
+    def __init__(self, base_url):
+        """Initialize the shared HTTP pool and socket transport."""
+        self.base_url = base_url
+        self.session = requests.Session()
+        # Ne jamais partager de cookies entre comptes : l'auth reste par compte
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.socket = SocketTransport(base_url, self.session)
+        # Budget de requêtes global pour l'hôte, quel que soit le compte
+        self.limiter = TokenBucketLimiter(DEFAULT_RATE_LIMIT, DEFAULT_RATE_BURST)
+        # Une panne du cloud touche tous les comptes de l'hôte
+        self.breaker = CircuitBreaker(
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_DELAY, CIRCUIT_MAX_DELAY
+        )
+        # Threads des appels bloquants, séparés du pool par défaut de Home Assistant
+        self.executor = IOExecutor(DEFAULT_IO_WORKERS, MAX_IO_WORKERS)
+        self.refcount = 0
+
+    def close(self):
+        """Close the pooled connections and stop the thread pool."""
+        self.executor.shutdown()
+        self.session.close()
+
+
+class GoodHomeClientManager:
+    """Process-wide registry of GoodHome hosts, one per base URL."""
+
+    def __init__(self):
+        """Initialize the manager."""
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def acquire(self, base_url):
+        """Return the shared host for `base_url`, creating it if needed."""
+        base_url = base_url.rstrip("/")
+        with self._lock:
+            host = self._hosts.get(base_url)
+            if host is None:
+                host = GoodHomeHost(base_url)
+                self._hosts[base_url] = host
+                _LOGGER.debug(f"Created shared GoodHome transport for {base_url}")
+            host.refcount += 1
+            return host
+
+    def release(self, host):
+        """Release a host; its pool is closed when no account uses it anymore."""
+        with self._lock:
+            host.refcount -= 1
+            if host.refcount <= 0 and self._hosts.get(host.base_url) is host:
+                del self._hosts[host.base_url]
+                host.close()
+                _LOGGER.debug(f"Closed shared GoodHome transport for {host.base_url}")
+
+    @property
+    def hosts(self):
+        """Return the active hosts."""
+        with self._lock:
+            return list(self._hosts.values())
+
+
+_MANAGER = GoodHomeClientManager()
+
+
+def get_client_manager():
+    """Return the process-wide client manager."""
+    return _MANAGER
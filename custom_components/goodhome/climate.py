@@ -1,7 +1,7 @@
 """GoodHome Climate Platform."""
-import logging
 import asyncio
-from typing import Any, Callable
+import logging
+from typing import Any
 
 from homeassistant.components.climate import (
     ClimateEntity,
@@ -15,16 +15,57 @@ from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import POLLING_MAX_ATTEMPTS, POLLING_INTERVAL, DEBOUNCE_DELAY
+from .commands import Command
+from .debounce import DebouncedCommand
+from .log_aggregator import AggregatedLogger
+from .sensor import power_consumption
+from .zone import resolve_zones
 
 _LOGGER = logging.getLogger(__name__)
+_ERRORS = AggregatedLogger(_LOGGER)
 
 PRESET_MANUAL = "manual"
 
+# Mapping simplifié pour les presets courants
+# Pour un contrôle total, utiliser l'entité select.target_mode
+PRESET_TARGET_MODES = {
+    PRESET_COMFORT: 9,   # Forcé confort (retour auto)
+    PRESET_ECO: 10,      # Forcé éco (retour auto)
+    PRESET_MANUAL: 1,    # Manuel confort
+    PRESET_AWAY: 5,      # Absence longue durée
+}
+
+
+def hvac_mode_from_target_mode(mode):
+    """Return the HVAC mode of a targetMode."""
+    # Mode 3 = anti-gel manuel = OFF
+    # Mode 0 = default (provisoire) = considéré comme OFF aussi
+    if mode in [0, 3]:
+        return HVACMode.OFF
+    return HVACMode.HEAT
+
+
+def preset_from_target_mode(mode):
+    """Return the preset of a targetMode."""
+    # Mapping inverse selon ESPHome_GoodHome
+    if mode in [9, 60]:  # Forcé confort ou Auto confort
+        return PRESET_COMFORT
+    elif mode in [10, 61]:  # Forcé éco ou Auto éco
+        return PRESET_ECO
+    elif mode in [1, 2, 3, 8, 70]:  # Modes manuels
+        return PRESET_MANUAL
+    elif mode in [5, 12]:  # Absence (longue ou courte)
+        return PRESET_AWAY
+    return PRESET_MANUAL
+
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the GoodHome climate platform (YAML config)."""
-    coordinator = hass.data["goodhome"]["coordinator"]
-    api = hass.data["goodhome"]["api"]
+    if discovery_info is None:
+        return
+    
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
+    api = account["api"]
     
     devices = coordinator.data
     entities = []
@@ -45,6 +86,10 @@ async def async_setup_entry(hass, entry, async_add_entities):
     for device in devices:
         entities.append(GoodHomeClimate(coordinator, api, device))
     
+    # Zones définies dans les options ou par pièce
+    for zone_id, name, members in resolve_zones(devices, entry.options):
+        entities.append(GoodHomeZoneClimate(coordinator, zone_id, name, members))
+    
     async_add_entities(entities, True)
 
 class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
@@ -67,10 +112,9 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
         self._device_id = device["id"]
         self._attr_name = device["name"]
         self._attr_unique_id = f"goodhome_climate_{device['id']}"
-        self._debounce_task = None
-        self._pending_temperature = None
-        self._pending_hvac_mode = None
-        self._pending_preset_mode = None
+        self._debouncer = DebouncedCommand(
+            coordinator, self._device_id, coordinator.debounce_temperature, self._async_send_temperature
+        )
         
     @property
     def device_info(self):
@@ -90,36 +134,17 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
             return device.get("connected", False)
         return False
     
-    def _get_device(self):
-        """Get device from coordinator data."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+        self.async_on_remove(self._debouncer.async_cancel)
     
-    async def _wait_for_confirmation(self, check_function: Callable[[], bool], description: str) -> bool:
-        """
-        Attendre la confirmation d'un changement avec polling.
-        
-        Args:
-            check_function: Fonction qui retourne True si le changement est confirmé
-            description: Description du changement pour les logs
-            
-        Returns:
-            True si confirmé, False si timeout
-        """
-        for attempt in range(POLLING_MAX_ATTEMPTS):
-            await asyncio.sleep(POLLING_INTERVAL)
-            await self.coordinator.async_request_refresh()
-            
-            if check_function():
-                _LOGGER.debug(f"{description} confirmed after {attempt + 1} attempts")
-                return True
-            
-            _LOGGER.debug(f"Waiting for {description} confirmation... attempt {attempt + 1}/{POLLING_MAX_ATTEMPTS}")
-        
-        _LOGGER.warning(f"{description} confirmation timeout after {POLLING_MAX_ATTEMPTS} attempts, assuming success")
-        return False
+    def _get_device(self):
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def current_temperature(self):
@@ -142,10 +167,6 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
-        # Si une température est en attente, l'afficher immédiatement
-        if self._pending_temperature is not None:
-            return self._pending_temperature
-        
         device = self._get_device()
         if device and device.get("state"):
             return device["state"].get("targetTemp")
@@ -154,39 +175,17 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
     @property
     def hvac_mode(self):
         """Return hvac operation ie. heat, cool mode."""
-        # Si un mode est en attente, l'afficher immédiatement
-        if self._pending_hvac_mode is not None:
-            return self._pending_hvac_mode
-        
         device = self._get_device()
         if device and device.get("state"):
-            mode = device["state"].get("targetMode", 1)
-            # Mode 3 = anti-gel manuel = OFF
-            # Mode 0 = default (provisoire) = considéré comme OFF aussi
-            if mode in [0, 3]:
-                return HVACMode.OFF
-            return HVACMode.HEAT
+            return hvac_mode_from_target_mode(device["state"].get("targetMode", 1))
         return HVACMode.HEAT
     
     @property
     def preset_mode(self):
         """Return the current preset mode."""
-        # Si un preset est en attente, l'afficher immédiatement
-        if self._pending_preset_mode is not None:
-            return self._pending_preset_mode
-        
         device = self._get_device()
         if device and device.get("state"):
-            mode = device["state"].get("targetMode", 1)
-            # Mapping inverse selon ESPHome_GoodHome
-            if mode in [9, 60]:  # Forcé confort ou Auto confort
-                return PRESET_COMFORT
-            elif mode in [10, 61]:  # Forcé éco ou Auto éco
-                return PRESET_ECO
-            elif mode in [1, 2, 3, 8, 70]:  # Modes manuels
-                return PRESET_MANUAL
-            elif mode in [5, 12]:  # Absence (longue ou courte)
-                return PRESET_AWAY
+            return preset_from_target_mode(device["state"].get("targetMode", 1))
         return PRESET_MANUAL
     
     @property
@@ -247,57 +246,45 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
         """Set new target temperature with debounce."""
         temperature = kwargs.get(ATTR_TEMPERATURE)
         if temperature is not None:
-            # Annuler la tâche de debounce précédente si elle existe
-            if self._debounce_task is not None:
-                self._debounce_task.cancel()
-            
-            # Stocker la température en attente
-            self._pending_temperature = temperature
-            
-            # Mettre à jour l'affichage immédiatement avec la valeur locale
-            self.async_write_ha_state()
-            
-            # Créer une nouvelle tâche de debounce
-            self._debounce_task = self.hass.async_create_task(
-                self._debounced_set_temperature()
+            # Commande validée tout de suite (bornes), envoyée après le délai
+            command = Command.override_temperature(self._device_id, temperature)
+            # Affichage immédiat sur toutes les entités de l'appareil
+            # (l'API applique overrideTemp avec le mode 8)
+            self._debouncer.async_schedule(
+                command,
+                {"targetTemp": command.parameters["overrideTemp"], **command.parameters},
             )
     
-    async def _debounced_set_temperature(self):
-        """Set temperature after debounce delay."""
-        try:
-            # Attendre le délai de debounce
-            await asyncio.sleep(DEBOUNCE_DELAY)
-            
-            # Envoyer la requête
-            if self._pending_temperature is not None:
-                temp_to_set = self._pending_temperature
-                _LOGGER.debug(f"Setting temperature to {temp_to_set} after debounce")
-                
-                await self.hass.async_add_executor_job(
-                    self._api.set_temperature, self._device_id, temp_to_set
-                )
-                
-                # Fonction de vérification pour le polling
-                def check_temperature():
-                    device = self._get_device()
-                    if device and device.get("state"):
-                        current_target = device["state"].get("targetTemp")
-                        # Vérifier avec une tolérance de 0.1°C
-                        if current_target is not None and abs(current_target - temp_to_set) < 0.1:
-                            return True
-                    return False
-                
-                # Attendre la confirmation avec polling
-                await self._wait_for_confirmation(check_temperature, f"Temperature {temp_to_set}°C")
-                
-                # Nettoyer l'état en attente
-                self._pending_temperature = None
-                self.async_write_ha_state()
-                
-        except asyncio.CancelledError:
-            # La tâche a été annulée, ne rien faire
-            _LOGGER.debug("Temperature set cancelled due to new change")
-            pass
+    async def _async_send_temperature(self, command, write_id):
+        """Send the debounced temperature and wait for its confirmation."""
+        temp_to_set = command.parameters["overrideTemp"]
+        _LOGGER.debug(f"Setting temperature to {temp_to_set} after debounce")
+        
+        # Journalisée : rejouée si le cloud est injoignable
+        if not await self.coordinator.async_send_command("temperature", command):
+            _ERRORS.error("command_failed", f"Failed to set temperature {temp_to_set}°C, queued for replay")
+            self.coordinator.async_clear_pending(write_id)
+            return
+        
+        # Fonction de vérification pour le polling
+        def check_temperature():
+            device = self.coordinator.get_device(self._device_id, raw=True)
+            if device and device.get("state"):
+                current_target = device["state"].get("targetTemp")
+                # Vérifier avec une tolérance de 0.1°C
+                if current_target is not None and abs(current_target - temp_to_set) < 0.1:
+                    return True
+            return False
+        
+        # Attendre la confirmation avec polling
+        confirmed = await self.coordinator.async_wait_for_confirmation(
+            check_temperature, f"Temperature {temp_to_set}°C", self._device_id, "temperature"
+        )
+        if confirmed is False:
+            _ERRORS.warning("confirmation_timeout", f"Temperature {temp_to_set}°C confirmation timeout, assuming success")
+        
+        # Nettoyer l'état en attente
+        self.coordinator.async_clear_pending(write_id)
     
     async def async_set_hvac_mode(self, hvac_mode: HVACMode):
         """Set new target hvac mode."""
@@ -309,59 +296,247 @@ class GoodHomeClimate(CoordinatorEntity, ClimateEntity):
             mode = 1  # Manuel confort
         
         # État optimiste : afficher immédiatement le nouveau mode
-        self._pending_hvac_mode = hvac_mode
-        self.async_write_ha_state()
+        write_id = self.coordinator.async_set_pending(self._device_id, {"targetMode": mode})
         
-        # Envoyer la commande à l'API
-        await self.hass.async_add_executor_job(
-            self._api.set_mode, self._device_id, mode
-        )
+        # Envoyer la commande à l'API (journalisée, rejouée si le cloud est injoignable)
+        if not await self.coordinator.async_send_command(
+            "targetMode", Command.target_mode(self._device_id, mode)
+        ):
+            _ERRORS.error("command_failed", f"Failed to set HVAC mode {hvac_mode}, queued for replay")
+            self.coordinator.async_clear_pending(write_id)
+            return
         
         # Fonction de vérification pour le polling
         def check_hvac_mode():
-            device = self._get_device()
+            device = self.coordinator.get_device(self._device_id, raw=True)
             if device and device.get("state"):
                 return device["state"].get("targetMode") == mode
             return False
         
         # Attendre la confirmation avec polling
-        await self._wait_for_confirmation(check_hvac_mode, f"HVAC mode {hvac_mode}")
+        confirmed = await self.coordinator.async_wait_for_confirmation(
+            check_hvac_mode, f"HVAC mode {hvac_mode}", self._device_id, "targetMode"
+        )
+        # None : remplacé par une commande plus récente, rien à signaler
+        if confirmed is False:
+            _ERRORS.warning("confirmation_timeout", f"HVAC mode {hvac_mode} confirmation timeout, assuming success")
         
         # Nettoyer l'état en attente
-        self._pending_hvac_mode = None
-        self.async_write_ha_state()
+        self.coordinator.async_clear_pending(write_id)
     
     async def async_set_preset_mode(self, preset_mode: str):
         """Set new preset mode."""
-        # Mapping simplifié pour les presets courants
-        # Pour un contrôle total, utiliser l'entité select.target_mode
-        mode_map = {
-            PRESET_COMFORT: 9,   # Forcé confort (retour auto)
-            PRESET_ECO: 10,      # Forcé éco (retour auto)
-            PRESET_MANUAL: 1,    # Manuel confort
-            PRESET_AWAY: 5,      # Absence longue durée
-        }
-        mode = mode_map.get(preset_mode, 1)
+        mode = PRESET_TARGET_MODES.get(preset_mode, 1)
         
         # État optimiste : afficher immédiatement le nouveau preset
-        self._pending_preset_mode = preset_mode
-        self.async_write_ha_state()
+        write_id = self.coordinator.async_set_pending(self._device_id, {"targetMode": mode})
         
-        # Envoyer la commande à l'API
-        await self.hass.async_add_executor_job(
-            self._api.set_mode, self._device_id, mode
-        )
+        # Envoyer la commande à l'API (journalisée, rejouée si le cloud est injoignable)
+        if not await self.coordinator.async_send_command(
+            "targetMode", Command.target_mode(self._device_id, mode)
+        ):
+            _ERRORS.error("command_failed", f"Failed to set preset mode {preset_mode}, queued for replay")
+            self.coordinator.async_clear_pending(write_id)
+            return
         
         # Fonction de vérification pour le polling
         def check_preset_mode():
-            device = self._get_device()
+            device = self.coordinator.get_device(self._device_id, raw=True)
             if device and device.get("state"):
                 return device["state"].get("targetMode") == mode
             return False
         
         # Attendre la confirmation avec polling
-        await self._wait_for_confirmation(check_preset_mode, f"Preset mode {preset_mode}")
+        confirmed = await self.coordinator.async_wait_for_confirmation(
+            check_preset_mode, f"Preset mode {preset_mode}", self._device_id, "targetMode"
+        )
+        # None : remplacé par une commande plus récente, rien à signaler
+        if confirmed is False:
+            _ERRORS.warning("confirmation_timeout", f"Preset mode {preset_mode} confirmation timeout, assuming success")
         
         # Nettoyer l'état en attente
-        self._pending_preset_mode = None
-        self.async_write_ha_state()
+        self.coordinator.async_clear_pending(write_id)
+
+class GoodHomeZoneClimate(CoordinatorEntity, ClimateEntity):
+    """Several GoodHome radiators controlled as one thermostat."""
+    
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_supported_features = (
+        ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.PRESET_MODE
+    )
+    _attr_hvac_modes = [HVACMode.HEAT, HVACMode.OFF]
+    _attr_preset_modes = [PRESET_COMFORT, PRESET_ECO, PRESET_MANUAL, PRESET_AWAY]
+    _attr_min_temp = 7
+    _attr_max_temp = 30
+    _attr_target_temperature_step = 0.5
+    
+    def __init__(self, coordinator, zone_id, name, members):
+        """Initialize the zone."""
+        super().__init__(coordinator)
+        self._zone_id = f"zone_{coordinator.api.user_id}_{zone_id}"
+        self._members = members
+        self._attr_name = name
+        self._attr_unique_id = f"goodhome_{self._zone_id}"
+    
+    @property
+    def device_info(self):
+        """Return device info of the zone."""
+        return {
+            "identifiers": {("goodhome", self._zone_id)},
+            "name": self._attr_name,
+            "manufacturer": "GoodHome",
+            "model": "Zone",
+        }
+    
+    async def async_added_to_hass(self):
+        """Also refresh when a command on a member changes its pending writes."""
+        await super().async_added_to_hass()
+        for device_id in self._members:
+            self.async_on_remove(
+                self.coordinator.async_add_device_listener(device_id, self.async_write_ha_state)
+            )
+    
+    def _states(self):
+        """Return the states of the connected members, with their pending writes applied."""
+        states = []
+        for device_id in self._members:
+            device = self.coordinator.get_device(device_id)
+            if device and device.get("connected") and device.get("state"):
+                states.append(device["state"])
+        return states
+    
+    @property
+    def available(self):
+        """Return True if at least one member is connected."""
+        return bool(self._states())
+    
+    @property
+    def current_temperature(self):
+        """Return the mean temperature of the members."""
+        temperatures = [state["currentTemp"] for state in self._states() if state.get("currentTemp") is not None]
+        if temperatures:
+            return round(sum(temperatures) / len(temperatures), 1)
+        return None
+    
+    @property
+    def target_temperature(self):
+        """Return the common setpoint, or the mean setpoint rounded to the step."""
+        targets = [state["targetTemp"] for state in self._states() if state.get("targetTemp") is not None]
+        if not targets:
+            return None
+        if min(targets) == max(targets):
+            return targets[0]
+        return round(sum(targets) / len(targets) * 2) / 2
+    
+    @property
+    def hvac_mode(self):
+        """Return HEAT if at least one member heats."""
+        modes = [hvac_mode_from_target_mode(state.get("targetMode", 1)) for state in self._states()]
+        if modes and all(mode == HVACMode.OFF for mode in modes):
+            return HVACMode.OFF
+        return HVACMode.HEAT
+    
+    @property
+    def preset_mode(self):
+        """Return the preset shared by all members, None if they differ."""
+        presets = {preset_from_target_mode(state.get("targetMode", 1)) for state in self._states()}
+        if len(presets) == 1:
+            return presets.pop()
+        return None
+    
+    @property
+    def extra_state_attributes(self):
+        """Return extra state attributes."""
+        states = self._states()
+        targets = [state["targetTemp"] for state in states if state.get("targetTemp") is not None]
+        powers = [power for power in map(power_consumption, states) if power is not None]
+        return {
+            "members": [
+                (self.coordinator.get_device(device_id, raw=True) or {}).get("name", device_id)
+                for device_id in self._members
+            ],
+            "connected_members": len(states),
+            "min_target_temperature": min(targets) if targets else None,
+            "max_target_temperature": max(targets) if targets else None,
+            "power_consumption": round(sum(powers), 1) if powers else None,
+        }
+    
+    async def async_set_temperature(self, **kwargs):
+        """Set the target temperature of every member."""
+        temperature = kwargs.get(ATTR_TEMPERATURE)
+        if temperature is None:
+            return
+        
+        def is_applied(state):
+            target = state.get("targetTemp")
+            return target is not None and abs(target - temperature) < 0.1
+        
+        # Même écriture que le thermostat d'un radiateur (overrideTemp avec le mode 8)
+        commands = [Command.override_temperature(device_id, temperature) for device_id in self._members]
+        await self._async_fan_out(
+            f"Zone {self._attr_name} temperature {temperature}°C",
+            "temperature",
+            commands,
+            {"targetTemp": commands[0].parameters["overrideTemp"], **commands[0].parameters},
+            is_applied,
+        )
+    
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode):
+        """Set the hvac mode of every member."""
+        mode = 3 if hvac_mode == HVACMode.OFF else 1
+        await self._async_set_target_mode(mode, f"Zone {self._attr_name} HVAC mode {hvac_mode}")
+    
+    async def async_set_preset_mode(self, preset_mode: str):
+        """Set the preset of every member."""
+        mode = PRESET_TARGET_MODES.get(preset_mode, 1)
+        await self._async_set_target_mode(mode, f"Zone {self._attr_name} preset mode {preset_mode}")
+    
+    async def _async_set_target_mode(self, mode, description):
+        await self._async_fan_out(
+            description,
+            "targetMode",
+            [Command.target_mode(device_id, mode) for device_id in self._members],
+            {"targetMode": mode},
+            lambda state: state.get("targetMode") == mode,
+        )
+    
+    async def _async_fan_out(self, description, key, commands, fields, is_applied):
+        """Send one write per member in parallel, then wait for a shared confirmation.
+        
+        Chaque radiateur reçoit tous ses paramètres en une requête ; la
+        confirmation relit la liste complète des appareils, une fois pour
+        toute la zone, jusqu'à ce que tous les membres rapportent la valeur.
+        """
+        coordinator = self.coordinator
+        write_ids = {
+            device_id: coordinator.async_set_pending(device_id, fields)
+            for device_id in self._members
+        }
+        results = await asyncio.gather(
+            *(coordinator.async_send_command(key, command) for command in commands),
+            return_exceptions=True,
+        )
+        # Les commandes refusées restent affichées par le journal jusqu'à leur rejeu
+        sent = [device_id for device_id, result in zip(self._members, results) if result is True]
+        if len(sent) < len(self._members):
+            _ERRORS.error(
+                "command_failed",
+                f"{description}: {len(self._members) - len(sent)} of {len(self._members)} radiators failed, queued for replay",
+            )
+        
+        def check_members():
+            for device_id in sent:
+                device = coordinator.get_device(device_id, raw=True)
+                if not (device and device.get("state") and is_applied(device["state"])):
+                    return False
+            return True
+        
+        if sent:
+            confirmed = await coordinator.async_wait_for_confirmation(
+                check_members, description, None, f"{self._zone_id}_{key}"
+            )
+            if confirmed is False:
+                _ERRORS.warning("confirmation_timeout", f"{description} confirmation timeout, assuming success")
+        
+        for write_id in write_ids.values():
+            coordinator.async_clear_pending(write_id)
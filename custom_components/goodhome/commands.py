@@ -0,0 +1,144 @@
+"""Commandes typées de l'API GoodHome.
+
+Une commande est l'écriture d'un ou plusieurs paramètres d'un radiateur,
+validée à sa création (paramètre connu, type et bornes) et normalisée
+(températures en float à une décimale). Toutes les commandes partent par
+`GoodHomeAPI.send()` ; plusieurs commandes sur le même radiateur peuvent
+être fusionnées en une seule requête (`merge_commands()`).
+"""
+
+# Valeurs de targetMode acceptées par les thermostats (voir select.TARGET_MODES)
+TARGET_MODE_VALUES = frozenset({0, 1, 2, 3, 5, 8, 9, 10, 12, 30, 60, 61, 70})
+# Mode appliqué avec overrideTemp quand la consigne est changée depuis le thermostat
+OVERRIDE_MODE = 8
+# Températures de consigne modifiables, et leurs bornes (°C)
+SETPOINTS = ("comfTemp", "ecoTemp", "antifTemp")
+MIN_TEMPERATURE = 7.0
+MAX_TEMPERATURE = 30.0
+
+
+class InvalidCommand(ValueError):
+    """Raised when a command targets an unknown parameter or an invalid value."""
+
+
+def _temperature(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidCommand(f"{name} must be a number, got {value!r}")
+    if not MIN_TEMPERATURE <= value <= MAX_TEMPERATURE:
+        raise InvalidCommand(f"{name} must be between {MIN_TEMPERATURE} and {MAX_TEMPERATURE}°C, got {value}")
+    # L'API attend des températures en float avec 1 décimale
+    return round(float(value), 1)
+
+
+def _flag(name, value):
+    # L'API GoodHome attend des booléens JSON (true/false) pour les switches
+    if not isinstance(value, bool):
+        raise InvalidCommand(f"{name} must be true or false, got {value!r}")
+    return value
+
+
+def _target_mode(name, value):
+    if isinstance(value, bool) or value not in TARGET_MODE_VALUES:
+        raise InvalidCommand(f"Unknown {name} {value!r}")
+    return int(value)
+
+
+def _ping(name, value):
+    if value != 1 or isinstance(value, bool):
+        raise InvalidCommand(f"{name} must be 1, got {value!r}")
+    return 1
+
+
+# Paramètres modifiables et leur validation (retourne la valeur normalisée)
+PARAMETERS = {
+    "targetMode": _target_mode,
+    "overrideTemp": _temperature,
+    "comfTemp": _temperature,
+    "ecoTemp": _temperature,
+    "antifTemp": _temperature,
+    "window": _flag,
+    "occupancyStatus": _flag,
+    "selfLearning": _flag,
+    "noprog": _flag,
+    "ping": _ping,
+}
+
+
+class Command:
+    """Validated write of one or more parameters of a device."""
+
+    __slots__ = ("device_id", "parameters", "kind")
+
+    def __init__(self, device_id: str, parameters: dict, kind: str = "parameters"):
+        """Validate and normalize `parameters`; raise InvalidCommand otherwise."""
+        if not device_id:
+            raise InvalidCommand("Missing device id")
+        if not parameters:
+            raise InvalidCommand(f"No parameter to write for device {device_id}")
+        normalized = {}
+        for name, value in parameters.items():
+            validate = PARAMETERS.get(name)
+            if validate is None:
+                raise InvalidCommand(f"Unknown parameter {name!r}")
+            normalized[name] = validate(name, value)
+        self.device_id = device_id
+        self.parameters = normalized
+        self.kind = kind
+
+    @classmethod
+    def override_temperature(cls, device_id: str, temperature: float) -> "Command":
+        """Change the setpoint from the thermostat (overrideTemp with the override mode)."""
+        return cls(
+            device_id,
+            {"overrideTemp": temperature, "targetMode": OVERRIDE_MODE},
+            "override_temperature",
+        )
+
+    @classmethod
+    def setpoint(cls, device_id: str, temp_type: str, temperature: float) -> "Command":
+        """Change a comfort, eco or antifreeze setpoint."""
+        if temp_type not in SETPOINTS:
+            raise InvalidCommand(f"Unknown setpoint {temp_type!r}")
+        return cls(device_id, {temp_type: temperature}, "setpoint")
+
+    @classmethod
+    def target_mode(cls, device_id: str, mode: int) -> "Command":
+        """Change the target mode."""
+        return cls(device_id, {"targetMode": mode}, "target_mode")
+
+    @classmethod
+    def parameter(cls, device_id: str, name: str, value) -> "Command":
+        """Change any known parameter (switches...)."""
+        return cls(device_id, {name: value}, "parameter")
+
+    @classmethod
+    def identify(cls, device_id: str) -> "Command":
+        """Make the device beep."""
+        return cls(device_id, {"ping": 1}, "identify")
+
+    def __eq__(self, other):
+        if not isinstance(other, Command):
+            return NotImplemented
+        return (self.device_id, self.parameters, self.kind) == (other.device_id, other.parameters, other.kind)
+
+    def __repr__(self):
+        return f"Command({self.kind}, {self.device_id}, {self.parameters})"
+
+
+def merge_commands(commands) -> list[Command]:
+    """Merge the commands of each device into one, later values winning.
+
+    L'ordre des radiateurs est celui de leur première commande.
+    """
+    merged = {}
+    for command in commands:
+        previous = merged.get(command.device_id)
+        if previous is None:
+            merged[command.device_id] = command
+        else:
+            batch = Command.__new__(Command)
+            batch.device_id = command.device_id
+            batch.parameters = {**previous.parameters, **command.parameters}
+            batch.kind = "batch"
+            merged[command.device_id] = batch
+    return list(merged.values())
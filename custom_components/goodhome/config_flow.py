@@ -6,7 +6,45 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 
-from .goodhome_api import GoodHomeAPI
+from .const import (
+    CONF_BASE_URL,
+    CONF_COMMAND_TIMEOUT,
+    CONF_CONFIRM_FIRST_DELAY,
+    CONF_CONFIRM_MAX_DELAY,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_CONNECT_TIMEOUT,
+    CONF_DEBOUNCE_MODE,
+    CONF_DEBOUNCE_SETPOINT,
+    CONF_DEBOUNCE_SWITCH,
+    CONF_DEBOUNCE_TEMPERATURE,
+    CONF_IO_WORKERS,
+    CONF_POLL_TIMEOUT,
+    CONF_RATE_BURST,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_ROOM_ZONES,
+    CONF_UNKNOWN_FIELDS,
+    CONF_ZONES,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_CONFIRM_FIRST_DELAY,
+    DEFAULT_CONFIRM_MAX_DELAY,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_DEBOUNCE_MODE,
+    DEFAULT_DEBOUNCE_SETPOINT,
+    DEFAULT_DEBOUNCE_SWITCH,
+    DEFAULT_DEBOUNCE_TEMPERATURE,
+    DEFAULT_IO_WORKERS,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_ROOM_ZONES,
+    DEFAULT_UNKNOWN_FIELDS,
+    MAX_IO_WORKERS,
+)
+from .goodhome_api import BASE_URL, GoodHomeAPI
+from .zone import parse_zones
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,22 +64,30 @@ class GoodHomeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             try:
                 email = user_input[CONF_EMAIL]
                 password = user_input[CONF_PASSWORD]
+                base_url = user_input.get(CONF_BASE_URL, BASE_URL)
                 
                 # Tester la connexion
-                api = GoodHomeAPI(None, None, email, password)
-                success = await self.hass.async_add_executor_job(api.login)
+                api = GoodHomeAPI(None, None, email, password, base_url=base_url)
+                try:
+                    success = await api.executor.async_run(api.login)
+                finally:
+                    await self.hass.async_add_executor_job(api.close)
                 
                 if success:
                     # Créer l'entrée de configuration
                     await self.async_set_unique_id(email)
                     self._abort_if_unique_id_configured()
                     
+                    data = {
+                        CONF_EMAIL: email,
+                        CONF_PASSWORD: password,
+                    }
+                    if base_url != BASE_URL:
+                        data[CONF_BASE_URL] = base_url
+                    
                     return self.async_create_entry(
                         title=f"GoodHome ({email})",
-                        data={
-                            CONF_EMAIL: email,
-                            CONF_PASSWORD: password,
-                        },
+                        data=data,
                     )
                 else:
                     errors["base"] = "invalid_auth"
@@ -51,10 +97,14 @@ class GoodHomeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "cannot_connect"
 
         # Afficher le formulaire
-        data_schema = vol.Schema({
+        schema = {
             vol.Required(CONF_EMAIL): str,
             vol.Required(CONF_PASSWORD): str,
-        })
+        }
+        # Mode avancé : pointer vers un autre serveur (simulateur local...)
+        if self.show_advanced_options:
+            schema[vol.Optional(CONF_BASE_URL, default=BASE_URL)] = str
+        data_schema = vol.Schema(schema)
 
         return self.async_show_form(
             step_id="user",
@@ -78,13 +128,94 @@ class GoodHomeOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                parse_zones(user_input.get(CONF_ZONES, ""))
+            except ValueError:
+                errors[CONF_ZONES] = "invalid_zones"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
+        options = user_input or self.config_entry.options
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
-                # Ici tu peux ajouter des options configurables
-                # Par exemple: intervalle de mise à jour, etc.
+                # Budget global de requêtes vers le cloud GoodHome
+                vol.Optional(
+                    CONF_RATE_LIMIT,
+                    default=options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=50)),
+                vol.Optional(
+                    CONF_RATE_BURST,
+                    default=options.get(CONF_RATE_BURST, DEFAULT_RATE_BURST),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                # Threads dédiés aux appels vers le cloud GoodHome
+                vol.Optional(
+                    CONF_IO_WORKERS,
+                    default=options.get(CONF_IO_WORKERS, DEFAULT_IO_WORKERS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_IO_WORKERS)),
+                # Délais réseau (secondes)
+                vol.Optional(
+                    CONF_CONNECT_TIMEOUT,
+                    default=options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+                vol.Optional(
+                    CONF_READ_TIMEOUT,
+                    default=options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=120)),
+                vol.Optional(
+                    CONF_COMMAND_TIMEOUT,
+                    default=options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=300)),
+                vol.Optional(
+                    CONF_POLL_TIMEOUT,
+                    default=options.get(CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=300)),
+                # Sondages de confirmation des commandes (secondes)
+                vol.Optional(
+                    CONF_CONFIRM_FIRST_DELAY,
+                    default=options.get(CONF_CONFIRM_FIRST_DELAY, DEFAULT_CONFIRM_FIRST_DELAY),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=30)),
+                vol.Optional(
+                    CONF_CONFIRM_MAX_DELAY,
+                    default=options.get(CONF_CONFIRM_MAX_DELAY, DEFAULT_CONFIRM_MAX_DELAY),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+                vol.Optional(
+                    CONF_CONFIRM_TIMEOUT,
+                    default=options.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=5, max=300)),
+                # Regroupement des modifications rapprochées avant l'envoi (secondes)
+                vol.Optional(
+                    CONF_DEBOUNCE_TEMPERATURE,
+                    default=options.get(CONF_DEBOUNCE_TEMPERATURE, DEFAULT_DEBOUNCE_TEMPERATURE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                vol.Optional(
+                    CONF_DEBOUNCE_SETPOINT,
+                    default=options.get(CONF_DEBOUNCE_SETPOINT, DEFAULT_DEBOUNCE_SETPOINT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                vol.Optional(
+                    CONF_DEBOUNCE_MODE,
+                    default=options.get(CONF_DEBOUNCE_MODE, DEFAULT_DEBOUNCE_MODE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                vol.Optional(
+                    CONF_DEBOUNCE_SWITCH,
+                    default=options.get(CONF_DEBOUNCE_SWITCH, DEFAULT_DEBOUNCE_SWITCH),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                # Zones : "Étage: Salon, Cuisine; Chambres: Chambre 1, Chambre 2"
+                vol.Optional(
+                    CONF_ZONES,
+                    default=options.get(CONF_ZONES, ""),
+                ): str,
+                vol.Optional(
+                    CONF_ROOM_ZONES,
+                    default=options.get(CONF_ROOM_ZONES, DEFAULT_ROOM_ZONES),
+                ): bool,
+                # Champs de l'API non utilisés, pour les diagnostics (plus de mémoire)
+                vol.Optional(
+                    CONF_UNKNOWN_FIELDS,
+                    default=options.get(CONF_UNKNOWN_FIELDS, DEFAULT_UNKNOWN_FIELDS),
+                ): bool,
             }),
+            errors=errors,
         )
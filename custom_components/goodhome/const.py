@@ -1,6 +1,80 @@
 """Constants for GoodHome integration."""
 
-# Constantes pour le polling de confirmation
-POLLING_MAX_ATTEMPTS = 8  # Nombre maximum de tentatives (8 × 5s = 40s)
-POLLING_INTERVAL = 5  # Intervalle entre chaque tentative (secondes)
-DEBOUNCE_DELAY = 3  # Délai avant d'envoyer la commande de température (secondes)
+# Sondages de confirmation d'une commande : premier délai court, puis doublé
+# jusqu'au délai maximal, dans la limite du budget total (secondes)
+CONF_CONFIRM_FIRST_DELAY = "confirm_first_delay"
+CONF_CONFIRM_MAX_DELAY = "confirm_max_delay"
+CONF_CONFIRM_TIMEOUT = "confirm_timeout"
+DEFAULT_CONFIRM_FIRST_DELAY = 1  # 1, 2, 4, 8, 10, 10, 5 s
+DEFAULT_CONFIRM_MAX_DELAY = 10
+DEFAULT_CONFIRM_TIMEOUT = 40
+
+# Fenêtres de regroupement des modifications rapprochées avant l'envoi d'une
+# commande (secondes)
+CONF_DEBOUNCE_TEMPERATURE = "debounce_temperature"
+CONF_DEBOUNCE_SETPOINT = "debounce_setpoint"
+CONF_DEBOUNCE_MODE = "debounce_mode"
+CONF_DEBOUNCE_SWITCH = "debounce_switch"
+DEFAULT_DEBOUNCE_TEMPERATURE = 3  # Température du thermostat
+DEFAULT_DEBOUNCE_SETPOINT = 2  # Consignes confort / éco / hors-gel
+DEFAULT_DEBOUNCE_MODE = 1  # Mode cible
+DEFAULT_DEBOUNCE_SWITCH = 1  # Interrupteurs
+
+# Limiteur de débit global (partagé par tous les comptes d'un même hôte)
+CONF_RATE_LIMIT = "rate_limit"
+CONF_RATE_BURST = "rate_burst"
+DEFAULT_RATE_LIMIT = 2.0  # Requêtes par seconde
+DEFAULT_RATE_BURST = 10  # Nombre de requêtes pouvant partir d'un coup
+
+# Pool de threads des appels bloquants (partagé par tous les comptes d'un même hôte)
+CONF_IO_WORKERS = "io_workers"
+DEFAULT_IO_WORKERS = 4
+MAX_IO_WORKERS = 10  # Taille du pool de connexions HTTP de l'hôte
+
+# Disjoncteur en cas de panne du cloud GoodHome
+CIRCUIT_FAILURE_THRESHOLD = 5  # Échecs consécutifs avant ouverture
+CIRCUIT_BASE_DELAY = 10  # Premier délai avant une requête de test (secondes)
+CIRCUIT_MAX_DELAY = 300  # Délai maximal entre deux requêtes de test (secondes)
+
+# Délais réseau (secondes) : par requête et par opération logique
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_COMMAND_TIMEOUT = "command_timeout"
+CONF_POLL_TIMEOUT = "poll_timeout"
+DEFAULT_CONNECT_TIMEOUT = 5  # Établissement de la connexion TCP/TLS
+DEFAULT_READ_TIMEOUT = 10  # Attente de la réponse
+DEFAULT_COMMAND_TIMEOUT = 15  # Budget total d'une commande (refresh du token et retry compris)
+DEFAULT_POLL_TIMEOUT = 25  # Budget total d'une lecture des appareils
+
+# Fenêtre pendant laquelle une lecture récente est réutilisée au lieu d'être refaite (secondes)
+COALESCE_WINDOW = 2
+
+# Zones : plusieurs radiateurs pilotés ensemble (voir zone.py)
+CONF_ZONES = "zones"
+CONF_ROOM_ZONES = "room_zones"
+DEFAULT_ROOM_ZONES = False
+
+# Nouvel essai d'une commande après une erreur réseau ou une indisponibilité passagère (502, 503, 504)
+COMMAND_RETRIES = 1
+COMMAND_RETRY_DELAY = 0.5  # Secondes, doublé à chaque essai
+
+# URL du cloud GoodHome (modifiable pour pointer vers un simulateur local)
+CONF_BASE_URL = "base_url"
+
+# Champs de l'état non lus par les entités, conservés pour les diagnostics
+CONF_UNKNOWN_FIELDS = "unknown_fields"
+DEFAULT_UNKNOWN_FIELDS = False
+
+# Intervalle des résumés d'erreurs répétées dans les logs (secondes)
+LOG_SUMMARY_INTERVAL = 300
+
+# Durée de vie maximale d'une écriture en attente non confirmée (secondes)
+PENDING_WRITE_TTL = 120
+
+# Nombre maximal de boucles de confirmation simultanées (les plus anciennes sont abandonnées)
+MAX_PENDING_CONFIRMATIONS = 20
+
+# Journal des commandes non confirmées (rejoué après une panne ou un redémarrage)
+JOURNAL_MAX_AGE = 1800  # Au-delà, une commande n'est plus rejouée (secondes)
+JOURNAL_RETRY_DELAY = 10  # Premier délai avant un nouvel essai (secondes)
+JOURNAL_RETRY_MAX_DELAY = 300  # Délai maximal entre deux essais (secondes)
@@ -0,0 +1,379 @@
+"""GoodHome data update coordinator."""
+import logging
+import asyncio
+import itertools
+import time
+from collections import deque
+from datetime import timedelta
+from functools import partial
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from . import log_aggregator, profiler
+from .const import (
+    DEFAULT_CONFIRM_FIRST_DELAY,
+    DEFAULT_CONFIRM_MAX_DELAY,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_DEBOUNCE_MODE,
+    DEFAULT_DEBOUNCE_SETPOINT,
+    DEFAULT_DEBOUNCE_SWITCH,
+    DEFAULT_DEBOUNCE_TEMPERATURE,
+    MAX_PENDING_CONFIRMATIONS,
+    PENDING_WRITE_TTL,
+)
+from .commands import Command
+from .journal import CommandJournal
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_CONFIRM
+
+_LOGGER = logging.getLogger(__name__)
+
+UPDATE_INTERVAL = timedelta(seconds=60)
+# Nombre de rafraîchissements conservés pour les diagnostics
+UPDATE_HISTORY_SIZE = 20
+
+class GoodHomeCoordinator(DataUpdateCoordinator):
+    """Coordinator fetching all devices of a GoodHome account."""
+
+    def __init__(self, hass: HomeAssistant, api):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="goodhome",
+            update_interval=UPDATE_INTERVAL,
+        )
+        self.api = api
+        # Le prochain rafraîchissement a été demandé par une confirmation de commande
+        self._confirm_refresh = False
+        # Durées des derniers rafraîchissements et confirmations en cours (diagnostics)
+        self.update_history = deque(maxlen=UPDATE_HISTORY_SIZE)
+        self.pending_confirmations = {}
+        self._confirmation_ids = itertools.count(1)
+        # Boucles de confirmation en cours (ordre de création) et dernière par (appareil, clé)
+        self._confirmation_tasks = {}
+        self._confirmation_keys = {}
+        # Dernière lecture individuelle de chaque appareil (détection des 304)
+        self._probed = {}
+        # Dernière liste renvoyée par le client (même objet tant qu'elle n'a pas changé)
+        self._listed = None
+        self.set_confirmation_schedule(
+            DEFAULT_CONFIRM_FIRST_DELAY, DEFAULT_CONFIRM_MAX_DELAY, DEFAULT_CONFIRM_TIMEOUT
+        )
+        self.set_debounce_delays(
+            DEFAULT_DEBOUNCE_TEMPERATURE, DEFAULT_DEBOUNCE_SETPOINT, DEFAULT_DEBOUNCE_MODE, DEFAULT_DEBOUNCE_SWITCH
+        )
+        # Index des appareils et écritures en attente par appareil
+        # ({device_id: {champ: (valeur, write_id)}}), appliquées à l'instantané
+        # lu par toutes les entités de l'appareil
+        self._devices = {}
+        self._pending = {}
+        self._merged = {}
+        self._write_ids = itertools.count(1)
+        self._write_timers = {}
+        self._device_listeners = {}
+        # Commandes non confirmées, rejouées après une panne ou un redémarrage
+        self.journal = CommandJournal(self)
+
+    async def _async_update_data(self):
+        """Fetch data from API."""
+        priority = PRIORITY_CONFIRM if self._confirm_refresh else PRIORITY_BACKGROUND
+        self._confirm_refresh = False
+        start = time.monotonic()
+        record = {
+            "started": dt_util.utcnow().isoformat(),
+            "priority": "confirm" if priority == PRIORITY_CONFIRM else "background",
+        }
+        try:
+            devices = await self.api.executor.async_run(
+                profiler.wrap(partial(self.api.get_devices, priority=priority))
+            )
+            if devices is self._listed and self.data is not None:
+                # Liste inchangée (304) : garder les appareils relus entre-temps par les sondages
+                devices = self.data
+            else:
+                self._listed = devices
+            record["devices"] = len(devices)
+            self._devices = {device["id"]: device for device in devices}
+            self._merged.clear()
+            self._reconcile_pending(self._pending)
+            self.journal.reconcile(self._devices)
+            return devices
+        except Exception as err:
+            record["error"] = str(err)
+            raise UpdateFailed(f"Error communicating with API: {err}")
+        finally:
+            record["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+            self.update_history.append(record)
+            # Résumés périodiques même quand les erreurs ont cessé
+            log_aggregator.flush_all()
+
+    async def async_request_confirmation_refresh(self):
+        """Request a refresh with the priority of a command confirmation."""
+        self._confirm_refresh = True
+        await self.async_request_refresh()
+
+    def set_confirmation_schedule(self, first_delay: float, max_delay: float, timeout: float) -> None:
+        """Configure the confirmation probes (delays in seconds)."""
+        self.confirm_first_delay = first_delay
+        self.confirm_max_delay = max(max_delay, first_delay)
+        self.confirm_timeout = timeout
+
+    def set_debounce_delays(self, temperature: float, setpoint: float, mode: float, switch: float) -> None:
+        """Configure the coalescing windows of the entities (seconds)."""
+        self.debounce_temperature = temperature
+        self.debounce_setpoint = setpoint
+        self.debounce_mode = mode
+        self.debounce_switch = switch
+
+    def confirmation_delays(self) -> list[float]:
+        """Return the delays before each confirmation probe."""
+        delays = []
+        elapsed = 0
+        delay = self.confirm_first_delay
+        while elapsed < self.confirm_timeout:
+            delay = min(delay, self.confirm_timeout - elapsed)
+            delays.append(delay)
+            elapsed += delay
+            delay = min(delay * 2, self.confirm_max_delay)
+        return delays
+
+    async def async_wait_for_confirmation(
+        self,
+        check_function: Callable[[], bool],
+        description: str,
+        device_id: str | None = None,
+        key: str | None = None,
+    ) -> bool | None:
+        """
+        Attendre la confirmation d'un changement avec polling.
+
+        L'appareil est relu seul à chaque sondage, avec une requête
+        conditionnelle : tant qu'il répond 304, rien n'est mis à jour. Sans
+        appareil (zone de plusieurs radiateurs), c'est la liste complète qui
+        est relue, une fois pour tous.
+
+        Une nouvelle attente sur le même appareil et la même clé (ex. targetMode)
+        annule celle qu'elle remplace ; au-delà de MAX_PENDING_CONFIRMATIONS
+        attentes, les plus anciennes sont abandonnées (le rafraîchissement
+        périodique prend le relais).
+
+        Args:
+            check_function: Fonction qui retourne True si le changement est confirmé
+            description: Description du changement pour les logs
+            device_id: Appareil concerné (diagnostics)
+            key: Paramètre modifié ; une attente plus récente sur la même clé remplace celle-ci
+
+        Returns:
+            True si confirmé, False si timeout, None si remplacé ou abandonné
+        """
+        confirmation_id = next(self._confirmation_ids)
+        pending = {
+            "description": description,
+            "device_id": device_id,
+            "key": key,
+            "started": dt_util.utcnow().isoformat(),
+            "attempt": 0,
+            "not_modified": 0,
+            "timeout_s": self.confirm_timeout,
+        }
+        task = self.hass.async_create_task(
+            self._async_poll_confirmation(check_function, description, device_id, pending)
+        )
+        self.pending_confirmations[confirmation_id] = pending
+        self._confirmation_tasks[confirmation_id] = task
+
+        if key is not None:
+            replaced = self._confirmation_keys.get((device_id, key))
+            self._confirmation_keys[(device_id, key)] = confirmation_id
+            if replaced is not None:
+                self._cancel_confirmation(replaced, "superseded")
+        while len(self._confirmation_tasks) > MAX_PENDING_CONFIRMATIONS:
+            self._cancel_confirmation(next(iter(self._confirmation_tasks)), "dropped")
+
+        try:
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            self._forget_confirmation(confirmation_id, device_id, key)
+
+        if task.cancelled():
+            return None
+        return task.result()
+
+    async def _async_poll_confirmation(self, check_function, description, device_id, pending):
+        """Probe until `check_function` returns True or the schedule runs out."""
+        delays = self.confirmation_delays()
+        for attempt, delay in enumerate(delays, 1):
+            pending["attempt"] = attempt
+            await asyncio.sleep(delay)
+            if device_id is None:
+                # Liste complète relue sans délai anti-rebond : le calendrier des
+                # sondages limite déjà la fréquence (confirmation d'une zone)
+                self._confirm_refresh = True
+                await self.async_refresh()
+            elif not await self._async_probe_device(device_id):
+                pending["not_modified"] += 1
+
+            # Vérification toujours faite : un rafraîchissement complet a pu arriver entre-temps
+            if check_function():
+                _LOGGER.debug(f"{description} confirmed after {attempt} probes")
+                return True
+
+            _LOGGER.debug(f"Waiting for {description} confirmation... probe {attempt}/{len(delays)}")
+
+        _LOGGER.debug(f"{description} confirmation timeout after {len(delays)} probes")
+        return False
+
+    async def _async_probe_device(self, device_id) -> bool:
+        """Read one device with a conditional request; return False if unchanged."""
+        device = await self.api.executor.async_run(
+            partial(self.api.get_device, device_id, priority=PRIORITY_CONFIRM)
+        )
+        # Sur un 304, le client renvoie l'objet déjà en cache : rien à mettre à jour
+        if device is None or device is self._probed.get(device_id):
+            return False
+        self._probed[device_id] = device
+        if device_id not in self._devices:
+            return True
+        # Nouvelle liste : celle du client (cache, lectures partagées) n'est jamais modifiée
+        data = [device if item["id"] == device_id else item for item in self.data]
+        self._devices[device_id] = device
+        self._reconcile_pending([device_id])
+        self.journal.reconcile({device_id: device})
+        self.async_set_updated_data(data)
+        return True
+
+    def _cancel_confirmation(self, confirmation_id, reason):
+        """Stop a confirmation loop; its waiter gets None."""
+        task = self._confirmation_tasks.pop(confirmation_id, None)
+        pending = self.pending_confirmations.pop(confirmation_id, None)
+        if task is not None:
+            task.cancel()
+            _LOGGER.debug(f"{pending['description']} confirmation {reason}")
+
+    def _forget_confirmation(self, confirmation_id, device_id, key):
+        self._confirmation_tasks.pop(confirmation_id, None)
+        self.pending_confirmations.pop(confirmation_id, None)
+        if key is not None and self._confirmation_keys.get((device_id, key)) == confirmation_id:
+            del self._confirmation_keys[(device_id, key)]
+
+    async def async_shutdown(self) -> None:
+        """Cancel the confirmation loops, pending write timers and replays, then stop."""
+        self.journal.async_shutdown()
+        for confirmation_id in list(self._confirmation_tasks):
+            self._cancel_confirmation(confirmation_id, "cancelled")
+        for cancel in self._write_timers.values():
+            cancel()
+        self._write_timers.clear()
+        await super().async_shutdown()
+
+    async def async_send_command(self, key: str, command: Command) -> bool:
+        """Journal `command` under `key`, then send it from the GoodHome executor.
+
+        Si l'envoi échoue, la commande reste journalisée et affichée, et
+        sera rejouée par le journal.
+        """
+        self.journal.async_record(command.device_id, key, command.parameters)
+        try:
+            success = await self.api.executor.async_run(self.api.send, command)
+        except Exception:
+            self.journal.async_failed(command.device_id, key, command.parameters)
+            raise
+        if success:
+            self.journal.async_sent(command.device_id, key, command.parameters)
+        else:
+            self.journal.async_failed(command.device_id, key, command.parameters)
+        return success
+
+    def get_device(self, device_id: str, raw: bool = False):
+        """Return the device snapshot, with its pending writes applied unless `raw`."""
+        device = self._devices.get(device_id)
+        if raw or device is None or device_id not in self._pending:
+            return device
+        merged = self._merged.get(device_id)
+        if merged is None:
+            fields = {key: value for key, (value, _) in self._pending[device_id].items()}
+            merged = {**device, "state": {**(device.get("state") or {}), **fields}}
+            self._merged[device_id] = merged
+        return merged
+
+    def pending_writes(self, device_id: str | None = None) -> dict:
+        """Return {device_id: {field: value}} of the pending writes (diagnostics)."""
+        return {
+            pending_device: {key: value for key, (value, _) in fields.items()}
+            for pending_device, fields in self._pending.items()
+            if device_id is None or pending_device == device_id
+        }
+
+    @callback
+    def async_add_device_listener(self, device_id: str, update_callback: Callable[[], None]):
+        """Call `update_callback` when the pending writes of a device change."""
+        listeners = self._device_listeners.setdefault(device_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_set_pending(self, device_id: str, fields: dict, ttl: float = PENDING_WRITE_TTL) -> int:
+        """Show `fields` on every entity of the device until confirmed, cleared or expired.
+
+        Retourne l'identifiant de l'écriture, à passer à `async_clear_pending`.
+        Une écriture plus récente sur le même champ le reprend à son compte.
+        """
+        write_id = next(self._write_ids)
+        pending = self._pending.setdefault(device_id, {})
+        for key, value in fields.items():
+            pending[key] = (value, write_id)
+
+        @callback
+        def expire(_now):
+            self.async_clear_pending(write_id)
+
+        self._write_timers[write_id] = async_call_later(self.hass, ttl, expire)
+        self._async_device_changed(device_id)
+        return write_id
+
+    @callback
+    def async_clear_pending(self, write_id: int) -> None:
+        """Drop the fields still owned by a write (confirmed, failed or expired)."""
+        cancel = self._write_timers.pop(write_id, None)
+        if cancel is not None:
+            cancel()
+        for device_id, fields in list(self._pending.items()):
+            owned = [key for key, (_, owner) in fields.items() if owner == write_id]
+            if not owned:
+                continue
+            for key in owned:
+                del fields[key]
+            if not fields:
+                del self._pending[device_id]
+            self._async_device_changed(device_id)
+
+    def _reconcile_pending(self, device_ids):
+        """Drop the pending fields the new snapshot of `device_ids` already reports."""
+        for device_id in list(device_ids):
+            self._merged.pop(device_id, None)
+            fields = self._pending.get(device_id)
+            if fields is None:
+                continue
+            state = (self._devices.get(device_id) or {}).get("state") or {}
+            for key in [key for key, (value, _) in fields.items() if state.get(key) == value]:
+                del fields[key]
+            if not fields:
+                del self._pending[device_id]
+
+    @callback
+    def _async_device_changed(self, device_id):
+        self._merged.pop(device_id, None)
+        for update_callback in list(self._device_listeners.get(device_id, ())):
+            update_callback()
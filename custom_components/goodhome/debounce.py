@@ -0,0 +1,80 @@
+"""Commandes différées (debounce) des entités GoodHome.
+
+Chaque interaction affiche immédiatement la valeur demandée (écriture en
+attente du coordinator, visible par toutes les entités de l'appareil), mais
+la commande n'est envoyée qu'après `delay` secondes sans nouvelle
+interaction : des changements rapides ne produisent qu'une écriture, avec
+la dernière valeur.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DebouncedCommand:
+    """Send only the last value requested within `delay` seconds."""
+
+    def __init__(
+        self,
+        coordinator,
+        device_id: str,
+        delay: float,
+        send: Callable[[Any, int], Awaitable[None]],
+    ):
+        """Initialize the command; `send(value, write_id)` performs the write."""
+        self._coordinator = coordinator
+        self._device_id = device_id
+        self._delay = delay
+        self._send = send
+        self._waiting = None
+        self._write_id = None
+        self.pending_value = None
+
+    @property
+    def is_pending(self) -> bool:
+        """Return True while a value is waiting for the end of the delay."""
+        return self._waiting is not None
+
+    @callback
+    def async_schedule(self, value: Any, fields: dict) -> None:
+        """Show `fields` at once and send `value` once the interactions stop."""
+        previous_write = self._write_id
+        self._write_id = self._coordinator.async_set_pending(self._device_id, fields)
+        if previous_write is not None:
+            # Les champs appartiennent désormais à la nouvelle écriture
+            self._coordinator.async_clear_pending(previous_write)
+
+        if self._waiting is not None:
+            self._waiting.cancel()
+        self.pending_value = value
+        self._waiting = self._coordinator.hass.async_create_task(
+            self._async_send_later(value, self._write_id)
+        )
+
+    async def _async_send_later(self, value, write_id):
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            _LOGGER.debug(f"Command {value!r} for {self._device_id} replaced by a newer value")
+            raise
+        # La commande part : une nouvelle interaction programmera un nouvel envoi
+        self._waiting = None
+        self.pending_value = None
+        if self._write_id == write_id:
+            self._write_id = None
+        await self._send(value, write_id)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the value waiting to be sent (entity removed)."""
+        if self._waiting is not None:
+            self._waiting.cancel()
+            self._waiting = None
+        self.pending_value = None
+        if self._write_id is not None:
+            self._coordinator.async_clear_pending(self._write_id)
+            self._write_id = None
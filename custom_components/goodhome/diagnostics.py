@@ -0,0 +1,143 @@
+"""Diagnostics de l'intégration GoodHome.
+
+Tout est lu dans l'état en mémoire (coordinator, client API, entités) :
+aucune requête n'est envoyée au cloud pour produire les diagnostics.
+"""
+import time
+from datetime import datetime, timezone
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+DOMAIN = "goodhome"
+
+TO_REDACT = {"email", "password", "token", "refresh_token", "user_id", "access-token"}
+
+
+def _token_diagnostics(api):
+    """Return the token expiry without exposing the token."""
+    if api.token_expiry is None:
+        return {
+            "expires_at": None,
+            "expires_in_s": None,
+            "refresh_due": False,
+            "has_refresh_token": api.refresh_token is not None,
+        }
+    return {
+        "expires_at": datetime.fromtimestamp(api.token_expiry, timezone.utc).isoformat(),
+        "expires_in_s": round(api.token_expiry - time.time()),
+        "refresh_due": api._is_token_expired(),
+        "has_refresh_token": api.refresh_token is not None,
+    }
+
+
+def _cache_diagnostics(api, device_id=None):
+    """Return cache sizes and hit rates of the API client."""
+    keys = list(api.cache.results)
+    if device_id is not None:
+        keys = [key for key in keys if key == f"device_{device_id}"]
+    if api.user_id:
+        keys = [key.replace(str(api.user_id), REDACTED) for key in keys]
+    return {
+        "cached_responses": len(api.cache.results),
+        "etags": len(api.cache.etags),
+        "cache_keys": keys,
+        "etag_hit_ratio": api.metrics.etag_hit_ratio,
+        "coalesced_in_flight": api._flight.shared,
+        "coalesced_recent": api._flight.fresh_hits,
+    }
+
+
+def _optimistic_overrides(hass: HomeAssistant, entry: ConfigEntry, device_id=None):
+    """Return the commands of the entry entities still waiting for their debounce delay.
+
+    Les états optimistes eux-mêmes sont dans les écritures en attente du coordinator.
+    """
+    overrides = []
+    for platform in async_get_platforms(hass, DOMAIN):
+        if platform.config_entry is None or platform.config_entry.entry_id != entry.entry_id:
+            continue
+        for entity in platform.entities.values():
+            entity_device = getattr(entity, "_device_id", None)
+            if device_id is not None and entity_device != device_id:
+                continue
+            debouncer = getattr(entity, "_debouncer", None)
+            if debouncer is not None and debouncer.is_pending:
+                overrides.append({
+                    "entity_id": entity.entity_id,
+                    "device_id": entity_device,
+                    "debounce_pending": debouncer.pending_value.parameters,
+                })
+    return overrides
+
+
+def _performance(coordinator, api, device_id=None):
+    """Return runtime performance data of an account."""
+    pending = list(coordinator.pending_confirmations.values())
+    if device_id is not None:
+        pending = [item for item in pending if item["device_id"] == device_id]
+    return {
+        "update_interval_s": coordinator.update_interval.total_seconds(),
+        "last_update_success": coordinator.last_update_success,
+        "coordinator_updates": list(coordinator.update_history),
+        "recent_requests": api.metrics.recent_requests(),
+        "metrics": api.metrics.stats(),
+        "pipeline": api.pipeline.stats(),
+        "pending_confirmations": pending,
+        "rate_limiter": api.limiter.stats(),
+        "executor": api.executor.stats(),
+        "circuit_breaker": api.breaker.stats(),
+        "timeouts": {
+            "connect": api.connect_timeout,
+            "read": api.read_timeout,
+            "command": api.command_timeout,
+            "poll": api.poll_timeout,
+        },
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    account = hass.data[DOMAIN][entry.entry_id]
+    coordinator = account["coordinator"]
+    api = account["api"]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "base_url": api.base_url,
+        "token": _token_diagnostics(api),
+        "devices": async_redact_data(coordinator.data or [], TO_REDACT),
+        "performance": _performance(coordinator, api),
+        "cache": _cache_diagnostics(api),
+        "pending_writes": coordinator.pending_writes(),
+        "journal": {**coordinator.journal.stats(), "entries": coordinator.journal.entries()},
+        "optimistic_overrides": _optimistic_overrides(hass, entry),
+    }
+
+
+async def async_get_device_diagnostics(hass: HomeAssistant, entry: ConfigEntry, device: DeviceEntry) -> dict:
+    """Return diagnostics for a device (thermostat or account hub)."""
+    device_id = next(
+        (identifier for domain, identifier in device.identifiers if domain == DOMAIN), None
+    )
+    if device_id is None or device_id.startswith(("hub_", "zone_")):
+        return await async_get_config_entry_diagnostics(hass, entry)
+
+    account = hass.data[DOMAIN][entry.entry_id]
+    coordinator = account["coordinator"]
+    api = account["api"]
+    snapshot = next((item for item in coordinator.data or [] if item["id"] == device_id), None)
+    return {
+        "device": async_redact_data(snapshot, TO_REDACT) if snapshot else None,
+        "token": _token_diagnostics(api),
+        "performance": _performance(coordinator, api, device_id),
+        "cache": _cache_diagnostics(api, device_id),
+        "pending_writes": coordinator.pending_writes(device_id).get(device_id, {}),
+        "journal": [item for item in coordinator.journal.entries() if item["device_id"] == device_id],
+        "optimistic_overrides": _optimistic_overrides(hass, entry, device_id),
+    }
@@ -0,0 +1,129 @@
+"""Pool de threads dédié aux appels bloquants du client GoodHome.
+
+Tant que `GoodHomeAPI` est synchrone, chaque appel occupe un thread pendant
+toute l'opération (délais réseau et nouveaux essais compris). Sur le pool
+par défaut de Home Assistant, un cloud GoodHome bloqué pourrait priver les
+autres intégrations de threads : les appels passent donc par un pool borné,
+partagé par les comptes d'un même hôte comme le limiteur de débit. Les
+appels en trop attendent dans une file, dont la profondeur et le temps
+d'attente sont mesurés.
+
+Chaque compte demande un nombre de threads (option) ; l'hôte applique le
+plus grand. Le pool n'est jamais recréé : seul le nombre d'appels confiés
+en même temps à ses threads suit ce réglage.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .metrics import LatencyHistogram
+
+
+class IOExecutor:
+    """Bounded thread pool measuring its queue depth and wait time."""
+
+    def __init__(self, default_workers, max_workers):
+        """Initialize the pool; at most `max_workers` threads are ever started."""
+        self._lock = threading.Lock()
+        self._default_workers = default_workers
+        self._max_workers = max_workers
+        # Threads demandés par compte, le plus grand s'applique
+        self._requests = {}
+        self.workers = default_workers
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="goodhome_io")
+        # Appels en attente d'un thread : (future, soumis à, fonction, arguments)
+        self._pending = deque()
+        self._active = 0
+        self._submitted = 0
+        self._wait = LatencyHistogram()
+
+    def configure(self, owner, workers):
+        """Set the number of threads requested by `owner` (an account)."""
+        with self._lock:
+            self._requests[owner] = min(workers, self._max_workers)
+            self._update_workers()
+
+    def release(self, owner):
+        """Forget the request of an account that no longer uses the host."""
+        with self._lock:
+            if self._requests.pop(owner, None) is not None:
+                self._update_workers()
+
+    def _update_workers(self):
+        self.workers = max(self._requests.values(), default=self._default_workers)
+        self._dispatch()
+
+    def submit(self, func, *args):
+        """Schedule `func(*args)` and return a concurrent future."""
+        future = Future()
+        with self._lock:
+            if self._pool is None:
+                raise RuntimeError("GoodHome executor is shut down")
+            self._pending.append((future, time.monotonic(), func, args))
+            self._submitted += 1
+            self._dispatch()
+        return future
+
+    async def async_run(self, func, *args):
+        """Run `func(*args)` on the pool and return its result (event loop)."""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def _dispatch(self):
+        """Hand the waiting calls to the pool while threads are free (lock held)."""
+        while self._pool is not None and self._pending and self._active < self.workers:
+            future, queued_at, func, args = self._pending.popleft()
+            # Un appel annulé pendant son attente n'est pas exécuté
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._active += 1
+            self._wait.observe((time.monotonic() - queued_at) * 1000)
+            self._pool.submit(self._run, future, func, args)
+
+    def _run(self, future, func, args):
+        try:
+            result = func(*args)
+        except BaseException as err:
+            future.set_exception(err)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._dispatch()
+
+    def _queue_depth(self):
+        return sum(not item[0].cancelled() for item in self._pending)
+
+    @property
+    def queue_depth(self):
+        """Return the number of calls waiting for a thread."""
+        with self._lock:
+            return self._queue_depth()
+
+    def stats(self):
+        """Return the pool state and the wait time before a thread is free (ms)."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "active": self._active,
+                "queue_depth": self._queue_depth(),
+                "submitted": self._submitted,
+                "wait": self._wait.summary(),
+            }
+
+    def histogram(self):
+        """Return (buckets, count, total_ms) of the wait time."""
+        with self._lock:
+            return list(self._wait.buckets), self._wait.count, self._wait.total
+
+    def shutdown(self):
+        """Stop the pool, cancelling the calls that have not started."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            pending, self._pending = self._pending, deque()
+        for future, *_ in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -1,19 +1,128 @@
 """GoodHome API Client."""
+import functools
 import logging
-import requests
+import threading
 import time
-import random
-import string
+
+from .client_manager import get_client_manager
+from .commands import PARAMETERS, Command
+from .const import (
+    COALESCE_WINDOW,
+    COMMAND_RETRIES,
+    COMMAND_RETRY_DELAY,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+from .log_aggregator import AggregatedLogger
+from .metrics import ApiMetrics
+from .pipeline import (
+    ApiRequest,
+    AuthStage,
+    ConditionalCacheStage,
+    MetricsStage,
+    Pipeline,
+    RateLimitStage,
+    RetryStage,
+)
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_CONFIRM, PRIORITY_USER
+from .single_flight import SingleFlight
+from .traffic import TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
+# Erreurs répétées (panne du cloud...) résumées périodiquement
+_ERRORS = AggregatedLogger(_LOGGER)
 
 BASE_URL = "https://shkf02.goodhome.com"
 
+
+# Champs de l'état lus par les entités ; les paramètres modifiables sont
+# toujours gardés, les confirmations des commandes les comparent
+STATE_FIELDS = frozenset({
+    "currentTemp", "targetTemp", "humidity", "dutyCycle",
+    "overrideTime", "windowTimeOut", "selfLearningImprove", "selfLearningCountDay",
+    "fwVer", "HwVer", "codeName", "roomName", "faultSystem",
+}) | frozenset(PARAMETERS)
+
+
+def _device_record(device, unknown_fields=False):
+    """Return the fields of a device kept by the integration.
+
+    L'état est réduit aux champs de `STATE_FIELDS` ; les autres ne sont
+    gardés, sous `unknown_state`, que si `unknown_fields` (diagnostics).
+    """
+    state = device.get("state") or {}
+    record = {
+        "id": device.get("_id"),
+        "name": device.get("name"),
+        "type": device.get("type"),
+        "connected": device.get("connected", False),
+        "state": {key: value for key, value in state.items() if key in STATE_FIELDS},
+    }
+    if unknown_fields:
+        record["unknown_state"] = {key: value for key, value in state.items() if key not in STATE_FIELDS}
+    return record
+
+
+def _parse_devices(response, unknown_fields=False):
+    """Parse the device list of an account."""
+    return [_device_record(device, unknown_fields) for device in response.json().get("devices", [])]
+
+
+class _CircuitOpen(Exception):
+    """Raised by a shared read refused by the circuit breaker."""
+
+
+def _circuit_open():
+    # Une lecture refusée ne doit pas être gardée comme résultat récent (single-flight)
+    raise _CircuitOpen()
+
+
+def _operation(default_priority, on_open=None):
+    """Run an API method as one logical operation with a request priority.
+
+    Les appels imbriqués (refresh du token, handshake Socket.io...) héritent
+    de la priorité et de l'échéance de l'opération englobante. Si le
+    disjoncteur est ouvert, l'opération échoue immédiatement en retournant
+    `on_open()`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, priority=None, **kwargs):
+            if getattr(self._local, "priority", None) is not None:
+                return func(self, *args, **kwargs)
+            
+            allowed, probe = self._host.breaker.admit()
+            if not allowed:
+                _LOGGER.debug(f"Circuit open, skipping {func.__name__}")
+                return on_open() if on_open is not None else None
+            
+            self._local.priority = default_priority if priority is None else priority
+            # Budget de temps total de l'opération (commande ou lecture)
+            budget = self.command_timeout if self._local.priority == PRIORITY_USER else self.poll_timeout
+            self._local.deadline = time.monotonic() + budget
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._local.priority = None
+                self._local.deadline = None
+                if probe:
+                    self._host.breaker.end_probe()
+        return wrapper
+    return decorator
+
+
 class GoodHomeAPI:
     """Class to communicate with GoodHome API."""
     
-    def __init__(self, user_id, token, email=None, password=None):
-        """Initialize the API client."""
+    def __init__(self, user_id, token, email=None, password=None, base_url=BASE_URL, transport=None):
+        """Initialize the API client.
+        
+        `transport` remplace le pool HTTP partagé par un objet compatible
+        `requests.Session`, par exemple un `ReplayTransport`.
+        """
+        self.base_url = base_url.rstrip("/")
         self.user_id = user_id
         self.token = token
         self.refresh_token = None
@@ -21,10 +130,104 @@ class GoodHomeAPI:
         self.password = password
         self.sid = None
         self.token_expiry = None
-        # Cache pour ETag/Last-Modified (gestion du 304)
-        self._cache = {}
-        self._etags = {}
-        self._last_modified = {}
+        # Pool HTTP et transport Socket.io partagés avec les autres comptes
+        self._host = get_client_manager().acquire(self.base_url)
+        self._transport = transport
+        # Enregistrement du trafic (désactivé par défaut)
+        self._recorder = None
+        # Latences, statuts et ratio de 304 par endpoint
+        self.metrics = ApiMetrics()
+        # Priorité et échéance de l'opération en cours, par thread d'exécution
+        self._local = threading.local()
+        # Lectures identiques partagées (en cours ou très récentes)
+        self._flight = SingleFlight(COALESCE_WINDOW)
+        # Cache ETag/Last-Modified (gestion du 304), vidé des lectures partagées à chaque écriture
+        self.cache = ConditionalCacheStage(on_invalidate=self._flight.forget)
+        # Étapes traversées par toutes les requêtes (voir pipeline.py)
+        self.pipeline = Pipeline(
+            [
+                AuthStage(self),
+                self.cache,
+                RetryStage(self, COMMAND_RETRY_DELAY),
+                RateLimitStage(self),
+                MetricsStage(self),
+            ],
+            self._send_http,
+        )
+        # Champs de l'état inutilisés, gardés seulement pour les diagnostics
+        self.unknown_fields = False
+        self.set_timeouts()
+    
+    def set_timeouts(
+        self,
+        connect=DEFAULT_CONNECT_TIMEOUT,
+        read=DEFAULT_READ_TIMEOUT,
+        command=DEFAULT_COMMAND_TIMEOUT,
+        poll=DEFAULT_POLL_TIMEOUT,
+    ):
+        """Configure per-request timeouts and per-operation deadlines (seconds)."""
+        self.connect_timeout = connect
+        self.read_timeout = read
+        self.command_timeout = command
+        self.poll_timeout = poll
+    
+    def set_unknown_fields(self, enabled):
+        """Keep the state fields no entity reads, under `unknown_state` (diagnostics)."""
+        if enabled != self.unknown_fields:
+            self.unknown_fields = enabled
+            # Le résultat en cache a été construit avec l'ancien réglage
+            self._invalidate_cache()
+    
+    def close(self):
+        """Release the shared transport."""
+        self.stop_recording()
+        if self._host is not None:
+            self._host.socket.forget(self.user_id)
+            self._host.executor.release(self)
+            self._host.limiter.release(self)
+            get_client_manager().release(self._host)
+            self._host = None
+    
+    def start_recording(self, path):
+        """Record every request/response pair, scrubbed of secrets, to `path`."""
+        self.stop_recording()
+        self._recorder = TrafficRecorder(path, base_url=self.base_url)
+        _LOGGER.info(f"Recording GoodHome API traffic to {path}")
+    
+    def stop_recording(self):
+        """Stop recording and close the recording file."""
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+    
+    @property
+    def limiter(self):
+        """Return the rate limiter shared by every account of the host."""
+        return self._host.limiter
+    
+    @property
+    def breaker(self):
+        """Return the circuit breaker shared by every account of the host."""
+        return self._host.breaker
+    
+    @property
+    def executor(self):
+        """Return the thread pool shared by every account of the host."""
+        return self._host.executor
+    
+    def _send_http(self, request):
+        """Send a request through the shared connection pool (pipeline transport)."""
+        session = self._transport or self._host.session
+        kwargs = {"headers": request.headers, "timeout": request.timeout}
+        if request.json is not None:
+            kwargs["json"] = request.json
+        return session.request(request.method, request.url, **kwargs)
+    
+    def _request(self, method, url, headers=None, json=None):
+        """Send an unauthenticated request (login, token refresh, Socket.io handshake)."""
+        return self.pipeline.send(
+            ApiRequest(method, url, headers=headers, json=json, authenticated=False)
+        )
     
     def _is_token_expired(self):
         """Check if token is expired or about to expire."""
@@ -33,6 +236,7 @@ class GoodHomeAPI:
         # Rafraîchir 1 heure avant l'expiration
         return time.time() > (self.token_expiry - 3600)
     
+    @_operation(PRIORITY_USER, on_open=bool)
     def login(self):
         """Login with email and password to get a new token."""
         if not self.email or not self.password:
@@ -40,7 +244,7 @@ class GoodHomeAPI:
             return False
         
         try:
-            url = f"{BASE_URL}/v1/auth/login"
+            url = f"{self.base_url}/v1/auth/login"
             headers = {
                 "accept": "application/json",
                 "content-type": "application/json",
@@ -54,7 +258,7 @@ class GoodHomeAPI:
                 "password": self.password
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = self._request("POST", url, headers=headers, json=data)
             response.raise_for_status()
             result = response.json()
             
@@ -67,21 +271,22 @@ class GoodHomeAPI:
                 _LOGGER.info("Successfully logged in and obtained new token")
                 return True
             
-            _LOGGER.error("No token in login response")
+            _ERRORS.error("login_no_token", "No token in login response")
             return False
             
         except Exception as e:
-            _LOGGER.error(f"Error during login: {e}")
+            _ERRORS.error("login", f"Error during login: {e}")
             return False
     
+    @_operation(PRIORITY_USER, on_open=bool)
     def refresh_access_token(self):
         """Refresh the access token using refresh_token."""
         if not self.refresh_token:
-            _LOGGER.warning("No refresh token available, attempting full login")
+            _ERRORS.warning("no_refresh_token", "No refresh token available, attempting full login")
             return self.login()
         
         try:
-            url = f"{BASE_URL}/v1/auth/refresh"
+            url = f"{self.base_url}/v1/auth/refresh"
             headers = {
                 "accept": "application/json",
                 "content-type": "application/json",
@@ -94,7 +299,7 @@ class GoodHomeAPI:
                 "refresh_token": self.refresh_token
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = self._request("POST", url, headers=headers, json=data)
             response.raise_for_status()
             result = response.json()
             
@@ -105,63 +310,21 @@ class GoodHomeAPI:
                 _LOGGER.info("Successfully refreshed token")
                 return True
             
-            _LOGGER.error("No token in refresh response, attempting full login")
+            _ERRORS.error("refresh_no_token", "No token in refresh response, attempting full login")
             return self.login()
             
         except Exception as e:
-            _LOGGER.error(f"Error refreshing token: {e}, attempting full login")
+            _ERRORS.error("refresh", f"Error refreshing token: {e}, attempting full login")
             return self.login()
         
-    def _generate_t_param(self):
-        """Generate a t parameter similar to Socket.io."""
-        alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
-        timestamp = int(time.time() * 1000)
-        result = ""
-        num = timestamp
-        
-        for _ in range(7):
-            idx = num % 64
-            result = alphabet[idx] + result
-            num = num // 64
-        
-        return result
-    
     def _connect_socket(self):
         """Establish Socket.io connection and get SID."""
         try:
-            t_param = self._generate_t_param()
-            url = f"{BASE_URL}/socket.io-v2/?EIO=3&transport=polling&userId={self.user_id}&t={t_param}"
-            
-            headers = {
-                "accept": "*/*",
-                "accept-encoding": "gzip, deflate, br",
-                "user-agent": "GoodHome/2010301 CFNetwork/3826.600.41 Darwin/24.6.0",
-                "accept-language": "fr-FR,fr;q=0.9",
-                "authorization": f"Bearer {self.token}"
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Extract SID from response
-            response_text = response.text
-            if '"sid":"' in response_text:
-                sid_start = response_text.find('"sid":"') + 7
-                sid_end = response_text.find('"', sid_start)
-                self.sid = response_text[sid_start:sid_end]
-                
-                # Maintain connection
-                t_param2 = self._generate_t_param()
-                url2 = f"{BASE_URL}/socket.io-v2/?EIO=3&transport=polling&userId={self.user_id}&t={t_param2}&sid={self.sid}"
-                requests.get(url2, headers=headers, timeout=10)
-                
-                return True
-            
-            _LOGGER.error("Failed to get SID from response")
-            return False
+            self.sid = self._host.socket.connect(self.user_id, self.token, send=self._request)
+            return True
             
         except Exception as e:
-            _LOGGER.error(f"Error connecting to Socket.io: {e}")
+            _ERRORS.error("socket", f"Error connecting to Socket.io: {e}")
             return False
     
     def _get_headers(self):
@@ -174,367 +337,116 @@ class GoodHomeAPI:
             "access-token": self.token  # Utilisé par l'app officielle au lieu de Authorization: Bearer
         }
     
-    def get_devices(self):
-        """Get all devices with 304 Not Modified support."""
+    def get_devices(self, priority=None):
+        """Get all devices, sharing identical concurrent or recent requests.
+        
+        Retourne une liste vide en cas d'erreur ; une erreur n'est jamais
+        partagée comme résultat récent.
+        """
+        url = f"{self.base_url}/v1/users/{self.user_id}/devices"
         try:
-            # Establish Socket.io connection first
-            if not self._connect_socket():
-                _LOGGER.error("Failed to establish Socket.io connection")
-                return []
-            
-            url = f"{BASE_URL}/v1/users/{self.user_id}/devices"
-            headers = self._get_headers()
-            
-            # Ajouter les headers de cache si disponibles
-            cache_key = f"devices_{self.user_id}"
-            if cache_key in self._etags:
-                headers["If-None-Match"] = self._etags[cache_key]
-            if cache_key in self._last_modified:
-                headers["If-Modified-Since"] = self._last_modified[cache_key]
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            # Gérer le 304 Not Modified
-            if response.status_code == 304:
-                if cache_key in self._cache:
-                    return self._cache[cache_key]
-                else:
-                    # Cache vide mais 304 reçu, forcer le rechargement
-                    _LOGGER.warning("Received 304 but no cache available, forcing reload")
-                    headers.pop("If-None-Match", None)
-                    headers.pop("If-Modified-Since", None)
-                    response = requests.get(url, headers=headers, timeout=10)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    # Réessayer avec le nouveau token
-                    if not self._connect_socket():
-                        return []
-                    headers = self._get_headers()
-                    # Ré-ajouter les headers de cache
-                    if cache_key in self._etags:
-                        headers["If-None-Match"] = self._etags[cache_key]
-                    if cache_key in self._last_modified:
-                        headers["If-Modified-Since"] = self._last_modified[cache_key]
-                    response = requests.get(url, headers=headers, timeout=10)
-                    
-                    # Gérer à nouveau le 304 après refresh du token
-                    if response.status_code == 304:
-                        _LOGGER.debug("Received 304 after token refresh, using cached data")
-                        if cache_key in self._cache:
-                            return self._cache[cache_key]
-                else:
-                    _LOGGER.error("Failed to refresh token after 401")
-                    return []
-            
-            response.raise_for_status()
-            
-            # Stocker les headers de cache pour les prochaines requêtes
-            if "ETag" in response.headers:
-                self._etags[cache_key] = response.headers["ETag"]
-            if "Last-Modified" in response.headers:
-                self._last_modified[cache_key] = response.headers["Last-Modified"]
-            
-            data = response.json()
-            
-            devices = []
-            if "devices" in data:
-                for device in data["devices"]:
-                    devices.append({
-                        "id": device.get("_id"),
-                        "name": device.get("name"),
-                        "type": device.get("type"),
-                        "connected": device.get("connected", False),
-                        "state": device.get("state", {})
-                    })
-            
-            # Mettre à jour le cache
-            self._cache[cache_key] = devices
-            
-            return devices
-            
+            return self._flight.do(
+                ("GET", url, self.token),
+                lambda: self._get_devices(priority=priority),
+                timeout=self.poll_timeout,
+            )
+        except _CircuitOpen:
+            return []
         except Exception as e:
-            _LOGGER.error(f"Error getting devices: {e}")
+            _ERRORS.error("get_devices", f"Error getting devices: {e}")
             return []
     
-    def get_device(self, device_id):
-        """Get a specific device with 304 Not Modified support."""
+    @_operation(PRIORITY_BACKGROUND, on_open=_circuit_open)
+    def _get_devices(self):
+        """Get all devices with 304 Not Modified support; raise on failure."""
+        response = self.pipeline.send(ApiRequest(
+            "GET",
+            f"{self.base_url}/v1/users/{self.user_id}/devices",
+            cache_key=f"devices_{self.user_id}",
+            parse=lambda response: _parse_devices(response, self.unknown_fields),
+        ))
+        response.raise_for_status()
+        return response.data
+    
+    def get_device(self, device_id, priority=None):
+        """Get a specific device, sharing identical concurrent or recent requests.
+        
+        Retourne None en cas d'erreur.
+        """
+        url = f"{self.base_url}/v1/devices/{device_id}/"
         try:
-            if not self._connect_socket():
-                return None
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/"
-            headers = self._get_headers()
-            
-            # Ajouter les headers de cache si disponibles
-            cache_key = f"device_{device_id}"
-            if cache_key in self._etags:
-                headers["If-None-Match"] = self._etags[cache_key]
-            if cache_key in self._last_modified:
-                headers["If-Modified-Since"] = self._last_modified[cache_key]
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            # Gérer le 304 Not Modified
-            if response.status_code == 304:
-                if cache_key in self._cache:
-                    return self._cache[cache_key]
-            
-            response.raise_for_status()
-            
-            # Stocker les headers de cache
-            if "ETag" in response.headers:
-                self._etags[cache_key] = response.headers["ETag"]
-            if "Last-Modified" in response.headers:
-                self._last_modified[cache_key] = response.headers["Last-Modified"]
-            
-            device = response.json()
-            result = {
-                "id": device.get("_id"),
-                "name": device.get("name"),
-                "type": device.get("type"),
-                "connected": device.get("connected", False),
-                "state": device.get("state", {})
-            }
-            
-            # Mettre à jour le cache
-            self._cache[cache_key] = result
-            
-            return result
-            
+            return self._flight.do(
+                ("GET", url, self.token),
+                lambda: self._get_device(device_id, priority=priority),
+                timeout=self.poll_timeout,
+            )
+        except _CircuitOpen:
+            return None
         except Exception as e:
-            _LOGGER.error(f"Error getting device: {e}")
+            _ERRORS.error("get_device", f"Error getting device: {e}")
             return None
     
+    @_operation(PRIORITY_CONFIRM, on_open=_circuit_open)
+    def _get_device(self, device_id):
+        """Get a specific device with 304 Not Modified support; raise on failure."""
+        response = self.pipeline.send(ApiRequest(
+            "GET",
+            f"{self.base_url}/v1/devices/{device_id}/",
+            cache_key=f"device_{device_id}",
+            parse=lambda response: _device_record(response.json(), self.unknown_fields),
+        ))
+        response.raise_for_status()
+        return response.data
+    
     def _invalidate_cache(self, device_id=None):
         """Invalidate cache for a device or all devices."""
-        if device_id:
-            # Invalider le cache pour un appareil spécifique
-            cache_key = f"device_{device_id}"
-            if cache_key in self._cache:
-                del self._cache[cache_key]
-            if cache_key in self._etags:
-                del self._etags[cache_key]
-            if cache_key in self._last_modified:
-                del self._last_modified[cache_key]
-        else:
-            # Invalider tout le cache
-            self._cache.clear()
-            self._etags.clear()
-            self._last_modified.clear()
+        # Les lectures suivantes ne doivent pas réutiliser un résultat d'avant l'écriture
+        self._flight.forget()
+        self.cache.invalidate(f"device_{device_id}" if device_id else None)
     
-    def set_temperature(self, device_id, temperature):
-        """Set target temperature for a device."""
+    @_operation(PRIORITY_USER, on_open=bool)
+    def send(self, command):
+        """Send a command; the single write path of the client.
+        
+        L'écriture de valeurs absolues peut être répétée sans risque : elle
+        a droit à un nouvel essai après une erreur passagère (pipeline).
+        """
+        request = ApiRequest(
+            "PATCH",
+            f"{self.base_url}/v1/devices/{command.device_id}/state",
+            json={"parameters": command.parameters},
+            invalidates=(f"device_{command.device_id}",),
+            retries=COMMAND_RETRIES,
+        )
         try:
-            if not self._connect_socket():
-                return False
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/state"
-            headers = self._get_headers()
-            headers["content-type"] = "application/json"
-            
-            # Utiliser le format parameters avec overrideTemp et targetMode
-            data = {
-                "parameters": {
-                    "overrideTemp": temperature,
-                    "targetMode": 8  # Mode confort par défaut lors du changement de température
-                }
-            }
-            
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-            
-            # Invalider le cache après modification
-            self._invalidate_cache(device_id)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    if not self._connect_socket():
-                        return False
-                    headers = self._get_headers()
-                    headers["content-type"] = "application/json"
-                    response = requests.patch(url, headers=headers, json=data, timeout=10)
-                else:
-                    return False
-            
+            response = self.pipeline.send(request)
             response.raise_for_status()
             
-            _LOGGER.info(f"Set temperature {temperature} for device {device_id}")
+            _LOGGER.info(f"Sent {command.kind} {command.parameters} to device {command.device_id}")
+            self.metrics.observe_command(command.kind, True, request.attempts > 1)
             return True
             
         except Exception as e:
-            _LOGGER.error(f"Error setting temperature: {e}")
+            _ERRORS.error(f"send_{command.kind}", f"Error sending {command.kind} {command.parameters}: {e}")
+            self.metrics.observe_command(command.kind, False, request.attempts > 1)
             return False
     
-    def set_mode(self, device_id, mode):
-        """Set mode for a device."""
-        try:
-            if not self._connect_socket():
-                return False
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/state"
-            headers = self._get_headers()
-            headers["content-type"] = "application/json"
-            
-            # Utiliser le format parameters
-            data = {
-                "parameters": {
-                    "targetMode": mode
-                }
-            }
-            
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-            
-            # Invalider le cache après modification
-            self._invalidate_cache(device_id)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    if not self._connect_socket():
-                        return False
-                    headers = self._get_headers()
-                    headers["content-type"] = "application/json"
-                    response = requests.patch(url, headers=headers, json=data, timeout=10)
-                else:
-                    return False
-            
-            response.raise_for_status()
-            
-            _LOGGER.info(f"Set mode {mode} for device {device_id}")
-            return True
-            
-        except Exception as e:
-            _LOGGER.error(f"Error setting mode: {e}")
-            return False
+    def set_temperature(self, device_id, temperature, priority=None):
+        """Set the target temperature of a device (overrideTemp with the override mode)."""
+        return self.send(Command.override_temperature(device_id, temperature), priority=priority)
     
-    def identify_device(self, device_id):
+    def set_setpoint(self, device_id, temp_type, temperature, priority=None):
+        """Set a temperature setpoint (comfTemp, ecoTemp, antifTemp)."""
+        return self.send(Command.setpoint(device_id, temp_type, temperature), priority=priority)
+    
+    def set_mode(self, device_id, mode, priority=None):
+        """Set the target mode of a device."""
+        return self.send(Command.target_mode(device_id, mode), priority=priority)
+    
+    def identify_device(self, device_id, priority=None):
         """Make the device beep for identification."""
-        try:
-            if not self._connect_socket():
-                return False
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/state"
-            headers = self._get_headers()
-            headers["content-type"] = "application/json"
-            
-            # Envoyer la commande ping
-            data = {
-                "parameters": {
-                    "ping": 1
-                }
-            }
-            
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    if not self._connect_socket():
-                        return False
-                    headers = self._get_headers()
-                    headers["content-type"] = "application/json"
-                    response = requests.patch(url, headers=headers, json=data, timeout=10)
-                else:
-                    return False
-            
-            response.raise_for_status()
-            
-            _LOGGER.info(f"Identified device {device_id} (ping)")
-            return True
-            
-        except Exception as e:
-            _LOGGER.error(f"Error identifying device: {e}")
-            return False
+        return self.send(Command.identify(device_id), priority=priority)
     
-    def set_parameter(self, device_id, parameter_name, value):
+    def set_parameter(self, device_id, parameter_name, value, priority=None):
         """Set a generic parameter for a device (for switches)."""
-        try:
-            if not self._connect_socket():
-                return False
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/state"
-            headers = self._get_headers()
-            headers["content-type"] = "application/json"
-            
-            # L'API GoodHome attend des booléens JSON (true/false) pour les switches
-            # et des nombres pour les autres paramètres
-            data = {
-                "parameters": {
-                    parameter_name: value  # Envoyer directement: bool reste bool, int reste int
-                }
-            }
-            
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-            
-            # Invalider le cache après modification
-            self._invalidate_cache(device_id)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    if not self._connect_socket():
-                        return False
-                    headers = self._get_headers()
-                    headers["content-type"] = "application/json"
-                    response = requests.patch(url, headers=headers, json=data, timeout=10)
-                else:
-                    return False
-            
-            response.raise_for_status()
-            
-            _LOGGER.info(f"Set parameter {parameter_name}={value} for device {device_id}")
-            return True
-            
-        except Exception as e:
-            _LOGGER.error(f"Error setting parameter {parameter_name}: {e}")
-            return False
-    
-    def set_temperature(self, device_id, temp_type, temperature):
-        """Set a temperature setpoint (comfTemp, ecoTemp, antifTemp)."""
-        try:
-            if not self._connect_socket():
-                return False
-            
-            url = f"{BASE_URL}/v1/devices/{device_id}/state"
-            headers = self._get_headers()
-            headers["content-type"] = "application/json"
-            
-            # L'API attend des températures en float avec 1 décimale
-            data = {
-                "parameters": {
-                    temp_type: round(float(temperature), 1)
-                }
-            }
-            
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-            
-            # Invalider le cache après modification
-            self._invalidate_cache(device_id)
-            
-            # Si 401, rafraîchir le token et réessayer
-            if response.status_code == 401:
-                _LOGGER.warning("Received 401, refreshing token...")
-                if self.refresh_access_token():
-                    if not self._connect_socket():
-                        return False
-                    headers = self._get_headers()
-                    headers["content-type"] = "application/json"
-                    response = requests.patch(url, headers=headers, json=data, timeout=10)
-                else:
-                    return False
-            
-            response.raise_for_status()
-            
-            _LOGGER.info(f"Set temperature {temp_type}={temperature}°C for device {device_id}")
-            return True
-            
-        except Exception as e:
-            _LOGGER.error(f"Error setting temperature {temp_type}: {e}")
-            return False
+        return self.send(Command.parameter(device_id, parameter_name, value), priority=priority)
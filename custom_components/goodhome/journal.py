@@ -0,0 +1,264 @@
+"""Journal des commandes GoodHome non confirmées.
+
+Chaque écriture est journalisée avant l'envoi, par (appareil, clé) : seule
+la dernière valeur demandée est conservée. Une commande refusée faute de
+cloud reste affichée (écriture en attente du coordinator) et est rejouée
+dès qu'un rafraîchissement réussit, puis avec un délai croissant tant que
+l'envoi échoue. Une commande acceptée reste journalisée jusqu'à ce que
+l'appareil la rapporte, pour survivre à un redémarrage pendant la
+confirmation. Le journal est enregistré dans le stockage de Home Assistant.
+"""
+import logging
+import time
+from functools import partial
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .commands import Command, InvalidCommand, merge_commands
+from .const import JOURNAL_MAX_AGE, JOURNAL_RETRY_DELAY, JOURNAL_RETRY_MAX_DELAY
+from .rate_limiter import PRIORITY_BACKGROUND
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 1
+
+STATUS_QUEUED = "queued"  # Pas encore accepté par le cloud
+STATUS_SENT = "sent"  # Accepté, en attente du rapport de l'appareil
+
+
+class CommandJournal:
+    """Durable last-value-wins queue of the writes of one account."""
+
+    def __init__(self, coordinator):
+        """Initialize an in-memory journal; `async_load()` makes it durable."""
+        self._coordinator = coordinator
+        self._entries = {}
+        # Écritures en attente (coordinator) des commandes refusées
+        self._writes = {}
+        self._store = None
+        self._retry_delay = JOURNAL_RETRY_DELAY
+        self._unsub_retry = None
+        self._unsub_listener = None
+        self._replay_task = None
+        self.replayed = 0
+        self.expired = 0
+
+    async def async_load(self, storage_key: str) -> None:
+        """Enable persistence and restore the commands left by the previous run."""
+        self._store = Store(self._coordinator.hass, STORAGE_VERSION, storage_key)
+        data = await self._store.async_load() or {}
+        now = time.time()
+        for entry in data.get("entries", []):
+            if now - entry["queued_at"] > JOURNAL_MAX_AGE:
+                self.expired += 1
+                continue
+            # Un envoi d'avant le redémarrage n'a peut-être jamais été appliqué
+            entry["status"] = STATUS_QUEUED
+            self._entries[(entry["device_id"], entry["key"])] = entry
+            self._async_show(entry)
+        if self._entries:
+            _LOGGER.info(f"Restored {len(self._entries)} unconfirmed GoodHome commands")
+            self._async_watch_updates()
+
+    @callback
+    def async_record(self, device_id: str, key: str, parameters: dict) -> None:
+        """Journal a write before it is sent, replacing the previous value for the key."""
+        self._async_remove(device_id, key)
+        self._entries[(device_id, key)] = {
+            "device_id": device_id,
+            "key": key,
+            "parameters": dict(parameters),
+            "queued_at": time.time(),
+            "status": STATUS_QUEUED,
+            "attempts": 0,
+        }
+        self._async_save()
+
+    @callback
+    def async_sent(self, device_id: str, key: str, parameters: dict) -> None:
+        """Mark a write as accepted by the cloud."""
+        entry = self._current(device_id, key, parameters)
+        if entry is None:
+            return
+        entry["attempts"] += 1
+        entry["status"] = STATUS_SENT
+        entry["sent_at"] = time.time()
+        self._async_hide(device_id, key)
+        self._async_save()
+
+    @callback
+    def async_failed(self, device_id: str, key: str, parameters: dict) -> None:
+        """Keep a refused write displayed and queued for replay."""
+        entry = self._current(device_id, key, parameters)
+        if entry is None:
+            return
+        entry["attempts"] += 1
+        self._async_show(entry)
+        self._async_watch_updates()
+        self._async_save()
+        _LOGGER.info(f"Command {parameters} for {device_id} queued for replay")
+
+    def reconcile(self, devices: dict) -> None:
+        """Drop the commands `devices` ({device_id: device}) report, and the expired ones."""
+        now = time.time()
+        changed = False
+        for entry in list(self._entries.values()):
+            if entry["device_id"] not in devices:
+                continue
+            state = devices[entry["device_id"]].get("state") or {}
+            if all(state.get(name) == value for name, value in entry["parameters"].items()):
+                changed = True
+            elif self._expired(entry, now):
+                _LOGGER.warning(f"Command {entry['parameters']} for {entry['device_id']} expired without confirmation")
+                self.expired += 1
+                changed = True
+            else:
+                continue
+            self._async_remove(entry["device_id"], entry["key"])
+        if changed:
+            self._async_save()
+
+    def _expired(self, entry, now):
+        if entry["status"] == STATUS_SENT:
+            # Acceptée par le cloud : gardée le temps de la confirmation (avec marge)
+            return now - entry["sent_at"] > 2 * self._coordinator.confirm_timeout
+        return now - entry["queued_at"] > JOURNAL_MAX_AGE
+
+    def _current(self, device_id, key, parameters):
+        """Return the entry of the key if it still holds `parameters`."""
+        entry = self._entries.get((device_id, key))
+        if entry is None or entry["parameters"] != parameters:
+            # Remplacée par une valeur plus récente entre-temps
+            return None
+        return entry
+
+    @callback
+    def _async_show(self, entry):
+        """Display a queued command until it is sent or expires."""
+        self._async_hide(entry["device_id"], entry["key"])
+        ttl = max(1, JOURNAL_MAX_AGE - (time.time() - entry["queued_at"]))
+        self._writes[(entry["device_id"], entry["key"])] = self._coordinator.async_set_pending(
+            entry["device_id"], entry["parameters"], ttl
+        )
+
+    @callback
+    def _async_hide(self, device_id, key):
+        write_id = self._writes.pop((device_id, key), None)
+        if write_id is not None:
+            self._coordinator.async_clear_pending(write_id)
+
+    @callback
+    def _async_remove(self, device_id, key):
+        if self._entries.pop((device_id, key), None) is not None:
+            self._async_hide(device_id, key)
+
+    @callback
+    def _async_save(self):
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self):
+        return {"entries": list(self._entries.values())}
+
+    @callback
+    def _async_watch_updates(self):
+        """Replay the queued commands after the next successful refreshes."""
+        if self._unsub_listener is None:
+            self._unsub_listener = self._coordinator.async_add_listener(self._async_coordinator_updated)
+
+    @callback
+    def _async_coordinator_updated(self):
+        if not any(entry["status"] == STATUS_QUEUED for entry in self._entries.values()):
+            # Plus rien à rejouer : ne plus écouter le coordinator
+            if self._unsub_listener is not None:
+                self._unsub_listener()
+                self._unsub_listener = None
+            return
+        # Cloud joignable à nouveau, sauf si un nouvel essai est déjà programmé
+        if self._coordinator.last_update_success and self._unsub_retry is None:
+            self._async_start_replay()
+
+    @callback
+    def _async_start_replay(self, _now=None):
+        self._unsub_retry = None
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = self._coordinator.hass.async_create_task(self._async_replay())
+
+    async def _async_replay(self):
+        """Send the queued commands, one merged write per device, oldest first, until one fails."""
+        failed = False
+        try:
+            queued = [entry for entry in self._entries.values() if entry["status"] == STATUS_QUEUED]
+            by_device = {}
+            for entry in sorted(queued, key=lambda item: item["queued_at"]):
+                by_device.setdefault(entry["device_id"], []).append(entry)
+            
+            for device_id, entries in by_device.items():
+                commands = []
+                for entry in entries:
+                    try:
+                        commands.append(Command(device_id, entry["parameters"], "replay"))
+                    except InvalidCommand as err:
+                        # Entrée d'une version précédente devenue invalide
+                        _LOGGER.warning(f"Dropping journaled command for {device_id}: {err}")
+                        self._async_remove(device_id, entry["key"])
+                if not commands:
+                    continue
+                # Une seule requête par radiateur, la valeur la plus récente l'emportant
+                batch = merge_commands(commands)[0]
+                self._coordinator.api.metrics.observe_merged(len(commands) - 1)
+                success = await self._coordinator.api.executor.async_run(
+                    partial(self._coordinator.api.send, batch, priority=PRIORITY_BACKGROUND)
+                )
+                if not success:
+                    for entry in entries:
+                        entry["attempts"] += 1
+                    failed = True
+                    break
+                for entry in entries:
+                    if self._entries.get((device_id, entry["key"])) is entry:
+                        self.replayed += 1
+                        self.async_sent(device_id, entry["key"], entry["parameters"])
+                _LOGGER.info(f"Replayed {len(entries)} commands for {device_id}: {batch.parameters}")
+        finally:
+            self._replay_task = None
+            self._async_save()
+
+        if failed:
+            _LOGGER.debug(f"Command replay failed, next attempt in {self._retry_delay}s")
+            self._unsub_retry = async_call_later(
+                self._coordinator.hass, self._retry_delay, self._async_start_replay
+            )
+            self._retry_delay = min(self._retry_delay * 2, JOURNAL_RETRY_MAX_DELAY)
+        else:
+            self._retry_delay = JOURNAL_RETRY_DELAY
+
+    def entries(self) -> list:
+        """Return the journaled commands (diagnostics)."""
+        return [dict(entry) for entry in self._entries.values()]
+
+    def stats(self) -> dict:
+        """Return the journal counters (diagnostics)."""
+        return {
+            "queued": sum(entry["status"] == STATUS_QUEUED for entry in self._entries.values()),
+            "sent": sum(entry["status"] == STATUS_SENT for entry in self._entries.values()),
+            "replayed": self.replayed,
+            "expired": self.expired,
+            "retry_delay_s": self._retry_delay,
+        }
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the replay in progress, the replay timer and the coordinator listener."""
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+        if self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
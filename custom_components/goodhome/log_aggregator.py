@@ -0,0 +1,85 @@
+"""Agrégation des erreurs répétées dans les logs.
+
+La première occurrence d'une erreur (par clé) est loguée telle quelle ; les
+suivantes sont seulement comptées et un résumé par clé est émis toutes les
+`LOG_SUMMARY_INTERVAL` secondes. Une clé sans nouvelle occurrence pendant un
+intervalle est oubliée : sa prochaine occurrence est de nouveau loguée en
+entier.
+"""
+import logging
+import threading
+import time
+
+from .const import LOG_SUMMARY_INTERVAL
+
+_AGGREGATORS = []
+
+
+class _Entry:
+    """Occurrences of one key since the last summary."""
+
+    __slots__ = ("level", "count", "last_message")
+
+    def __init__(self, level):
+        self.level = level
+        self.count = 0
+        self.last_message = None
+
+
+class AggregatedLogger:
+    """Logger wrapper that collapses repeated messages into periodic summaries."""
+
+    def __init__(self, logger, interval=LOG_SUMMARY_INTERVAL):
+        """Wrap `logger`."""
+        self._logger = logger
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._next_flush = time.monotonic() + interval
+        _AGGREGATORS.append(self)
+
+    def error(self, key, message, **kwargs):
+        """Log an error, aggregated by `key`."""
+        self._log(logging.ERROR, key, message, kwargs)
+
+    def warning(self, key, message, **kwargs):
+        """Log a warning, aggregated by `key`."""
+        self._log(logging.WARNING, key, message, kwargs)
+
+    def _log(self, level, key, message, kwargs):
+        with self._lock:
+            entry = self._entries.get(key)
+            first = entry is None
+            if first:
+                self._entries[key] = _Entry(level)
+            else:
+                entry.count += 1
+                entry.last_message = message
+        if first:
+            self._logger.log(level, message, **kwargs)
+        self.flush()
+
+    def flush(self, force=False):
+        """Emit the summaries if the interval has elapsed (or `force`)."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_flush:
+                return
+            self._next_flush = now + self._interval
+            summaries = []
+            for key, entry in list(self._entries.items()):
+                if entry.count:
+                    summaries.append((entry.level, key, entry.count, entry.last_message))
+                    entry.count = 0
+                    entry.last_message = None
+                else:
+                    # Plus d'occurrence : la prochaine sera de nouveau détaillée
+                    del self._entries[key]
+        for level, key, count, message in summaries:
+            self._logger.log(level, f"{message} [repeated {count} more times, key {key}]")
+
+
+def flush_all(force=False):
+    """Emit the due summaries of every aggregator."""
+    for aggregator in _AGGREGATORS:
+        aggregator.flush(force)
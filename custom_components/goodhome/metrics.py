@@ -0,0 +1,197 @@
+"""Métriques du client de l'API GoodHome (latence, statuts, cache, auth)."""
+import bisect
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# Bornes supérieures des buckets de l'histogramme de latence (ms)
+LATENCY_BUCKETS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+# Nombre de requêtes récentes conservées individuellement (diagnostics)
+RECENT_REQUESTS = 50
+
+ENDPOINT_LOGIN = "POST /v1/auth/login"
+ENDPOINT_REFRESH = "POST /v1/auth/refresh"
+ENDPOINT_HANDSHAKE = "GET /socket.io-v2/ handshake"
+ENDPOINT_DEVICES = "GET /v1/users/{id}/devices"
+
+_ID_RE = re.compile(r"/(users|devices)/[^/]+")
+
+
+def endpoint_name(method, url):
+    """Return the endpoint of a request, without ids nor query string."""
+    parts = urlsplit(url)
+    path = _ID_RE.sub(r"/\1/{id}", parts.path)
+    if path.startswith("/socket.io"):
+        # Handshake (sans sid) ou requête de maintien de la session
+        return f"{method} {path} {'poll' if 'sid=' in parts.query else 'handshake'}"
+    return f"{method} {path}"
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """Return the upper bound of the bucket holding the percentile (ms).
+
+        La borne est plafonnée à la latence maximale observée.
+        """
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count and index < len(LATENCY_BUCKETS):
+                return round(min(LATENCY_BUCKETS[index], self.max), 1)
+        return round(self.max, 1)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max, 1),
+        }
+
+
+class ApiMetrics:
+    """Per-account request metrics.
+
+    L'enregistrement se limite à quelques incréments sous un verrou ; les
+    percentiles et ratios ne sont calculés qu'à la lecture (`stats()`).
+    """
+
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._statuses = Counter()
+        self._errors = Counter()
+        self._recent = deque(maxlen=RECENT_REQUESTS)
+        self.requests = 0
+        self.bytes_received = 0
+        self.conditional_requests = 0
+        self.not_modified = 0
+        # Commandes par type et résultat, nouveaux essais et commandes fusionnées
+        self._commands = Counter()
+        self.command_retries = 0
+        self.merged_commands = 0
+
+    def observe(self, method, url, headers, response, elapsed):
+        """Record a completed request (`elapsed` in seconds)."""
+        endpoint = endpoint_name(method, url)
+        size = len(response.content or b"")
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = LatencyHistogram()
+            histogram.observe(elapsed * 1000)
+            self._recent.append((time.time(), endpoint, response.status_code, elapsed * 1000))
+            self._statuses[response.status_code] += 1
+            self.requests += 1
+            self.bytes_received += size
+            if headers and "If-None-Match" in headers:
+                self.conditional_requests += 1
+                if response.status_code == 304:
+                    self.not_modified += 1
+
+    def observe_error(self, method, url):
+        """Record a request that failed without a response."""
+        endpoint = endpoint_name(method, url)
+        with self._lock:
+            self._errors[endpoint] += 1
+            self._recent.append((time.time(), endpoint, None, None))
+            self.requests += 1
+
+    def observe_command(self, kind, success, retried=False):
+        """Record the outcome of a command."""
+        with self._lock:
+            self._commands[(kind, "sent" if success else "failed")] += 1
+            if retried:
+                self.command_retries += 1
+
+    def observe_merged(self, count):
+        """Record commands saved by merging writes to the same device."""
+        with self._lock:
+            self.merged_commands += count
+
+    def count(self, endpoint):
+        """Return the number of responses received for an endpoint."""
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            return histogram.count if histogram else 0
+
+    @property
+    def etag_hit_ratio(self):
+        """Return the share of conditional requests answered by 304 (%)."""
+        with self._lock:
+            if not self.conditional_requests:
+                return None
+            return round(100 * self.not_modified / self.conditional_requests, 1)
+
+    def latency(self, endpoint):
+        """Return the latency summary of an endpoint."""
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            return histogram.summary() if histogram else LatencyHistogram().summary()
+
+    def histograms(self):
+        """Return {endpoint: (bucket counts, count, total ms)} for exporters."""
+        with self._lock:
+            return {
+                name: (list(h.buckets), h.count, h.total) for name, h in self._latency.items()
+            }
+
+    def recent_requests(self):
+        """Return the last requests, oldest first (`status` is None on network errors)."""
+        with self._lock:
+            recent = list(self._recent)
+        return [
+            {
+                "at": datetime.fromtimestamp(at, timezone.utc).isoformat(timespec="milliseconds"),
+                "endpoint": endpoint,
+                "status": status,
+                "duration_ms": None if duration is None else round(duration, 1),
+            }
+            for at, endpoint, status, duration in recent
+        ]
+
+    def stats(self):
+        """Return a snapshot of every metric."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_received": self.bytes_received,
+                "status_codes": {str(code): n for code, n in sorted(self._statuses.items())},
+                "errors": dict(self._errors),
+                "conditional_requests": self.conditional_requests,
+                "not_modified": self.not_modified,
+                "latency": {name: h.summary() for name, h in sorted(self._latency.items())},
+                "commands": {f"{kind}_{outcome}": n for (kind, outcome), n in sorted(self._commands.items())},
+                "command_retries": self.command_retries,
+                "merged_commands": self.merged_commands,
+            }
+
+    def commands(self):
+        """Return {(kind, outcome): count} for exporters."""
+        with self._lock:
+            return dict(self._commands)
@@ -1,19 +1,25 @@
 """Support for GoodHome Number entities."""
 import logging
-import asyncio
 
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.const import UnitOfTemperature
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import POLLING_MAX_ATTEMPTS, POLLING_INTERVAL
+from .commands import Command
+from .debounce import DebouncedCommand
+from .log_aggregator import AggregatedLogger
 
 _LOGGER = logging.getLogger(__name__)
+_ERRORS = AggregatedLogger(_LOGGER)
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the GoodHome number platform (YAML config)."""
-    coordinator = hass.data["goodhome"]["coordinator"]
-    api = hass.data["goodhome"]["api"]
+    if discovery_info is None:
+        return
+    
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
+    api = account["api"]
     
     devices = coordinator.data
     entities = []
@@ -122,7 +128,9 @@ class GoodHomeTemperatureNumber(CoordinatorEntity, NumberEntity):
         self._attr_native_min_value = 7.0
         self._attr_native_max_value = 30.0
         
-        self._optimistic_value = None
+        self._debouncer = DebouncedCommand(
+            coordinator, self._device_id, coordinator.debounce_setpoint, self._async_send_value
+        )
         
     @property
     def device_info(self):
@@ -134,12 +142,17 @@ class GoodHomeTemperatureNumber(CoordinatorEntity, NumberEntity):
             "model": "Thermostat",
         }
     
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+        self.async_on_remove(self._debouncer.async_cancel)
+    
     def _get_device(self):
-        """Get device from coordinator data."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def available(self):
@@ -152,10 +165,7 @@ class GoodHomeTemperatureNumber(CoordinatorEntity, NumberEntity):
     @property
     def native_value(self):
         """Return the current value."""
-        # Si on a une valeur optimiste, l'utiliser
-        if self._optimistic_value is not None:
-            return self._optimistic_value
-        
+        # Valeur de l'API (écritures en attente comprises)
         device = self._get_device()
         if device and device.get("state"):
             state = device["state"]
@@ -164,47 +174,48 @@ class GoodHomeTemperatureNumber(CoordinatorEntity, NumberEntity):
     
     async def async_set_native_value(self, value: float) -> None:
         """Set new temperature value."""
+        # État optimiste, visible par toutes les entités de l'appareil, envoi après le délai
+        command = Command.setpoint(self._device_id, self._parameter_name, value)
+        self._debouncer.async_schedule(command, command.parameters)
+    
+    async def _async_send_value(self, command, write_id):
+        """Send the debounced value and wait for its confirmation."""
+        value = command.parameters[self._parameter_name]
         try:
-            # État optimiste
-            self._optimistic_value = value
-            self.async_write_ha_state()
-            
-            # Envoyer la commande à l'API
-            success = await self.hass.async_add_executor_job(
-                self._api.set_temperature,
-                self._device_id,
-                self._parameter_name,
-                value
-            )
+            # Envoyer la commande à l'API (journalisée, rejouée si le cloud est injoignable)
+            success = await self.coordinator.async_send_command(self._parameter_name, command)
             
             if success:
-                # Polling pour confirmer le changement
-                for attempt in range(POLLING_MAX_ATTEMPTS):
-                    await asyncio.sleep(POLLING_INTERVAL)
-                    await self.coordinator.async_request_refresh()
-                    
-                    device = self._get_device()
+                def check_value():
+                    device = self.coordinator.get_device(self._device_id, raw=True)
                     if device and device.get("state"):
-                        current_value = device["state"].get(self._parameter_name)
-                        if current_value == value:
-                            _LOGGER.info(f"Temperature {self._parameter_name} confirmed: {value}°C")
-                            self._optimistic_value = None
-                            self.async_write_ha_state()
-                            return
+                        return device["state"].get(self._parameter_name) == value
+                    return False
+                
+                # Polling pour confirmer le changement
+                confirmed = await self.coordinator.async_wait_for_confirmation(
+                    check_value, f"Temperature {self._parameter_name}={value}°C",
+                    self._device_id, self._parameter_name,
+                )
+                if confirmed is not False:
+                    # Confirmé, ou remplacé par une valeur plus récente qui gère l'état optimiste
+                    if confirmed:
+                        _LOGGER.info(f"Temperature {self._parameter_name} confirmed: {value}°C")
+                    self.coordinator.async_clear_pending(write_id)
+                    return
                 
                 # Si après 40s pas de confirmation, on garde l'état optimiste
-                _LOGGER.warning(f"Temperature {self._parameter_name} not confirmed after {POLLING_MAX_ATTEMPTS * POLLING_INTERVAL}s, keeping optimistic state")
+                # jusqu'à son expiration (PENDING_WRITE_TTL)
+                _ERRORS.warning("confirmation_timeout", f"Temperature {self._parameter_name} not confirmed after {self.coordinator.confirm_timeout}s, keeping optimistic state")
             else:
-                # Échec de l'API, annuler l'état optimiste
-                self._optimistic_value = None
-                self.async_write_ha_state()
-                _LOGGER.error(f"Failed to set {self._attr_name}")
+                # Échec de l'API : le journal garde la valeur affichée jusqu'au rejeu
+                self.coordinator.async_clear_pending(write_id)
+                _ERRORS.error("command_failed", f"Failed to set {self.entity_id}, queued for replay")
                 
         except Exception as err:
             # En cas d'erreur, annuler l'état optimiste
-            self._optimistic_value = None
-            self.async_write_ha_state()
-            _LOGGER.error(f"Error setting {self._attr_name}: {err}")
+            self.coordinator.async_clear_pending(write_id)
+            _LOGGER.error(f"Error setting {self.entity_id}: {err}")
     
     @property
     def extra_state_attributes(self):
@@ -0,0 +1,360 @@
+"""Pipeline des requêtes HTTP du client GoodHome.
+
+Toutes les requêtes (lectures, commandes, login, handshake Socket.io)
+traversent les mêmes étapes, de l'extérieur vers l'intérieur :
+
+    auth → cache conditionnel → nouvel essai → limiteur de débit → métriques → transport
+
+- auth : session Socket.io et token de la requête ; sur un 401, refresh du
+  token et nouvel envoi ;
+- cache conditionnel : ETag / Last-Modified, résultat en cache sur un 304,
+  invalidation après une écriture ;
+- nouvel essai : erreurs réseau et indisponibilités passagères (502, 503,
+  504) des requêtes qui peuvent être répétées, avec backoff borné par
+  l'échéance de l'opération ;
+- limiteur de débit : priorité et échéance de l'opération, budget de
+  requêtes partagé par l'hôte, délais de la requête ;
+- métriques : latences et statuts, enregistrement du trafic, disjoncteur.
+
+Le limiteur est placé sous le nouvel essai pour que chaque envoi réel
+consomme un jeton. Le temps passé dans chaque étape (hors étapes
+suivantes) est mesuré : `Pipeline.stats()`.
+"""
+import logging
+import threading
+import time
+
+import requests
+
+from .log_aggregator import AggregatedLogger
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_USER
+
+_LOGGER = logging.getLogger(__name__)
+_ERRORS = AggregatedLogger(_LOGGER)
+
+# Réponses d'un cloud momentanément indisponible
+RETRY_STATUSES = (502, 503, 504)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a logical operation has used up its time budget."""
+
+
+class ApiRequest:
+    """A request going through the pipeline, with the options of each stage."""
+
+    __slots__ = (
+        "method", "url", "headers", "json", "timeout", "authenticated",
+        "cache_key", "parse", "validators", "invalidates", "retries", "attempts",
+    )
+
+    def __init__(
+        self,
+        method,
+        url,
+        headers=None,
+        json=None,
+        authenticated=True,
+        cache_key=None,
+        parse=None,
+        invalidates=(),
+        retries=0,
+    ):
+        """Describe a request.
+
+        `cache_key` active le cache conditionnel (`parse(response)` construit le
+        résultat mis en cache), `invalidates` liste les clés de cache périmées
+        par une écriture et `retries` le nombre de nouveaux essais permis.
+        """
+        self.method = method
+        self.url = url
+        self.headers = dict(headers or {})
+        self.json = json
+        self.timeout = None
+        self.authenticated = authenticated
+        self.cache_key = cache_key
+        self.parse = parse
+        self.validators = True
+        self.invalidates = invalidates
+        self.retries = retries
+        # Envois réels (nouvel essai et 401 compris)
+        self.attempts = 0
+
+
+class Stage:
+    """One step of the pipeline."""
+
+    name = "stage"
+
+    def handle(self, request, call_next):
+        """Process `request`; `call_next(request)` runs the following stages."""
+        return call_next(request)
+
+
+class AuthStage(Stage):
+    """Open the Socket.io session, add the token, and refresh it on a 401."""
+
+    name = "auth"
+
+    def __init__(self, api):
+        self._api = api
+
+    def _prepare(self, request):
+        if not self._api._connect_socket():
+            raise requests.ConnectionError("Socket.io connection failed")
+        request.headers.update(self._api._get_headers())
+        if request.json is not None:
+            request.headers["content-type"] = "application/json"
+
+    def handle(self, request, call_next):
+        if not request.authenticated:
+            return call_next(request)
+        self._prepare(request)
+        response = call_next(request)
+        if response.status_code != 401:
+            return response
+
+        # Si 401, rafraîchir le token et réessayer
+        _ERRORS.warning("401", "Received 401, refreshing token...")
+        if not self._api.refresh_access_token():
+            _ERRORS.error("refresh_failed", "Failed to refresh token after 401")
+            return response
+        self._prepare(request)
+        return call_next(request)
+
+
+class ConditionalCacheStage(Stage):
+    """Send ETag/Last-Modified validators and reuse the cached result on a 304.
+
+    Le résultat mis en cache est celui de `request.parse` : sur un 304, c'est
+    le même objet qui est renvoyé (`response.data`), ce qui permet aux
+    appelants de détecter qu'il n'a pas changé.
+    """
+
+    name = "cache"
+
+    def __init__(self, on_invalidate=None):
+        self.results = {}
+        self.etags = {}
+        self.last_modified = {}
+        self._on_invalidate = on_invalidate
+
+    def invalidate(self, key=None):
+        """Forget one cache key, or every key."""
+        if key is None:
+            self.results.clear()
+            self.etags.clear()
+            self.last_modified.clear()
+        else:
+            self.results.pop(key, None)
+            self.etags.pop(key, None)
+            self.last_modified.pop(key, None)
+
+    def handle(self, request, call_next):
+        key = request.cache_key
+        if key is None:
+            try:
+                return call_next(request)
+            finally:
+                # Les lectures suivantes ne doivent pas réutiliser un résultat d'avant l'écriture
+                if request.invalidates:
+                    for invalidated in request.invalidates:
+                        self.invalidate(invalidated)
+                    if self._on_invalidate is not None:
+                        self._on_invalidate()
+
+        if request.validators:
+            if key in self.etags:
+                request.headers["If-None-Match"] = self.etags[key]
+            if key in self.last_modified:
+                request.headers["If-Modified-Since"] = self.last_modified[key]
+        response = call_next(request)
+        response.data = None
+
+        if response.status_code == 304:
+            if key in self.results:
+                response.data = self.results[key]
+                return response
+            # Cache vide mais 304 reçu, forcer le rechargement
+            _ERRORS.warning("304_without_cache", "Received 304 but no cache available, forcing reload")
+            request.validators = False
+            request.headers.pop("If-None-Match", None)
+            request.headers.pop("If-Modified-Since", None)
+            response = call_next(request)
+            response.data = None
+
+        if 200 <= response.status_code < 300:
+            # Stocker les headers de cache pour les prochaines requêtes
+            if "ETag" in response.headers:
+                self.etags[key] = response.headers["ETag"]
+            if "Last-Modified" in response.headers:
+                self.last_modified[key] = response.headers["Last-Modified"]
+            response.data = request.parse(response) if request.parse else response.json()
+            self.results[key] = response.data
+        return response
+
+
+class RetryStage(Stage):
+    """Send a repeatable request again after a network error or a 502/503/504."""
+
+    name = "retry"
+
+    def __init__(self, api, delay):
+        self._api = api
+        self._delay = delay
+
+    def _backoff(self, request, delay):
+        """Sleep before the next attempt, without passing the operation deadline."""
+        deadline = getattr(self._api._local, "deadline", None)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            raise DeadlineExceeded(f"Operation deadline exceeded before retrying {request.method} {request.url}")
+        time.sleep(delay)
+
+    def handle(self, request, call_next):
+        delay = self._delay
+        for attempt in range(request.retries + 1):
+            last = attempt == request.retries
+            try:
+                response = call_next(request)
+            except DeadlineExceeded:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if last:
+                    raise
+                _LOGGER.debug(f"Retrying {request.method} {request.url} after {err}")
+            else:
+                if last or response.status_code not in RETRY_STATUSES:
+                    return response
+                _LOGGER.debug(f"Retrying {request.method} {request.url} after HTTP {response.status_code}")
+            self._backoff(request, delay)
+            delay *= 2
+
+
+class RateLimitStage(Stage):
+    """Wait for the shared request budget within the deadline of the operation."""
+
+    name = "rate_limit"
+
+    def __init__(self, api):
+        self._api = api
+
+    def handle(self, request, call_next):
+        api = self._api
+        local = api._local
+        priority = getattr(local, "priority", None)
+        if priority is None:
+            priority = PRIORITY_BACKGROUND if request.method == "GET" else PRIORITY_USER
+
+        # Ne jamais dépasser l'échéance de l'opération en cours
+        deadline = getattr(local, "deadline", None)
+        if deadline is None:
+            deadline = time.monotonic() + api.connect_timeout + api.read_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not api.limiter.acquire(priority, timeout=remaining):
+            raise DeadlineExceeded(f"Operation deadline exceeded before {request.method} {request.url}")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Operation deadline exceeded before {request.method} {request.url}")
+        request.timeout = (min(api.connect_timeout, remaining), min(api.read_timeout, remaining))
+        return call_next(request)
+
+
+class MetricsStage(Stage):
+    """Record latency, status and traffic, and feed the circuit breaker."""
+
+    name = "metrics"
+
+    def __init__(self, api):
+        self._api = api
+
+    def handle(self, request, call_next):
+        api = self._api
+        request.attempts += 1
+        # Les erreurs réseau et serveur (5xx) comptent pour le disjoncteur
+        start = time.monotonic()
+        try:
+            response = call_next(request)
+        except requests.RequestException as err:
+            api.metrics.observe_error(request.method, request.url)
+            api.breaker.record_failure(err)
+            raise
+        elapsed = time.monotonic() - start
+        api.metrics.observe(request.method, request.url, request.headers, response, elapsed)
+
+        recorder = api._recorder
+        if recorder is not None:
+            recorder.record(
+                request.method, request.url, request.headers, response, elapsed,
+                secrets=[
+                    ("token", api.token),
+                    ("token", api.refresh_token),
+                    ("user", api.user_id),
+                    ("email", api.email),
+                    ("password", api.password),
+                ],
+            )
+        if response.status_code >= 500:
+            api.breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            api.breaker.record_success()
+        return response
+
+
+class Pipeline:
+    """Ordered stages ending with the HTTP transport."""
+
+    def __init__(self, stages, transport):
+        """Chain `stages` (outermost first) in front of `transport(request)`."""
+        self.stages = list(stages)
+        self._transport = transport
+        self._lock = threading.Lock()
+        # Par étape : [passages, temps propre cumulé (s)]
+        self._timings = {stage.name: [0, 0.0] for stage in self.stages}
+        self._timings["transport"] = [0, 0.0]
+
+    def send(self, request):
+        """Run `request` through every stage and return the response."""
+        return self._call(0, request)
+
+    def _call(self, index, request):
+        if index == len(self.stages):
+            start = time.perf_counter()
+            try:
+                return self._transport(request)
+            finally:
+                self._observe("transport", time.perf_counter() - start)
+
+        stage = self.stages[index]
+        inner = 0.0
+
+        def call_next(next_request):
+            nonlocal inner
+            start = time.perf_counter()
+            try:
+                return self._call(index + 1, next_request)
+            finally:
+                inner += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            return stage.handle(request, call_next)
+        finally:
+            self._observe(stage.name, time.perf_counter() - start - inner)
+
+    def _observe(self, name, elapsed):
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += elapsed
+
+    def stats(self):
+        """Return {stage: {"calls", "total_ms", "mean_ms"}}, time spent in the stage itself."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 1),
+                    "mean_ms": round(total * 1000 / calls, 3) if calls else None,
+                }
+                for name, (calls, total) in self._timings.items()
+            }
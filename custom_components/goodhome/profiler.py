@@ -0,0 +1,253 @@
+"""Profilage à la demande des chemins critiques de l'intégration GoodHome.
+
+Deux modes :
+
+- `sampling` : un thread échantillonne les piles de tous les threads à
+  intervalle fixe et ne garde que celles qui passent par l'intégration ou
+  par le coordinator (temps réel, surcoût faible) ;
+- `deterministic` : cProfile sur le thread de la boucle d'événements
+  (rafraîchissement du coordinator, propriétés des entités, écritures
+  d'état) et sur les appels `get_devices` exécutés dans l'executor.
+
+Option : les N sites d'allocation principaux relevés par tracemalloc.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+_LOGGER = logging.getLogger(__name__)
+
+MODE_SAMPLING = "sampling"
+MODE_DETERMINISTIC = "deterministic"
+MODES = [MODE_SAMPLING, MODE_DETERMINISTIC]
+
+DEFAULT_DURATION = 60
+DEFAULT_INTERVAL_MS = 5
+TOP_FUNCTIONS = 40
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Piles conservées en mode sampling : intégration et coordinator HA
+_HOT_PATHS = (_PACKAGE_DIR, os.path.join("helpers", "update_coordinator.py"))
+
+# Session en cours (une seule à la fois)
+_ACTIVE = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+def _is_hot(filename):
+    return filename.startswith(_HOT_PATHS[0]) or filename.endswith(_HOT_PATHS[1])
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(_PACKAGE_DIR):
+        filename = "goodhome/" + os.path.relpath(filename, _PACKAGE_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def wrap(func):
+    """Return `func` profiled by the active deterministic session, if any.
+
+    Utilisé pour les appels exécutés hors de la boucle d'événements (executor).
+    Sans session active, `func` est retourné tel quel.
+    """
+    session = _ACTIVE
+    if session is None or session.mode != MODE_DETERMINISTIC:
+        return func
+    return lambda *args, **kwargs: session.profile_call(func, *args, **kwargs)
+
+
+class ProfileSession:
+    """One profiling run."""
+
+    def __init__(self, mode=MODE_SAMPLING, allocations=0, interval_ms=DEFAULT_INTERVAL_MS):
+        """Initialize the session."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode}")
+        self.mode = mode
+        self.allocations = allocations
+        self.interval = interval_ms / 1000
+        self.started = None
+        self.elapsed = None
+        self._lock = threading.Lock()
+        self._loop_profile = None
+        self._thread_profiles = []
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self._samples = 0
+        self._stacks = Counter()
+        self._started_tracemalloc = False
+        self._snapshot = None
+
+    def start(self):
+        """Start profiling; call it from the thread to profile deterministically."""
+        global _ACTIVE
+        with _ACTIVE_LOCK:
+            if _ACTIVE is not None:
+                raise RuntimeError("A GoodHome profiling session is already running")
+            _ACTIVE = self
+
+        self.started = time.monotonic()
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+        if self.mode == MODE_DETERMINISTIC:
+            self._loop_profile = cProfile.Profile()
+            try:
+                self._loop_profile.enable()
+            except ValueError as err:
+                # Un autre profileur est déjà attaché (intégration profiler, débogueur)
+                self._loop_profile = None
+                if self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+                with _ACTIVE_LOCK:
+                    _ACTIVE = None
+                raise RuntimeError(f"Cannot start the GoodHome profiler: {err}") from err
+        else:
+            self._sampler = threading.Thread(
+                target=self._sample, name="goodhome-profiler", daemon=True
+            )
+            self._sampler.start()
+        _LOGGER.info(f"GoodHome profiling started ({self.mode})")
+
+    def stop(self):
+        """Stop profiling; call it from the same thread as `start()`."""
+        global _ACTIVE
+        if self._loop_profile is not None:
+            self._loop_profile.disable()
+        if self._sampler is not None:
+            self._stop_event.set()
+            self._sampler.join()
+        if self.allocations and tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        self.elapsed = time.monotonic() - self.started
+        with _ACTIVE_LOCK:
+            if _ACTIVE is self:
+                _ACTIVE = None
+
+    def profile_call(self, func, *args, **kwargs):
+        """Run `func` under its own profiler and keep the result."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Un autre outil de profilage est actif sur ce thread
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def _sample(self):
+        """Sample the stacks of every thread until stopped."""
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self._samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                hot = False
+                while frame is not None:
+                    code = frame.f_code
+                    hot = hot or _is_hot(code.co_filename)
+                    stack.append(code)
+                    frame = frame.f_back
+                if hot:
+                    self._stacks[tuple(reversed(stack))] += 1
+
+    def report(self):
+        """Return the text report."""
+        out = io.StringIO()
+        out.write(f"GoodHome profile - mode {self.mode}, {self.elapsed:.1f}s\n\n")
+        if self.mode == MODE_DETERMINISTIC:
+            self._write_deterministic(out)
+        else:
+            self._write_sampling(out)
+        if self._snapshot is not None:
+            self._write_allocations(out)
+        return out.getvalue()
+
+    def _stats(self):
+        stats = pstats.Stats(self._loop_profile, stream=io.StringIO())
+        with self._lock:
+            for profile in self._thread_profiles:
+                stats.add(profile)
+        return stats
+
+    def _write_deterministic(self, out):
+        stats = self._stats()
+        stats.stream = out
+        out.write(f"Executor calls profiled: {len(self._thread_profiles)}\n\n")
+        out.write("== GoodHome functions (cumulative) ==\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(re.escape(_PACKAGE_DIR), TOP_FUNCTIONS)
+        out.write("== All functions (cumulative) ==\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        out.write("== All functions (own time) ==\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+
+    def _write_sampling(self, out):
+        total = sum(self._stacks.values())
+        out.write(
+            f"{self._samples} sampling rounds every {self.interval * 1000:.0f}ms, "
+            f"{total} samples in GoodHome or coordinator code (wall clock, all threads)\n\n"
+        )
+        own, inclusive = Counter(), Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for code in set(stack):
+                inclusive[code] += count
+        for title, counter in (("own", own), ("inclusive", inclusive)):
+            out.write(f"== Top functions ({title} samples) ==\n")
+            for code, count in counter.most_common(TOP_FUNCTIONS):
+                share = 100 * count / total if total else 0
+                out.write(f"{count:8d} {share:5.1f}%  {_frame_label(code)}\n")
+            out.write("\n")
+
+    def collapsed_stacks(self):
+        """Return the samples in collapsed-stack format (flame graph tools)."""
+        lines = []
+        for stack, count in self._stacks.most_common():
+            lines.append(";".join(_frame_label(code) for code in stack) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def _write_allocations(self, out):
+        out.write(f"== Top {self.allocations} allocation sites (tracemalloc) ==\n")
+        stats = self._snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]).statistics("lineno")
+        for stat in stats[:self.allocations]:
+            frame = stat.traceback[0]
+            out.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+        out.write("\n")
+
+    def write(self, base_path):
+        """Write the report files and return their paths."""
+        paths = [f"{base_path}.txt"]
+        with open(paths[0], "w", encoding="utf-8") as file:
+            file.write(self.report())
+        if self.mode == MODE_DETERMINISTIC:
+            paths.append(f"{base_path}.prof")
+            self._stats().dump_stats(paths[-1])
+        else:
+            paths.append(f"{base_path}.collapsed")
+            with open(paths[-1], "w", encoding="utf-8") as file:
+                file.write(self.collapsed_stacks())
+        return paths
@@ -0,0 +1,161 @@
+"""Export des métriques GoodHome au format texte Prometheus.
+
+La page est construite uniquement à partir de l'état en mémoire (métriques
+du client API, historique et données du coordinator) : un scrape ne fait
+ni requête au cloud ni lecture de la machine à états.
+"""
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+
+from .metrics import LATENCY_BUCKETS
+from .sensor import power_consumption
+
+DOMAIN = "goodhome"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (nom, clé de l'état, aide) des mesures par appareil
+DEVICE_GAUGES = [
+    ("goodhome_device_current_temperature_celsius", "currentTemp", "Current temperature."),
+    ("goodhome_device_target_temperature_celsius", "targetTemp", "Target temperature."),
+    ("goodhome_device_duty_cycle_percent", "dutyCycle", "Heating duty cycle."),
+]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Exposition:
+    """Build a text exposition, grouping samples by metric family."""
+
+    def __init__(self):
+        self._families = {}
+
+    def add(self, name, kind, help_text, labels, value, suffix=""):
+        family = self._families.setdefault(name, (kind, help_text, []))
+        if value is not None:
+            family[2].append(f"{name}{suffix}{_labels(**labels)} {value}")
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _add_api_metrics(out, account, api):
+    stats = api.metrics.stats()
+    out.add("goodhome_api_requests_total", "counter", "Requests sent to the GoodHome cloud.",
+            {"account": account}, stats["requests"])
+    for status, count in stats["status_codes"].items():
+        out.add("goodhome_api_responses_total", "counter", "Responses by HTTP status.",
+                {"account": account, "status": status}, count)
+    for endpoint, count in stats["errors"].items():
+        out.add("goodhome_api_errors_total", "counter", "Requests failed without a response.",
+                {"account": account, "endpoint": endpoint}, count)
+    out.add("goodhome_api_received_bytes_total", "counter", "Response bytes received.",
+            {"account": account}, stats["bytes_received"])
+    out.add("goodhome_api_conditional_requests_total", "counter", "Requests sent with an ETag.",
+            {"account": account}, stats["conditional_requests"])
+    out.add("goodhome_api_not_modified_total", "counter", "Conditional requests answered with 304.",
+            {"account": account}, stats["not_modified"])
+    ratio = api.metrics.etag_hit_ratio
+    out.add("goodhome_api_etag_hit_ratio", "gauge", "Share of conditional requests answered with 304.",
+            {"account": account}, None if ratio is None else ratio / 100)
+
+    for (kind, outcome), count in sorted(api.metrics.commands().items()):
+        out.add("goodhome_api_commands_total", "counter", "Commands sent, by type and outcome.",
+                {"account": account, "kind": kind, "outcome": outcome}, count)
+    out.add("goodhome_api_command_retries_total", "counter", "Commands sent again after a transient error or a 401.",
+            {"account": account}, stats["command_retries"])
+    out.add("goodhome_api_merged_commands_total", "counter", "Commands merged into another write to the same device.",
+            {"account": account}, stats["merged_commands"])
+
+    for stage, timing in api.pipeline.stats().items():
+        out.add("goodhome_api_pipeline_stage_seconds_total", "counter",
+                "Time spent in each request pipeline stage, excluding the following stages.",
+                {"account": account, "stage": stage}, round(timing["total_ms"] / 1000, 6))
+
+    for endpoint, histogram in sorted(api.metrics.histograms().items()):
+        _add_histogram(out, "goodhome_api_request_duration_seconds", "Request latency by endpoint.",
+                       {"account": account, "endpoint": endpoint}, histogram)
+
+
+def _add_executor_metrics(out, host, executor):
+    # Pool partagé par tous les comptes de l'hôte : une seule série par hôte
+    stats = executor.stats()
+    out.add("goodhome_executor_workers", "gauge", "Threads of the GoodHome I/O pool.",
+            {"host": host}, stats["workers"])
+    out.add("goodhome_executor_active", "gauge", "Calls running on the GoodHome I/O pool.",
+            {"host": host}, stats["active"])
+    out.add("goodhome_executor_queue_depth", "gauge", "Calls waiting for a GoodHome I/O thread.",
+            {"host": host}, stats["queue_depth"])
+    _add_histogram(out, "goodhome_executor_wait_seconds", "Wait for a GoodHome I/O thread.",
+                   {"host": host}, executor.histogram())
+
+
+def _add_histogram(out, name, help_text, labels, histogram):
+    """Add a histogram from (buckets, count, total_ms) in milliseconds."""
+    buckets, count, total_ms = histogram
+    cumulative = 0
+    for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+        cumulative += bucket
+        out.add(name, "histogram", help_text, {**labels, "le": bound / 1000}, cumulative, "_bucket")
+    out.add(name, "histogram", help_text, {**labels, "le": "+Inf"}, count, "_bucket")
+    out.add(name, "histogram", help_text, labels, round(total_ms / 1000, 6), "_sum")
+    out.add(name, "histogram", help_text, labels, count, "_count")
+
+
+def _add_coordinator_metrics(out, account, coordinator):
+    history = coordinator.update_history
+    last = history[-1] if history else None
+    out.add("goodhome_coordinator_update_duration_seconds", "gauge", "Duration of the last coordinator update.",
+            {"account": account}, None if last is None else last["duration_ms"] / 1000)
+    out.add("goodhome_coordinator_last_update_success", "gauge", "1 if the last coordinator update succeeded.",
+            {"account": account}, int(coordinator.last_update_success))
+    out.add("goodhome_coordinator_pending_confirmations", "gauge", "Commands waiting for confirmation.",
+            {"account": account}, len(coordinator.pending_confirmations))
+
+    for device in coordinator.data or []:
+        state = device.get("state") or {}
+        labels = {"account": account, "device_id": device["id"], "name": device.get("name") or ""}
+        out.add("goodhome_device_connected", "gauge", "1 if the thermostat is connected.",
+                labels, int(bool(device.get("connected"))))
+        for name, key, help_text in DEVICE_GAUGES:
+            out.add(name, "gauge", help_text, labels, state.get(key))
+        out.add("goodhome_device_power_watts", "gauge", "Calculated power (duty cycle x rated power).",
+                labels, power_consumption(state))
+
+
+def render_metrics(accounts):
+    """Return the text exposition for {account: {"coordinator", "api"}}."""
+    out = _Exposition()
+    executors = {}
+    for account, data in accounts.items():
+        _add_api_metrics(out, account, data["api"])
+        _add_coordinator_metrics(out, account, data["coordinator"])
+        executors.setdefault(data["api"].base_url, data["api"].executor)
+    for host, executor in executors.items():
+        _add_executor_metrics(out, host, executor)
+    return out.render()
+
+
+class GoodHomeMetricsView(HomeAssistantView):
+    """Expose the GoodHome metrics in the Prometheus text format."""
+
+    url = "/api/goodhome/metrics"
+    name = "api:goodhome:metrics"
+
+    async def get(self, request):
+        """Return the metrics of every GoodHome account."""
+        hass = request.app["hass"]
+        body = render_metrics(hass.data.get(DOMAIN, {}))
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
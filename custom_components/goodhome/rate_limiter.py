@@ -0,0 +1,132 @@
+"""Limiteur de débit (token bucket) avec priorités pour l'API GoodHome."""
+import heapq
+import itertools
+import threading
+import time
+
+# Classes de priorité : plus la valeur est faible, plus la requête passe tôt
+PRIORITY_USER = 0  # Commandes envoyées par l'utilisateur
+PRIORITY_CONFIRM = 1  # Rafraîchissements de confirmation après une commande
+PRIORITY_BACKGROUND = 2  # Rafraîchissements périodiques du coordinator
+
+PRIORITY_NAMES = {
+    PRIORITY_USER: "user",
+    PRIORITY_CONFIRM: "confirm",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class TokenBucketLimiter:
+    """Thread-safe token bucket serving waiters by priority, then FIFO.
+
+    Partagé par les comptes d'un hôte : chaque compte demande un budget et
+    l'hôte applique le plus grand débit et la plus grande rafale demandés.
+    """
+
+    def __init__(self, rate, burst):
+        """Initialize the limiter with `rate` tokens/s and `burst` capacity by default."""
+        self._cond = threading.Condition()
+        self._default = (float(rate), float(burst))
+        # Budget (débit, rafale) demandé par compte
+        self._requests = {}
+        self._rate = float(rate)
+        self._burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._granted = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._wait_time = dict.fromkeys(PRIORITY_NAMES, 0.0)
+
+    def configure(self, owner, rate, burst):
+        """Set the budget requested by `owner` (an account)."""
+        with self._cond:
+            self._requests[owner] = (float(rate), float(burst))
+            self._update_budget()
+
+    def release(self, owner):
+        """Forget the budget of an account that no longer uses the host."""
+        with self._cond:
+            if self._requests.pop(owner, None) is not None:
+                self._update_budget()
+
+    def _update_budget(self):
+        self._refill()
+        if self._requests:
+            self._rate = max(rate for rate, _ in self._requests.values())
+            self._burst = max(burst for _, burst in self._requests.values())
+        else:
+            self._rate, self._burst = self._default
+        self._tokens = min(self._tokens, self._burst)
+        self._cond.notify_all()
+
+    def _refill(self):
+        """Add the tokens accumulated since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, priority=PRIORITY_BACKGROUND, timeout=None):
+        """Wait for a token; return False if `timeout` expires first."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self._granted[priority] += 1
+                        self._wait_time[priority] += time.monotonic() - start
+                        # Réveiller le suivant dans la file
+                        self._cond.notify_all()
+                        return True
+
+                    if self._waiters[0] == entry:
+                        wait = (1 - self._tokens) / self._rate if self._rate > 0 else None
+                    else:
+                        wait = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._waiters.remove(entry)
+                            heapq.heapify(self._waiters)
+                            self._cond.notify_all()
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    @property
+    def queue_depth(self):
+        """Return the number of requests waiting for a token."""
+        with self._cond:
+            return len(self._waiters)
+
+    def stats(self):
+        """Return a snapshot of the limiter state."""
+        with self._cond:
+            self._refill()
+            depth = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+            for priority, _ in self._waiters:
+                depth[PRIORITY_NAMES[priority]] += 1
+            return {
+                "rate": self._rate,
+                "burst": self._burst,
+                "tokens": round(self._tokens, 2),
+                "queue_depth": len(self._waiters),
+                "queue_depth_by_priority": depth,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self._granted.items()},
+                "wait_time": {
+                    PRIORITY_NAMES[p]: round(t, 3) for p, t in self._wait_time.items()
+                },
+            }
@@ -1,13 +1,15 @@
 """Support for GoodHome Select entities."""
 import logging
-import asyncio
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import POLLING_MAX_ATTEMPTS, POLLING_INTERVAL
+from .commands import Command
+from .debounce import DebouncedCommand
+from .log_aggregator import AggregatedLogger
 
 _LOGGER = logging.getLogger(__name__)
+_ERRORS = AggregatedLogger(_LOGGER)
 
 # Mapping des modes targetMode selon ESPHome_GoodHome avec traductions
 TARGET_MODES = {
@@ -51,8 +53,9 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if discovery_info is None:
         return
     
-    coordinator = discovery_info["coordinator"]
-    api = discovery_info["api"]
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
+    api = account["api"]
     
     devices = coordinator.data
     entities = []
@@ -90,7 +93,9 @@ class GoodHomeTargetModeSelect(CoordinatorEntity, SelectEntity):
         self._device_name = device["name"]
         self._attr_unique_id = f"goodhome_target_mode_{device['id']}"
         self._attr_options = TARGET_MODE_OPTIONS
-        self._optimistic_state = None
+        self._debouncer = DebouncedCommand(
+            coordinator, self._device_id, coordinator.debounce_mode, self._async_send_option
+        )
     
     @property
     def device_info(self):
@@ -102,21 +107,22 @@ class GoodHomeTargetModeSelect(CoordinatorEntity, SelectEntity):
             "model": "Thermostat",
         }
     
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+        self.async_on_remove(self._debouncer.async_cancel)
+    
     def _get_device(self):
-        """Get the device data from coordinator."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def current_option(self):
         """Return the current selected option."""
-        # Si on a un état optimiste, l'utiliser
-        if self._optimistic_state is not None:
-            return self._optimistic_state
-        
-        # Sinon, lire depuis l'API
+        # Lire depuis l'API (écritures en attente comprises)
         device = self._get_device()
         if device and device.get("state"):
             target_mode = device["state"].get("targetMode")
@@ -131,48 +137,42 @@ class GoodHomeTargetModeSelect(CoordinatorEntity, SelectEntity):
             _LOGGER.error(f"Unknown target mode: {option}")
             return
         
-        mode_value = TARGET_MODES[option]
-        
-        # État optimiste : afficher immédiatement le changement dans l'interface
-        self._optimistic_state = option
-        self.async_write_ha_state()
-        
+        # État optimiste : afficher immédiatement le changement sur toutes les entités de l'appareil,
+        # envoi de la dernière option choisie après le délai
+        command = Command.target_mode(self._device_id, TARGET_MODES[option])
+        self._debouncer.async_schedule(command, command.parameters)
+    
+    async def _async_send_option(self, command, write_id):
+        """Send the debounced target mode and wait for its confirmation."""
+        mode_value = command.parameters["targetMode"]
+        option = TARGET_MODES_REVERSE[mode_value]
         _LOGGER.debug(f"Setting target mode to {option} (value: {mode_value}) for device {self._device_id}")
         
-        # Envoyer la commande à l'API
-        success = await self.hass.async_add_executor_job(
-            self._api.set_parameter,
-            self._device_id,
-            "targetMode",
-            mode_value
-        )
+        # Envoyer la commande à l'API (journalisée, rejouée si le cloud est injoignable)
+        success = await self.coordinator.async_send_command("targetMode", command)
         
         if success:
-            # Attendre que le thermostat traite la commande (jusqu'à 40 secondes)
-            for attempt in range(POLLING_MAX_ATTEMPTS):
-                await asyncio.sleep(POLLING_INTERVAL)
-                await self.coordinator.async_request_refresh()
-                
-                # Vérifier si l'état de l'API correspond à notre commande
-                device = self._get_device()
+            # Vérifier si l'état de l'API correspond à notre commande
+            def check_target_mode():
+                device = self.coordinator.get_device(self._device_id, raw=True)
                 if device and device.get("state"):
-                    api_value = device["state"].get("targetMode")
-                    if api_value == mode_value:
-                        # État confirmé par l'API
-                        _LOGGER.info(f"Target mode {option} confirmed after {(attempt+1)*POLLING_INTERVAL}s")
-                        self._optimistic_state = None
-                        self.async_write_ha_state()
-                        return
+                    return device["state"].get("targetMode") == mode_value
+                return False
             
-            # Après le timeout, abandonner l'état optimiste même sans confirmation
-            _LOGGER.warning(f"Target mode {option} not confirmed after {POLLING_MAX_ATTEMPTS*POLLING_INTERVAL}s, assuming success")
-            self._optimistic_state = None
-            self.async_write_ha_state()
+            # Attendre que le thermostat traite la commande (jusqu'à 40 secondes)
+            confirmed = await self.coordinator.async_wait_for_confirmation(
+                check_target_mode, f"Target mode {option}", self._device_id, "targetMode"
+            )
+            if confirmed:
+                _LOGGER.info(f"Target mode {option} confirmed")
+            elif confirmed is False:
+                # Après le timeout, abandonner l'état optimiste même sans confirmation
+                _ERRORS.warning("confirmation_timeout", f"Target mode {option} not confirmed after {self.coordinator.confirm_timeout}s, assuming success")
+            self.coordinator.async_clear_pending(write_id)
         else:
-            # Échec de la commande, revenir à l'état précédent
-            _LOGGER.error(f"Failed to set target mode to {option}")
-            self._optimistic_state = None
-            self.async_write_ha_state()
+            # Échec de la commande : le journal garde l'option affichée jusqu'au rejeu
+            _ERRORS.error("command_failed", f"Failed to set target mode to {option}, queued for replay")
+            self.coordinator.async_clear_pending(write_id)
     
     @property
     def extra_state_attributes(self):
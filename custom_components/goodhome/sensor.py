@@ -1,21 +1,44 @@
 """GoodHome Sensor Platform."""
 import logging
+import re
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.const import PERCENTAGE, UnitOfTemperature
+from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTemperature, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import EntityCategory
 
+from .circuit_breaker import CIRCUIT_STATES
+from .metrics import ENDPOINT_DEVICES, ENDPOINT_HANDSHAKE, ENDPOINT_LOGIN, ENDPOINT_REFRESH
+
 _LOGGER = logging.getLogger(__name__)
 
+def rated_power(state):
+    """Return the rated power (W) encoded in the codeName (ex: "DLRIRFH1800" -> 1800)."""
+    match = re.search(r'(\d+)$', state.get("codeName") or "")
+    return int(match.group(1)) if match else None
+
+def power_consumption(state):
+    """Return the current consumption (W): duty_cycle (%) * rated power."""
+    duty_cycle = state.get("dutyCycle", 0)
+    power_watts = rated_power(state)
+    if power_watts is not None and duty_cycle is not None:
+        # duty_cycle est en %, donc diviser par 100
+        return round((duty_cycle / 100.0) * power_watts, 1)
+    return 0
+
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the GoodHome sensor platform (YAML config)."""
-    coordinator = hass.data["goodhome"]["coordinator"]
+    if discovery_info is None:
+        return
+    
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
     
     devices = coordinator.data
     entities = []
@@ -144,6 +167,9 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
             )
         )
     
+    # Capteurs de diagnostic du client cloud (appareil "hub" du compte)
+    entities.extend(_hub_sensors(coordinator))
+    
     async_add_entities(entities, True)
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -277,6 +303,9 @@ async def async_setup_entry(hass, entry, async_add_entities):
             )
         )
     
+    # Capteurs de diagnostic du client cloud (appareil "hub" du compte)
+    entities.extend(_hub_sensors(coordinator))
+    
     async_add_entities(entities, True)
 
 class GoodHomeSensor(CoordinatorEntity, SensorEntity):
@@ -316,12 +345,16 @@ class GoodHomeSensor(CoordinatorEntity, SensorEntity):
             "model": "Thermostat",
         }
     
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+    
     def _get_device(self):
-        """Get device from coordinator data."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def available(self):
@@ -352,27 +385,7 @@ class GoodHomeSensor(CoordinatorEntity, SensorEntity):
             elif self._sensor_type == "duty_cycle":
                 return state.get("dutyCycle")
             elif self._sensor_type == "power_consumption":
-                # Calculer la consommation : duty_cycle (%) * puissance nominale (W)
-                duty_cycle = state.get("dutyCycle", 0)
-                code_name = state.get("codeName", "")
-                
-                # Extraire la puissance du codeName (ex: "DLRIRFH1800" -> 1800W)
-                power_watts = None
-                if code_name:
-                    try:
-                        import re
-                        # Extract trailing numeric digits (e.g., 1800 from DLRIRFH1800)
-                        match = re.search(r'(\d+)$', code_name)
-                        if match:
-                            power_watts = int(match.group(1))
-                    except (ValueError, AttributeError):
-                        pass
-                
-                # Si on a la puissance et le duty cycle, calculer la consommation
-                if power_watts is not None and duty_cycle is not None:
-                    # duty_cycle est en %, donc diviser par 100
-                    return round((duty_cycle / 100.0) * power_watts, 1)
-                return 0
+                return power_consumption(state)
             elif self._sensor_type == "device_info":
                 # Retourner un résumé textuel
                 fw_ver = state.get("fwVer", "Unknown")
@@ -392,22 +405,10 @@ class GoodHomeSensor(CoordinatorEntity, SensorEntity):
             
             # Attributs spécifiques pour device_info sensor
             if self._sensor_type == "device_info":
-                # Extraire la puissance du codeName (ex: "DLRIRFH1800" -> 1800W)
                 code_name = state.get("codeName", "")
-                power_watts = None
-                if code_name:
-                    try:
-                        import re
-                        # Extract trailing numeric digits (e.g., 1800 from DLRIRFH1800)
-                        match = re.search(r'(\d+)$', code_name)
-                        if match:
-                            power_watts = int(match.group(1))
-                    except (ValueError, AttributeError):
-                        pass
-                
                 attrs = {
                     "device_type": device.get("type"),
-                    "power_watts": power_watts,
+                    "power_watts": rated_power(state),
                     "firmware_version": state.get("fwVer"),
                     "hardware_version": state.get("HwVer"),
                     "code_name": code_name,
@@ -437,3 +438,110 @@ class GoodHomeSensor(CoordinatorEntity, SensorEntity):
                 "fault_system": state.get("faultSystem"),
             }
         return {}
+
+
+def _hub_sensors(coordinator):
+    """Return the diagnostic sensors of the account hub."""
+    return [
+        GoodHomeHubSensor(coordinator, "request_queue", "request_queue"),
+        GoodHomeHubSensor(coordinator, "io_queue", "io_queue"),
+        GoodHomeHubSensor(coordinator, "cloud_status", "cloud_status"),
+        GoodHomeHubSensor(coordinator, "api_requests", "api_requests", None, SensorStateClass.TOTAL_INCREASING),
+        GoodHomeHubSensor(coordinator, "api_latency", "api_latency", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+        GoodHomeHubSensor(coordinator, "etag_hit_ratio", "etag_hit_ratio", PERCENTAGE, SensorStateClass.MEASUREMENT),
+        GoodHomeHubSensor(coordinator, "auth_refreshes", "auth_refreshes", None, SensorStateClass.TOTAL_INCREASING),
+        GoodHomeHubSensor(coordinator, "bytes_received", "bytes_received", UnitOfInformation.BYTES, SensorStateClass.TOTAL_INCREASING),
+    ]
+
+
+class GoodHomeHubSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor describing the GoodHome cloud client of an account."""
+    
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    
+    def __init__(self, coordinator, sensor_type, translation_key, unit=None, state_class=None):
+        """Initialize the hub sensor."""
+        super().__init__(coordinator)
+        self._hub_id = f"hub_{coordinator.api.user_id}"
+        self._sensor_type = sensor_type
+        self._attr_translation_key = translation_key
+        self._attr_unique_id = f"goodhome_{self._hub_id}_{sensor_type}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        if sensor_type == "cloud_status":
+            self._attr_device_class = SensorDeviceClass.ENUM
+            self._attr_options = CIRCUIT_STATES
+        elif sensor_type == "api_latency":
+            self._attr_device_class = SensorDeviceClass.DURATION
+        elif sensor_type == "bytes_received":
+            self._attr_device_class = SensorDeviceClass.DATA_SIZE
+    
+    @property
+    def device_info(self):
+        """Return device info of the account hub."""
+        return {
+            "identifiers": {("goodhome", self._hub_id)},
+            "name": "GoodHome Cloud",
+            "manufacturer": "GoodHome",
+            "model": "Cloud API",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+    
+    @property
+    def available(self):
+        """Hub sensors stay available even when the cloud is unreachable."""
+        return True
+    
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        api = self.coordinator.api
+        if self._sensor_type == "request_queue":
+            return api.limiter.queue_depth
+        elif self._sensor_type == "io_queue":
+            return api.executor.queue_depth
+        elif self._sensor_type == "cloud_status":
+            return api.breaker.state
+        elif self._sensor_type == "api_requests":
+            return api.metrics.requests
+        elif self._sensor_type == "api_latency":
+            # p95 de la lecture de la liste des appareils
+            return api.metrics.latency(ENDPOINT_DEVICES)["p95_ms"]
+        elif self._sensor_type == "etag_hit_ratio":
+            return api.metrics.etag_hit_ratio
+        elif self._sensor_type == "auth_refreshes":
+            return api.metrics.count(ENDPOINT_REFRESH)
+        elif self._sensor_type == "bytes_received":
+            return api.metrics.bytes_received
+        return None
+    
+    @property
+    def extra_state_attributes(self):
+        """Return extra state attributes."""
+        api = self.coordinator.api
+        if self._sensor_type == "request_queue":
+            return api.limiter.stats()
+        elif self._sensor_type == "io_queue":
+            return api.executor.stats()
+        elif self._sensor_type == "cloud_status":
+            return api.breaker.stats()
+        elif self._sensor_type == "api_requests":
+            stats = api.metrics.stats()
+            return {"status_codes": stats["status_codes"], "errors": stats["errors"]}
+        elif self._sensor_type == "api_latency":
+            return api.metrics.stats()["latency"]
+        elif self._sensor_type == "etag_hit_ratio":
+            stats = api.metrics.stats()
+            return {
+                "conditional_requests": stats["conditional_requests"],
+                "not_modified": stats["not_modified"],
+            }
+        elif self._sensor_type == "auth_refreshes":
+            stats = api.metrics.stats()
+            return {
+                "logins": api.metrics.count(ENDPOINT_LOGIN),
+                "unauthorized": stats["status_codes"].get("401", 0),
+                "socket_handshakes": api.metrics.count(ENDPOINT_HANDSHAKE),
+            }
+        return {}
@@ -0,0 +1,79 @@
+"""Déduplication des lectures identiques concurrentes (single-flight)."""
+import threading
+import time
+
+
+class _Call:
+    """An in-flight call shared by every caller of the same key."""
+
+    def __init__(self, generation):
+        self.event = threading.Event()
+        self.generation = generation
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Share one execution (and its result) between concurrent identical calls.
+
+    Un résultat récent est aussi réutilisé pendant `ttl` secondes. `forget()`
+    invalide les résultats récents et détache les appels en cours, par exemple
+    après une écriture, pour que les lectures suivantes repartent du réseau.
+    """
+
+    def __init__(self, ttl):
+        """Initialize with the freshness window in seconds."""
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._recent = {}
+        self._generation = 0
+        self.shared = 0  # Appels servis par un appel en cours
+        self.fresh_hits = 0  # Appels servis par un résultat récent
+
+    def do(self, key, func, timeout=None):
+        """Return `func()`, sharing it with identical concurrent calls."""
+        with self._lock:
+            now = time.monotonic()
+            recent = self._recent.get(key)
+            if recent is not None:
+                if recent[1] > now:
+                    self.fresh_hits += 1
+                    return recent[0]
+                del self._recent[key]
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(self._generation)
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for shared call {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                if call.error is None and call.generation == self._generation and self._ttl > 0:
+                    self._recent[key] = (call.result, time.monotonic() + self._ttl)
+            call.event.set()
+
+    def forget(self):
+        """Drop recent results and detach in-flight calls."""
+        with self._lock:
+            self._generation += 1
+            self._recent.clear()
+            self._calls.clear()
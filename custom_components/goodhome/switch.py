@@ -1,19 +1,25 @@
 """GoodHome Switch Platform."""
 import logging
-import asyncio
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import POLLING_MAX_ATTEMPTS, POLLING_INTERVAL
+from .commands import Command
+from .debounce import DebouncedCommand
+from .log_aggregator import AggregatedLogger
 
 _LOGGER = logging.getLogger(__name__)
+_ERRORS = AggregatedLogger(_LOGGER)
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the GoodHome switch platform (YAML config)."""
-    coordinator = hass.data["goodhome"]["coordinator"]
-    api = hass.data["goodhome"]["api"]
+    if discovery_info is None:
+        return
+    
+    account = hass.data["goodhome"][discovery_info["account"]]
+    coordinator = account["coordinator"]
+    api = account["api"]
     
     devices = coordinator.data
     entities = []
@@ -137,8 +143,10 @@ class GoodHomeSwitch(CoordinatorEntity, SwitchEntity):
         self._attr_unique_id = f"goodhome_{device['id']}_{parameter_name}"
         self._attr_icon = icon
         # Pas de assumed_state pour avoir un vrai toggle comme Hue
-        # On gère l'état optimiste différemment
-        self._optimistic_state = None  # État local temporaire
+        # L'état optimiste est porté par les écritures en attente du coordinator
+        self._debouncer = DebouncedCommand(
+            coordinator, self._device_id, coordinator.debounce_switch, self._async_send_state
+        )
         
     @property
     def device_info(self):
@@ -150,12 +158,17 @@ class GoodHomeSwitch(CoordinatorEntity, SwitchEntity):
             "model": "Thermostat",
         }
     
+    async def async_added_to_hass(self):
+        """Also refresh when a command on this device changes its pending writes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._device_id, self.async_write_ha_state)
+        )
+        self.async_on_remove(self._debouncer.async_cancel)
+    
     def _get_device(self):
-        """Get device from coordinator data."""
-        for device in self.coordinator.data:
-            if device["id"] == self._device_id:
-                return device
-        return None
+        """Get device from coordinator data, with the pending writes applied."""
+        return self.coordinator.get_device(self._device_id)
     
     @property
     def available(self):
@@ -168,11 +181,7 @@ class GoodHomeSwitch(CoordinatorEntity, SwitchEntity):
     @property
     def is_on(self):
         """Return true if the switch is on."""
-        # Si on a un état optimiste (commande récente), l'utiliser
-        if self._optimistic_state is not None:
-            return self._optimistic_state
-        
-        # Sinon, utiliser l'état de l'API
+        # État de l'API (écritures en attente comprises)
         device = self._get_device()
         if device and device.get("state"):
             state = device["state"]
@@ -185,103 +194,59 @@ class GoodHomeSwitch(CoordinatorEntity, SwitchEntity):
                 return str(value) == "1" or value == 1 or str(value).lower() == "true"
         return False
     
+    def _api_value_is(self, expected):
+        """Return True if the API state of the parameter matches `expected`."""
+        device = self.coordinator.get_device(self._device_id, raw=True)
+        if device and device.get("state"):
+            api_value = device["state"].get(self._parameter_name)
+            if expected:
+                return api_value is True or api_value == 1
+            return api_value is False or api_value == 0
+        return False
+    
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
-        try:
-            # Définir l'état optimiste immédiatement
-            self._optimistic_state = True
-            self.async_write_ha_state()
-            
-            # Envoyer la commande à l'API
-            success = await self.hass.async_add_executor_job(
-                self._api.set_parameter,
-                self._device_id,
-                self._parameter_name,
-                True
-            )
-            
-            if success:
-                # Attendre que le thermostat traite la commande (jusqu'à 40 secondes)
-                # Faire plusieurs tentatives pour confirmer le changement
-                for attempt in range(POLLING_MAX_ATTEMPTS):
-                    await asyncio.sleep(POLLING_INTERVAL)
-                    await self.coordinator.async_request_refresh()
-                    
-                    # Vérifier si l'état de l'API correspond à notre commande
-                    device = self._get_device()
-                    if device and device.get("state"):
-                        api_value = device["state"].get(self._parameter_name)
-                        if api_value is True or api_value == 1:
-                            # État confirmé par l'API, on peut abandonner l'état optimiste
-                            _LOGGER.info(f"{self._attr_name} turned on confirmed after {(attempt+1)*POLLING_INTERVAL}s")
-                            self._optimistic_state = None
-                            self.async_write_ha_state()
-                            return
-                
-                # Après le timeout, abandonner l'état optimiste même sans confirmation
-                _LOGGER.warning(f"{self._attr_name} turn on not confirmed after 30s, assuming success")
-                self._optimistic_state = None
-                self.async_write_ha_state()
-            else:
-                # En cas d'échec, annuler l'état optimiste
-                self._optimistic_state = None
-                self.async_write_ha_state()
-                _LOGGER.error(f"Failed to turn on {self._attr_name}")
-                
-        except Exception as err:
-            # En cas d'erreur, annuler l'état optimiste
-            self._optimistic_state = None
-            self.async_write_ha_state()
-            _LOGGER.error(f"Error turning on {self._attr_name}: {err}")
+        # Définir l'état optimiste immédiatement, envoi après le délai
+        command = Command.parameter(self._device_id, self._parameter_name, True)
+        self._debouncer.async_schedule(command, command.parameters)
     
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
+        # Définir l'état optimiste immédiatement, envoi après le délai
+        command = Command.parameter(self._device_id, self._parameter_name, False)
+        self._debouncer.async_schedule(command, command.parameters)
+    
+    async def _async_send_state(self, command, write_id):
+        """Send the debounced state and wait for its confirmation."""
+        value = command.parameters[self._parameter_name]
+        action = "on" if value else "off"
         try:
-            # Définir l'état optimiste immédiatement
-            self._optimistic_state = False
-            self.async_write_ha_state()
-            
-            # Envoyer la commande à l'API
-            success = await self.hass.async_add_executor_job(
-                self._api.set_parameter,
-                self._device_id,
-                self._parameter_name,
-                False
-            )
+            # Envoyer la commande à l'API (journalisée, rejouée si le cloud est injoignable)
+            success = await self.coordinator.async_send_command(self._parameter_name, command)
             
             if success:
                 # Attendre que le thermostat traite la commande (jusqu'à 40 secondes)
                 # Faire plusieurs tentatives pour confirmer le changement
-                for attempt in range(POLLING_MAX_ATTEMPTS):
-                    await asyncio.sleep(POLLING_INTERVAL)
-                    await self.coordinator.async_request_refresh()
-                    
-                    # Vérifier si l'état de l'API correspond à notre commande
-                    device = self._get_device()
-                    if device and device.get("state"):
-                        api_value = device["state"].get(self._parameter_name)
-                        if api_value is False or api_value == 0:
-                            # État confirmé par l'API, on peut abandonner l'état optimiste
-                            _LOGGER.info(f"{self._attr_name} turned off confirmed after {(attempt+1)*POLLING_INTERVAL}s")
-                            self._optimistic_state = None
-                            self.async_write_ha_state()
-                            return
-                
-                # Après le timeout, abandonner l'état optimiste même sans confirmation
-                _LOGGER.warning(f"{self._attr_name} turn off not confirmed after 30s, assuming success")
-                self._optimistic_state = None
-                self.async_write_ha_state()
+                confirmed = await self.coordinator.async_wait_for_confirmation(
+                    lambda: self._api_value_is(value), f"{self.entity_id} turn {action}",
+                    self._device_id, self._parameter_name,
+                )
+                if confirmed:
+                    # État confirmé par l'API, on peut abandonner l'état optimiste
+                    _LOGGER.info(f"{self.entity_id} turned {action} confirmed")
+                elif confirmed is False:
+                    # Après le timeout, abandonner l'état optimiste même sans confirmation
+                    _ERRORS.warning("confirmation_timeout", f"{self.entity_id} turn {action} not confirmed after {self.coordinator.confirm_timeout}s, assuming success")
+                self.coordinator.async_clear_pending(write_id)
             else:
-                # En cas d'échec, annuler l'état optimiste
-                self._optimistic_state = None
-                self.async_write_ha_state()
-                _LOGGER.error(f"Failed to turn off {self._attr_name}")
+                # En cas d'échec, le journal garde l'état affiché jusqu'au rejeu
+                self.coordinator.async_clear_pending(write_id)
+                _ERRORS.error("command_failed", f"Failed to turn {action} {self.entity_id}, queued for replay")
                 
         except Exception as err:
             # En cas d'erreur, annuler l'état optimiste
-            self._optimistic_state = None
-            self.async_write_ha_state()
-            _LOGGER.error(f"Error turning off {self._attr_name}: {err}")
+            self.coordinator.async_clear_pending(write_id)
+            _LOGGER.error(f"Error turning {action} {self.entity_id}: {err}")
     
     @property
     def extra_state_attributes(self):
@@ -0,0 +1,270 @@
+"""Enregistrement et rejeu du trafic de l'API GoodHome.
+
+`TrafficRecorder` écrit les paires requête/réponse (statut, ETag,
+Last-Modified, corps) dans un fichier JSON Lines, compressé en gzip si son
+nom se termine par `.gz`. Les tokens, mots de passe, emails et identifiants
+de compte sont remplacés par des valeurs fictives stables (`token-1`,
+`user-1`, `user1@example.com`...) avant l'écriture.
+
+`ReplayTransport` relit ce fichier et se comporte comme une
+`requests.Session` : il peut être passé à `GoodHomeAPI(transport=...)` pour
+rejouer le trafic enregistré sans réseau.
+"""
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+_LOGGER = logging.getLogger(__name__)
+
+FORMAT = "goodhome-traffic"
+VERSION = 1
+
+# En-têtes de réponse conservés (cache HTTP et type de contenu)
+RECORDED_HEADERS = ["ETag", "Last-Modified", "Content-Type"]
+# Clés JSON dont la valeur est toujours un secret, et son type de remplacement
+SECRET_KEYS = {
+    "token": "token",
+    "refresh_token": "token",
+    "access_token": "token",
+    "password": "password",
+    "email": "email",
+}
+# Paramètres de requête variables à ignorer pour rejouer
+VOLATILE_PARAMS = {"t"}
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+
+def _open(path, mode):
+    """Open a recording, transparently (de)compressing `.gz` files."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def normalize_url(url):
+    """Return the replay key part of a URL: path and stable query parameters."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_PARAMS]
+    path = parts.path or "/"
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+class Scrubber:
+    """Replace secrets with stable placeholders."""
+
+    def __init__(self):
+        """Initialize the placeholder table."""
+        self._aliases = {}
+        self._placeholders = set()
+        self._counters = defaultdict(int)
+
+    def alias(self, kind, value):
+        """Register a secret and return its placeholder."""
+        if not value or not isinstance(value, str) or value in self._placeholders:
+            return value
+        if value not in self._aliases:
+            self._counters[kind] += 1
+            number = self._counters[kind]
+            if kind == "email":
+                self._aliases[value] = f"user{number}@example.com"
+            elif kind == "password":
+                self._aliases[value] = "password"
+            else:
+                self._aliases[value] = f"{kind}-{number}"
+            self._placeholders.add(self._aliases[value])
+        return self._aliases[value]
+
+    def text(self, value):
+        """Scrub every known secret and every email address from a string."""
+        # Les plus longs d'abord pour ne pas remplacer un secret contenu dans un autre
+        for secret in sorted(self._aliases, key=len, reverse=True):
+            if secret in value:
+                value = value.replace(secret, self._aliases[secret])
+        return _EMAIL_RE.sub(lambda match: self.alias("email", match.group(0)), value)
+
+    def json(self, value):
+        """Scrub a decoded JSON document."""
+        if isinstance(value, dict):
+            # Réponse d'authentification : l'identifiant est celui du compte
+            if "token" in value and isinstance(value.get("id"), str):
+                self.alias("user", value["id"])
+            result = {}
+            for key, item in value.items():
+                if key in SECRET_KEYS and isinstance(item, str):
+                    result[key] = self.alias(SECRET_KEYS[key], item)
+                else:
+                    result[key] = self.json(item)
+            return result
+        if isinstance(value, list):
+            return [self.json(item) for item in value]
+        if isinstance(value, str):
+            return self.text(value)
+        return value
+
+    def body(self, text):
+        """Scrub a response body, JSON or not."""
+        try:
+            document = json.loads(text)
+        except ValueError:
+            return self.text(text)
+        return json.dumps(self.json(document), separators=(",", ":"), ensure_ascii=False)
+
+
+class TrafficRecorder:
+    """Write scrubbed request/response pairs to a recording file."""
+
+    def __init__(self, path, base_url=None):
+        """Open the recording file."""
+        self.path = path
+        self.count = 0
+        self._scrubber = Scrubber()
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._file = _open(path, "w")
+        self._write({
+            "format": FORMAT,
+            "version": VERSION,
+            "base_url": base_url,
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def record(self, method, url, headers, response, elapsed, secrets=()):
+        """Record one exchange.
+
+        `secrets` est une liste de paires (type, valeur) connues de l'appelant
+        (`token`, `user`, `email`, `password`), remplacées partout.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            for kind, value in secrets:
+                self._scrubber.alias(kind, value)
+            body = self._scrubber.body(response.text) if response.content else ""
+            entry = {
+                "t": round(time.monotonic() - self._start, 3),
+                "d": round(elapsed * 1000, 1),
+                "m": method,
+                "u": self._scrubber.text(normalize_url(url)),
+                "s": response.status_code,
+                "h": {k: response.headers[k] for k in RECORDED_HEADERS if k in response.headers},
+                "b": body,
+            }
+            if headers and "If-None-Match" in headers:
+                entry["inm"] = headers["If-None-Match"]
+            self._write(entry)
+            self.count += 1
+
+    def close(self):
+        """Flush and close the recording file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        _LOGGER.info(f"Recorded {self.count} exchanges to {self.path}")
+
+
+def load_recording(path):
+    """Return (header, entries) of a recording file."""
+    with _open(path, "r") as file:
+        lines = [json.loads(line) for line in file if line.strip()]
+    if not lines or lines[0].get("format") != FORMAT:
+        raise ValueError(f"{path} is not a GoodHome traffic recording")
+    if lines[0].get("version") != VERSION:
+        raise ValueError(f"Unsupported recording version {lines[0].get('version')}")
+    return lines[0], lines[1:]
+
+
+class ReplayTransport:
+    """Session-like transport serving recorded responses without the network.
+
+    Les réponses sont servies dans l'ordre d'enregistrement, séparément pour
+    chaque (méthode, chemin) ; le paramètre `t` du handshake Socket.io est
+    ignoré. Une fois les réponses d'une clé épuisées, le rejeu reprend au
+    début (`loop=True`) ou répète la dernière. Un 304 enregistré n'est servi
+    que si le client présente l'ETag de la dernière réponse complète servie,
+    sinon cette dernière est resservie. Avec `latency=True`, la durée
+    enregistrée de chaque échange est reproduite.
+    """
+
+    def __init__(self, path, loop=True, latency=False):
+        """Load the recording."""
+        self.header, entries = load_recording(path)
+        self.loop = loop
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        for entry in entries:
+            self._entries[(entry["m"], entry["u"])].append(entry)
+        self._cursors = defaultdict(int)
+        self._last_full = {}
+        self._missing = set()
+        self.served = 0
+        self.misses = 0
+
+    @property
+    def keys(self):
+        """Return the recorded (method, path) keys."""
+        return list(self._entries)
+
+    def request(self, method, url, headers=None, **kwargs):
+        """Return the next recorded response for this request."""
+        key = (method.upper(), normalize_url(url))
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                if key not in self._missing:
+                    self._missing.add(key)
+                    _LOGGER.warning(f"No recorded response for {key[0]} {key[1]}")
+                return self._build(url, {"s": 404, "h": {}, "b": ""})
+
+            cursor = self._cursors[key]
+            if cursor >= len(entries):
+                cursor = 0 if self.loop else len(entries) - 1
+            entry = entries[cursor]
+            self._cursors[key] = cursor + 1
+
+            if entry["s"] == 304:
+                full = self._last_full.get(key)
+                etag = (headers or {}).get("If-None-Match")
+                if full is not None and etag != full["h"].get("ETag"):
+                    entry = full
+            elif 200 <= entry["s"] < 300:
+                self._last_full[key] = entry
+            self.served += 1
+
+        if self.latency and entry.get("d"):
+            time.sleep(entry["d"] / 1000)
+        return self._build(url, entry)
+
+    @staticmethod
+    def _build(url, entry):
+        """Build a `requests.Response` from a recorded entry."""
+        response = requests.Response()
+        response.status_code = entry["s"]
+        try:
+            response.reason = HTTPStatus(entry["s"]).phrase
+        except ValueError:
+            response.reason = ""
+        response.headers = CaseInsensitiveDict(entry["h"])
+        response._content = entry["b"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+    def close(self):
+        """Nothing to release (session-like API)."""
@@ -0,0 +1,66 @@
+"""Zones GoodHome : plusieurs radiateurs pilotés comme un seul thermostat.
+
+Une zone est définie dans les options, sous la forme
+`Étage: Salon, Cuisine; Chambres: Chambre 1, Chambre 2` (radiateurs désignés
+par leur nom ou leur identifiant), ou automatiquement pour chaque pièce
+(`roomName`) comptant au moins deux radiateurs.
+"""
+import logging
+
+from homeassistant.util import slugify
+
+from .const import CONF_ROOM_ZONES, CONF_ZONES, DEFAULT_ROOM_ZONES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_zones(text: str) -> list[tuple[str, list[str]]]:
+    """Parse the zones option into [(name, [member name or id])].
+
+    Lève ValueError si une zone n'a pas de nom ou pas de membre.
+    """
+    zones = []
+    for definition in text.replace("\n", ";").split(";"):
+        if not definition.strip():
+            continue
+        name, separator, members = definition.partition(":")
+        members = [member.strip() for member in members.split(",") if member.strip()]
+        if not separator or not name.strip() or not members:
+            raise ValueError(f"Invalid zone definition: {definition.strip()!r}")
+        zones.append((name.strip(), members))
+    return zones
+
+
+def resolve_zones(devices: list, options: dict) -> list[tuple[str, str, list[str]]]:
+    """Return [(zone_id, name, [device_id])] for the configured zones and rooms."""
+    by_reference = {}
+    for device in devices:
+        by_reference[device["id"].casefold()] = device["id"]
+        if device.get("name"):
+            by_reference[device["name"].casefold()] = device["id"]
+
+    zones = []
+    names = set()
+    for name, references in parse_zones(options.get(CONF_ZONES, "")):
+        members = []
+        for reference in references:
+            device_id = by_reference.get(reference.casefold())
+            if device_id is None:
+                _LOGGER.warning(f"Zone {name}: unknown radiator {reference}")
+            elif device_id not in members:
+                members.append(device_id)
+        if members:
+            zones.append((slugify(name), name, members))
+            names.add(name.casefold())
+
+    if options.get(CONF_ROOM_ZONES, DEFAULT_ROOM_ZONES):
+        rooms = {}
+        for device in devices:
+            room = (device.get("state") or {}).get("roomName")
+            if room:
+                rooms.setdefault(room, []).append(device["id"])
+        for room, members in rooms.items():
+            # Une zone définie à la main porte déjà ce nom
+            if len(members) > 1 and room.casefold() not in names:
+                zones.append((f"room_{slugify(room)}", room, members))
+    return zones
@@ -0,0 +1,6 @@
+"""Configuration commune des tests de l'intégration GoodHome."""
+import os
+import sys
+
+# Importer `custom_components.goodhome` depuis la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
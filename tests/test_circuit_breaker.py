@@ -0,0 +1,110 @@
+"""Tests du disjoncteur (circuit breaker)."""
+import time
+
+from custom_components.goodhome.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+def _breaker(threshold=3, base_delay=0.05, max_delay=0.2):
+    return CircuitBreaker(threshold, base_delay, max_delay, jitter=0)
+
+
+def _trip(breaker, failures=3):
+    for _ in range(failures):
+        breaker.record_failure("timeout")
+
+
+def test_stays_closed_below_threshold():
+    breaker = _breaker()
+    _trip(breaker, 2)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.admit() == (True, False)
+
+
+def test_success_resets_consecutive_failures():
+    breaker = _breaker()
+    _trip(breaker, 2)
+    breaker.record_success()
+    _trip(breaker, 2)
+    assert breaker.state == STATE_CLOSED
+
+
+def test_opens_at_threshold_and_rejects_operations():
+    breaker = _breaker()
+    _trip(breaker)
+    assert breaker.state == STATE_OPEN
+    assert breaker.admit() == (False, False)
+    stats = breaker.stats()
+    assert stats["rejected_operations"] == 1
+    assert stats["last_error"] == "timeout"
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    assert breaker.admit() == (True, True)
+    assert breaker.state == STATE_HALF_OPEN
+    # Les autres opérations échouent tant que la sonde est en cours
+    assert breaker.admit() == (False, False)
+
+
+def test_successful_probe_closes_the_circuit():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    breaker.admit()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.admit() == (True, False)
+
+
+def test_failed_probe_reopens_with_a_longer_delay():
+    breaker = _breaker(base_delay=0.05, max_delay=1)
+    _trip(breaker)
+    time.sleep(0.06)
+    breaker.admit()
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()["consecutive_opens"] == 2
+    # Deuxième ouverture : 0,1 s au lieu de 0,05 s
+    time.sleep(0.06)
+    assert breaker.admit() == (False, False)
+    time.sleep(0.06)
+    assert breaker.admit() == (True, True)
+
+
+def test_backoff_is_capped():
+    breaker = _breaker(base_delay=0.05, max_delay=0.1)
+    _trip(breaker)
+    # Cycles ouvert → semi-ouvert → sonde en échec
+    for _ in range(3):
+        time.sleep(0.11)
+        assert breaker.admit() == (True, True)
+        breaker.record_failure("HTTP 503")
+    stats = breaker.stats()
+    assert stats["consecutive_opens"] == 4
+    assert 0.05 < stats["next_probe_in"] <= 0.1
+
+
+def test_failures_while_open_do_not_extend_the_backoff():
+    breaker = CircuitBreaker(5, 10, 300, jitter=0)
+    _trip(breaker, 8)
+    stats = breaker.stats()
+    assert stats["state"] == STATE_OPEN
+    assert stats["consecutive_failures"] == 8
+    assert stats["consecutive_opens"] == 1
+    assert 9.9 <= stats["next_probe_in"] <= 10.0
+
+
+def test_end_probe_releases_the_probe_slot():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    assert breaker.admit() == (True, True)
+    breaker.end_probe()
+    assert breaker.admit() == (True, True)
@@ -0,0 +1,127 @@
+"""Tests des commandes typées et de leur envoi."""
+import pytest
+
+from custom_components.goodhome.commands import (
+    OVERRIDE_MODE,
+    Command,
+    InvalidCommand,
+    merge_commands,
+)
+from custom_components.goodhome.goodhome_api import GoodHomeAPI
+
+
+def test_temperatures_are_rounded_floats():
+    command = Command.setpoint("a", "comfTemp", 19)
+    assert command.parameters == {"comfTemp": 19.0}
+    assert isinstance(command.parameters["comfTemp"], float)
+    assert Command.setpoint("a", "ecoTemp", 17.26).parameters == {"ecoTemp": 17.3}
+
+
+@pytest.mark.parametrize("value", [6.9, 30.1, "20", True, None])
+def test_invalid_temperatures_are_rejected(value):
+    with pytest.raises(InvalidCommand):
+        Command.setpoint("a", "comfTemp", value)
+
+
+def test_unknown_setpoint_and_parameter_are_rejected():
+    with pytest.raises(InvalidCommand):
+        Command.setpoint("a", "overrideTemp", 20)
+    with pytest.raises(InvalidCommand):
+        Command.parameter("a", "firmware", 1)
+
+
+def test_flags_only_accept_booleans():
+    assert Command.parameter("a", "window", False).parameters == {"window": False}
+    with pytest.raises(InvalidCommand):
+        Command.parameter("a", "window", 1)
+
+
+def test_target_mode_values():
+    assert Command.target_mode("a", 3).parameters == {"targetMode": 3}
+    for mode in (4, True, "3"):
+        with pytest.raises(InvalidCommand):
+            Command.target_mode("a", mode)
+
+
+def test_identify_and_ping():
+    assert Command.identify("a").parameters == {"ping": 1}
+    with pytest.raises(InvalidCommand):
+        Command.parameter("a", "ping", True)
+
+
+def test_missing_device_or_parameters():
+    with pytest.raises(InvalidCommand):
+        Command("", {"ping": 1})
+    with pytest.raises(InvalidCommand):
+        Command("a", {})
+
+
+def test_override_temperature_sets_the_override_mode():
+    command = Command.override_temperature("a", 21.5)
+    assert command.kind == "override_temperature"
+    assert command.parameters == {"overrideTemp": 21.5, "targetMode": OVERRIDE_MODE}
+
+
+def test_invalid_command_is_a_value_error():
+    # Les appelants qui attrapent ValueError continuent de fonctionner
+    assert issubclass(InvalidCommand, ValueError)
+
+
+def test_merge_commands_per_device():
+    merged = merge_commands([
+        Command.setpoint("a", "comfTemp", 19),
+        Command.target_mode("b", 3),
+        Command.setpoint("a", "comfTemp", 20),
+        Command.parameter("a", "window", True),
+    ])
+    assert [command.device_id for command in merged] == ["a", "b"]
+    assert merged[0].kind == "batch"
+    assert merged[0].parameters == {"comfTemp": 20.0, "window": True}
+    # Une commande seule sur son radiateur est gardée telle quelle
+    assert merged[1] == Command.target_mode("b", 3)
+
+
+class _Response:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def api():
+    api = GoodHomeAPI("user", "token", base_url="http://127.0.0.1:9")
+    yield api
+    api.close()
+
+
+def test_send_patches_the_device_state(api):
+    requests = []
+
+    def send(request):
+        requests.append(request)
+        return _Response()
+
+    api.pipeline.send = send
+    assert api.set_setpoint("a", "comfTemp", 19) is True
+    (request,) = requests
+    assert request.method == "PATCH"
+    assert request.url.endswith("/v1/devices/a/state")
+    assert request.json == {"parameters": {"comfTemp": 19.0}}
+    assert request.invalidates == ("device_a",)
+
+
+def test_send_reports_failures(api):
+    def send(request):
+        raise ConnectionError("down")
+
+    api.pipeline.send = send
+    assert api.set_mode("a", 3) is False
+
+
+def test_invalid_command_is_raised_before_sending(api):
+    requests = []
+    api.pipeline.send = requests.append
+    with pytest.raises(InvalidCommand):
+        api.set_parameter("a", "unknown", 1)
+    assert requests == []
@@ -0,0 +1,259 @@
+"""Tests du pipeline des requêtes : ordre des étapes, cache, nouvel essai, 401."""
+import threading
+import time
+
+import pytest
+import requests
+
+from custom_components.goodhome.goodhome_api import GoodHomeAPI
+from custom_components.goodhome.pipeline import (
+    ApiRequest,
+    AuthStage,
+    ConditionalCacheStage,
+    DeadlineExceeded,
+    Pipeline,
+    RetryStage,
+    Stage,
+)
+from tools.goodhome_simulator import GoodHomeSimulator
+
+
+class _Response:
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+
+class _Recording(Stage):
+    def __init__(self, name, trace):
+        self.name = name
+        self._trace = trace
+
+    def handle(self, request, call_next):
+        self._trace.append(f"{self.name}>")
+        try:
+            return call_next(request)
+        finally:
+            self._trace.append(f"<{self.name}")
+
+
+def test_stages_run_outermost_first_and_are_timed():
+    trace = []
+
+    def transport(request):
+        trace.append("transport")
+        time.sleep(0.02)
+        return _Response()
+
+    pipeline = Pipeline([_Recording("a", trace), _Recording("b", trace)], transport)
+    pipeline.send(ApiRequest("GET", "http://test/"))
+    assert trace == ["a>", "b>", "transport", "<b", "<a"]
+    stats = pipeline.stats()
+    assert set(stats) == {"a", "b", "transport"}
+    assert all(stage["calls"] == 1 for stage in stats.values())
+    # Le temps du transport n'est pas compté dans les étapes qui l'entourent
+    assert stats["transport"]["total_ms"] >= 20
+    assert stats["a"]["total_ms"] < 10
+
+
+def test_api_pipeline_order():
+    api = GoodHomeAPI("user", "token", base_url="http://127.0.0.1:9")
+    try:
+        names = [stage.name for stage in api.pipeline.stages]
+    finally:
+        api.close()
+    assert names == ["auth", "cache", "retry", "rate_limit", "metrics"]
+
+
+def test_conditional_cache_reuses_the_same_object_on_304():
+    cache = ConditionalCacheStage()
+    sent = []
+    responses = [
+        _Response(200, {"id": "a"}, {"ETag": '"v1"'}),
+        _Response(304),
+    ]
+
+    def transport(request):
+        sent.append(dict(request.headers))
+        return responses.pop(0)
+
+    pipeline = Pipeline([cache], transport)
+    first = pipeline.send(ApiRequest("GET", "http://test/", cache_key="device_a")).data
+    second = pipeline.send(ApiRequest("GET", "http://test/", cache_key="device_a")).data
+    assert second is first
+    assert sent[1]["If-None-Match"] == '"v1"'
+
+
+def test_conditional_cache_reloads_on_304_without_cache():
+    cache = ConditionalCacheStage()
+    cache.etags["device_a"] = '"v1"'
+    responses = [_Response(304), _Response(200, {"id": "a"})]
+    sent = []
+
+    def transport(request):
+        sent.append(dict(request.headers))
+        return responses.pop(0)
+
+    response = Pipeline([cache], transport).send(ApiRequest("GET", "http://test/", cache_key="device_a"))
+    assert response.data == {"id": "a"}
+    assert "If-None-Match" not in sent[1]
+
+
+def test_write_invalidates_the_cache():
+    invalidated = []
+    cache = ConditionalCacheStage(on_invalidate=lambda: invalidated.append(True))
+    cache.results["device_a"] = {"id": "a"}
+    cache.etags["device_a"] = '"v1"'
+    cache.results["device_b"] = {"id": "b"}
+    pipeline = Pipeline([cache], lambda request: _Response())
+    pipeline.send(ApiRequest("PATCH", "http://test/", json={}, invalidates=("device_a",)))
+    assert "device_a" not in cache.results and "device_a" not in cache.etags
+    assert "device_b" in cache.results
+    assert invalidated == [True]
+
+
+class _OperationApi:
+    """API running an operation with an optional deadline (`_local.deadline`)."""
+
+    def __init__(self, deadline=None):
+        self._local = threading.local()
+        self._local.deadline = deadline
+
+
+def test_retry_on_connection_error_and_503():
+    outcomes = [requests.ConnectionError("reset"), _Response(503), _Response(200)]
+
+    def transport(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    response = Pipeline([RetryStage(_OperationApi(), 0.001)], transport).send(ApiRequest("GET", "http://test/", retries=2))
+    assert response.status_code == 200
+    assert outcomes == []
+
+
+def test_retry_budget_is_respected():
+    calls = []
+
+    def transport(request):
+        calls.append(1)
+        return _Response(503)
+
+    pipeline = Pipeline([RetryStage(_OperationApi(), 0.001)], transport)
+    assert pipeline.send(ApiRequest("GET", "http://test/", retries=1)).status_code == 503
+    assert len(calls) == 2
+    # Sans nouvel essai permis (écriture non répétable), un seul envoi
+    with pytest.raises(requests.ConnectionError):
+        Pipeline([RetryStage(_OperationApi(), 0.001)], _raise_connection_error).send(ApiRequest("POST", "http://test/"))
+
+
+def test_retry_backoff_stops_at_the_operation_deadline():
+    calls = []
+
+    def transport(request):
+        calls.append(1)
+        return _Response(502)
+
+    api = _OperationApi(time.monotonic() + 0.05)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        Pipeline([RetryStage(api, 0.04)], transport).send(ApiRequest("PATCH", "http://test/", retries=3))
+    # 0,04 s d'attente, puis 0,08 s dépasserait l'échéance : pas de nouvelle attente
+    assert len(calls) == 2
+    assert time.monotonic() - start < 0.05
+
+
+def _raise_connection_error(request):
+    raise requests.ConnectionError("reset")
+
+
+class _FakeApi:
+    def __init__(self, refresh_ok=True):
+        self.token = "old"
+        self.refreshes = 0
+        self._refresh_ok = refresh_ok
+
+    def _connect_socket(self):
+        return True
+
+    def _get_headers(self):
+        return {"access-token": self.token}
+
+    def refresh_access_token(self):
+        self.refreshes += 1
+        if self._refresh_ok:
+            self.token = "new"
+        return self._refresh_ok
+
+
+def test_401_refreshes_the_token_and_resends():
+    api = _FakeApi()
+    tokens = []
+
+    def transport(request):
+        tokens.append(request.headers["access-token"])
+        return _Response(401 if request.headers["access-token"] == "old" else 200)
+
+    response = Pipeline([AuthStage(api)], transport).send(ApiRequest("GET", "http://test/"))
+    assert response.status_code == 200
+    assert tokens == ["old", "new"]
+    assert api.refreshes == 1
+
+
+def test_401_is_returned_when_refresh_fails():
+    api = _FakeApi(refresh_ok=False)
+    response = Pipeline([AuthStage(api)], lambda request: _Response(401)).send(
+        ApiRequest("GET", "http://test/")
+    )
+    assert response.status_code == 401
+
+
+def test_unauthenticated_requests_skip_auth():
+    api = _FakeApi()
+    sent = []
+
+    def transport(request):
+        sent.append(dict(request.headers))
+        return _Response(401)
+
+    Pipeline([AuthStage(api)], transport).send(ApiRequest("POST", "http://test/", authenticated=False))
+    assert sent == [{}]
+    assert api.refreshes == 0
+
+
+@pytest.fixture
+def simulator():
+    simulator = GoodHomeSimulator(devices=2, command_lag=0, seed=1, tick=3600).start()
+    yield simulator
+    simulator.stop()
+
+
+@pytest.fixture
+def api(simulator):
+    api = GoodHomeAPI(None, None, email="user@example.com", password="secret", base_url=simulator.url)
+    assert api.login()
+    yield api
+    api.close()
+
+
+def test_expired_token_is_refreshed_on_401(simulator, api):
+    assert len(api.get_devices()) == 2
+    token = api.token
+    simulator.cloud.expire_tokens()
+    api._flight.forget()
+    assert len(api.get_devices()) == 2
+    assert api.token != token
+    assert simulator.cloud.token_valid(api.token)
+
+
+def test_unchanged_device_list_is_the_same_object(api):
+    first = api.get_devices()
+    api._flight.forget()
+    # Une réponse 200 construirait une nouvelle liste : seul le 304 renvoie la même
+    assert api.get_devices() is first
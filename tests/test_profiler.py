@@ -0,0 +1,40 @@
+"""Tests des sessions de profilage."""
+import tracemalloc
+
+import pytest
+
+from custom_components.goodhome import profiler
+from custom_components.goodhome.profiler import MODE_DETERMINISTIC, ProfileSession
+
+
+class _BusyProfile:
+    """cProfile.Profile when another profiling tool is attached (Python 3.12+)."""
+
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+
+def test_session_report_and_single_session():
+    session = ProfileSession(MODE_DETERMINISTIC)
+    session.start()
+    try:
+        with pytest.raises(RuntimeError):
+            ProfileSession(MODE_DETERMINISTIC).start()
+    finally:
+        session.stop()
+    assert "mode deterministic" in session.report()
+    assert profiler._ACTIVE is None
+
+
+def test_failed_start_releases_the_session(monkeypatch):
+    monkeypatch.setattr(profiler.cProfile, "Profile", _BusyProfile)
+    tracing = tracemalloc.is_tracing()
+    with pytest.raises(RuntimeError):
+        ProfileSession(MODE_DETERMINISTIC, allocations=5).start()
+    assert profiler._ACTIVE is None
+    assert tracemalloc.is_tracing() == tracing
+    monkeypatch.undo()
+    # Une nouvelle session peut démarrer
+    session = ProfileSession(MODE_DETERMINISTIC)
+    session.start()
+    session.stop()
@@ -0,0 +1,87 @@
+"""Tests de la projection de l'état des radiateurs sur les champs utilisés."""
+from custom_components.goodhome.commands import PARAMETERS
+from custom_components.goodhome.goodhome_api import (
+    STATE_FIELDS,
+    GoodHomeAPI,
+    _device_record,
+    _parse_devices,
+)
+
+# Champs lus par les entités (climate, sensor, switch, number, select...)
+ENTITY_FIELDS = {
+    "currentTemp", "targetTemp", "humidity", "dutyCycle", "overrideTime",
+    "windowTimeOut", "selfLearningImprove", "selfLearningCountDay", "fwVer",
+    "HwVer", "codeName", "roomName", "faultSystem", "targetMode",
+    "overrideTemp", "comfTemp", "ecoTemp", "antifTemp", "window",
+    "occupancyStatus", "selfLearning", "noprog",
+}
+
+DEVICE = {
+    "_id": "a",
+    "name": "Salon",
+    "type": "heater",
+    "connected": True,
+    "owner": "sim-user",
+    "state": {
+        "currentTemp": 19.5,
+        "comfTemp": 20.0,
+        "window": False,
+        "rssi": -60,
+        "bootCount": 12,
+    },
+}
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def test_fields_read_by_entities_and_writable_parameters_are_kept():
+    assert ENTITY_FIELDS <= STATE_FIELDS
+    assert set(PARAMETERS) <= STATE_FIELDS
+
+
+def test_record_keeps_only_projected_fields():
+    record = _device_record(DEVICE)
+    assert record == {
+        "id": "a",
+        "name": "Salon",
+        "type": "heater",
+        "connected": True,
+        "state": {"currentTemp": 19.5, "comfTemp": 20.0, "window": False},
+    }
+
+
+def test_unknown_fields_are_kept_apart_for_diagnostics():
+    record = _device_record(DEVICE, unknown_fields=True)
+    assert record["state"] == {"currentTemp": 19.5, "comfTemp": 20.0, "window": False}
+    assert record["unknown_state"] == {"rssi": -60, "bootCount": 12}
+
+
+def test_missing_state_and_connection():
+    record = _device_record({"_id": "b", "state": None})
+    assert record["state"] == {}
+    assert record["connected"] is False
+
+
+def test_parse_devices():
+    devices = _parse_devices(_Response({"devices": [DEVICE, {"_id": "b"}]}))
+    assert [device["id"] for device in devices] == ["a", "b"]
+    assert "unknown_state" not in devices[0]
+    assert _parse_devices(_Response({})) == []
+
+
+def test_changing_unknown_fields_invalidates_the_cache():
+    api = GoodHomeAPI("user", "token", base_url="http://127.0.0.1:9")
+    try:
+        api.cache.results["devices_user"] = [_device_record(DEVICE)]
+        api.set_unknown_fields(False)
+        assert "devices_user" in api.cache.results
+        api.set_unknown_fields(True)
+        assert api.cache.results == {}
+    finally:
+        api.close()
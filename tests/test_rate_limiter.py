@@ -0,0 +1,97 @@
+"""Tests du limiteur de débit (token bucket avec priorités)."""
+import threading
+import time
+
+from custom_components.goodhome.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONFIRM,
+    PRIORITY_USER,
+    TokenBucketLimiter,
+)
+
+
+def _wait_for_waiters(limiter, count, timeout=2):
+    end = time.monotonic() + timeout
+    while limiter.queue_depth < count:
+        assert time.monotonic() < end, "waiters never queued"
+        time.sleep(0.005)
+
+
+def test_burst_is_granted_immediately():
+    limiter = TokenBucketLimiter(rate=1, burst=3)
+    start = time.monotonic()
+    assert all(limiter.acquire(timeout=0.5) for _ in range(3))
+    assert time.monotonic() - start < 0.1
+    assert limiter.stats()["granted"]["background"] == 3
+
+
+def test_acquire_times_out_when_empty():
+    limiter = TokenBucketLimiter(rate=0.1, burst=1)
+    assert limiter.acquire(timeout=0.1)
+    start = time.monotonic()
+    assert not limiter.acquire(timeout=0.1)
+    assert 0.09 <= time.monotonic() - start < 0.5
+    # Le demandeur abandonné ne reste pas dans la file
+    assert limiter.queue_depth == 0
+
+
+def test_tokens_refill_at_rate():
+    limiter = TokenBucketLimiter(rate=20, burst=1)
+    assert limiter.acquire(timeout=0.1)
+    start = time.monotonic()
+    assert limiter.acquire(timeout=1)
+    assert 0.03 <= time.monotonic() - start < 0.3
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    limiter = TokenBucketLimiter(rate=50, burst=1)
+    assert limiter.acquire(timeout=0.1)
+    # Bloquer le débit le temps de mettre les demandeurs en file
+    limiter.configure("test", rate=0.001, burst=1)
+
+    order = []
+
+    def worker(name, priority):
+        assert limiter.acquire(priority, timeout=5)
+        order.append(name)
+
+    threads = []
+    for name, priority in (
+        ("background", PRIORITY_BACKGROUND),
+        ("confirm", PRIORITY_CONFIRM),
+        ("user-1", PRIORITY_USER),
+        ("user-2", PRIORITY_USER),
+    ):
+        thread = threading.Thread(target=worker, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_for_waiters(limiter, len(threads))
+
+    assert limiter.stats()["queue_depth_by_priority"] == {"user": 2, "confirm": 1, "background": 1}
+    limiter.configure("test", rate=50, burst=1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["user-1", "user-2", "confirm", "background"]
+
+
+def test_configure_caps_tokens_to_new_burst():
+    limiter = TokenBucketLimiter(rate=0.001, burst=10)
+    limiter.configure("test", rate=0.001, burst=2)
+    assert limiter.acquire(timeout=0.05)
+    assert limiter.acquire(timeout=0.05)
+    assert not limiter.acquire(timeout=0.05)
+
+
+def test_host_applies_the_largest_budget_of_its_accounts():
+    limiter = TokenBucketLimiter(rate=2, burst=10)
+    limiter.configure("a", rate=1, burst=5)
+    limiter.configure("b", rate=4, burst=3)
+    assert (limiter.stats()["rate"], limiter.stats()["burst"]) == (4, 5)
+    # Recharger un compte ne remplace pas le budget des autres
+    limiter.configure("a", rate=1, burst=2)
+    assert (limiter.stats()["rate"], limiter.stats()["burst"]) == (4, 3)
+    limiter.release("b")
+    assert (limiter.stats()["rate"], limiter.stats()["burst"]) == (1, 2)
+    limiter.release("a")
+    assert (limiter.stats()["rate"], limiter.stats()["burst"]) == (2, 10)
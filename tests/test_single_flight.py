@@ -0,0 +1,150 @@
+"""Tests de la déduplication des lectures (single-flight)."""
+import threading
+import time
+
+import pytest
+
+from custom_components.goodhome.goodhome_api import GoodHomeAPI
+from custom_components.goodhome.single_flight import SingleFlight
+
+
+def _slow(result, calls, delay=0.1):
+    def func():
+        calls.append(1)
+        time.sleep(delay)
+        return result
+    return func
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(ttl=0)
+    calls = []
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", _slow("value", calls))))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.shared == 4
+
+
+def test_recent_result_is_reused_within_ttl():
+    flight = SingleFlight(ttl=0.1)
+    calls = []
+    assert flight.do("key", _slow("first", calls, 0)) == "first"
+    assert flight.do("key", _slow("second", calls, 0)) == "first"
+    assert flight.fresh_hits == 1
+    time.sleep(0.12)
+    assert flight.do("key", _slow("third", calls, 0)) == "third"
+    assert len(calls) == 2
+
+
+def test_keys_are_independent():
+    flight = SingleFlight(ttl=1)
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+def test_errors_are_shared_but_not_kept():
+    flight = SingleFlight(ttl=1)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ConnectionError("down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ConnectionError as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+    assert len(calls) == 1
+    # Aucun résultat récent après une erreur : l'appel suivant repart du réseau
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_forget_drops_recent_results():
+    flight = SingleFlight(ttl=10)
+    assert flight.do("key", lambda: "old") == "old"
+    flight.forget()
+    assert flight.do("key", lambda: "new") == "new"
+
+
+def test_waiter_times_out():
+    flight = SingleFlight(ttl=0)
+    started = threading.Event()
+
+    def leader():
+        started.set()
+        time.sleep(0.3)
+        return "late"
+
+    thread = threading.Thread(target=lambda: flight.do("key", leader))
+    thread.start()
+    started.wait(1)
+    with pytest.raises(TimeoutError):
+        flight.do("key", lambda: "unused", timeout=0.05)
+    thread.join(5)
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def api():
+    api = GoodHomeAPI("user", "token", base_url="http://127.0.0.1:9")
+    yield api
+    api.close()
+
+
+def test_failed_device_list_is_not_reused(api):
+    calls = []
+
+    def failing(request):
+        calls.append(request.url)
+        raise ConnectionError("down")
+
+    api.pipeline.send = failing
+    assert api.get_devices() == []
+    devices = [{"id": "a"}]
+
+    def succeeding(request):
+        calls.append(request.url)
+        return _Response(devices)
+
+    api.pipeline.send = succeeding
+    # Dans la fenêtre de déduplication, mais l'échec n'a pas été gardé
+    assert api.get_devices() is devices
+    assert len(calls) == 2
+
+
+def test_failed_device_read_returns_none(api):
+    def failing(request):
+        raise ConnectionError("down")
+
+    api.pipeline.send = failing
+    assert api.get_device("a") is None
+    api.pipeline.send = lambda request: _Response({"id": "a"})
+    assert api.get_device("a") == {"id": "a"}
@@ -0,0 +1,78 @@
+"""Tests du handshake Socket.io partagé par les comptes d'un hôte."""
+import threading
+import time
+
+from custom_components.goodhome.client_manager import SocketTransport
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _Cloud:
+    """Handshake server answering after `delay`, counting concurrent handshakes."""
+
+    def __init__(self, delay=0.1):
+        self._delay = delay
+        self._lock = threading.Lock()
+        self.handshakes = 0
+        self.running = 0
+        self.max_running = 0
+
+    def send(self, method, url, headers=None):
+        if "&sid=" in url:
+            return _Response("ok")
+        with self._lock:
+            self.handshakes += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self._delay)
+        with self._lock:
+            self.running -= 1
+        return _Response('0{"sid":"sid-%d","pingInterval":25000}' % self.handshakes)
+
+
+def _connect_all(transport, cloud, accounts):
+    sids = []
+    threads = [
+        threading.Thread(target=lambda account=account: sids.append(
+            transport.connect(account[0], account[1], send=cloud.send)
+        ))
+        for account in accounts
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return sids
+
+
+def test_concurrent_connects_of_an_account_share_one_handshake():
+    cloud = _Cloud()
+    transport = SocketTransport("http://test", None)
+    sids = _connect_all(transport, cloud, [("user", "token")] * 4)
+    assert cloud.handshakes == 1
+    assert len(set(sids)) == 1
+    # Session réutilisée ensuite sans nouveau handshake
+    assert transport.connect("user", "token", send=cloud.send) == sids[0]
+    assert cloud.handshakes == 1
+
+
+def test_accounts_handshake_in_parallel():
+    cloud = _Cloud()
+    transport = SocketTransport("http://test", None)
+    _connect_all(transport, cloud, [("a", "token"), ("b", "token"), ("c", "token")])
+    assert cloud.handshakes == 3
+    assert cloud.max_running == 3
+
+
+def test_force_does_a_new_handshake():
+    cloud = _Cloud(delay=0)
+    transport = SocketTransport("http://test", None)
+    first = transport.connect("user", "token", send=cloud.send)
+    assert transport.connect("user", "token", send=cloud.send, force=True) != first
+    assert cloud.handshakes == 2
@@ -0,0 +1,270 @@
+"""Client en ligne de commande de l'API GoodHome, sans Home Assistant.
+
+Utilise le même client (`GoodHomeAPI`) que l'intégration : pool de
+connexions, limiteur de débit, disjoncteur, cache ETag et métriques.
+
+    python tools/goodhome_cli.py --email moi@example.com login
+    python tools/goodhome_cli.py --email moi@example.com devices --json
+    python tools/goodhome_cli.py --email moi@example.com watch --interval 10
+    python tools/goodhome_cli.py --email moi@example.com set <device_id> comfTemp 20.5 --wait
+    python tools/goodhome_cli.py --base-url http://127.0.0.1:8080 --email test@example.com \\
+        load --duration 30 --concurrency 8 --rate 1000
+
+Le mot de passe est lu dans `GOODHOME_PASSWORD` ou demandé. Avec le
+simulateur (`tools/goodhome_simulator.py`), n'importe quel mot de passe est
+accepté.
+"""
+import argparse
+import getpass
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from goodhome_record import load_api_module
+
+
+def percentile(values, pct):
+    """Return the `pct` percentile of sorted `values` (nearest rank)."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def parse_value(text):
+    """Parse a parameter value: JSON (true, 19.5, 8...) or plain string."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def state_changes(old, new):
+    """Return {key: (old, new)} for the state fields that changed."""
+    return {
+        key: (old.get(key), new.get(key))
+        for key in sorted(set(old) | set(new))
+        if old.get(key) != new.get(key)
+    }
+
+
+def cmd_login(api, args):
+    """Log in and show the session (without the token)."""
+    expiry = "unknown"
+    if api.token_expiry:
+        expiry = datetime.fromtimestamp(api.token_expiry, timezone.utc).isoformat()
+    print(f"Logged in as user {api.user_id}, token expires {expiry}")
+    if args.show_token:
+        print(f"Token: {api.token}")
+
+
+def cmd_devices(api, args):
+    """Dump the devices."""
+    devices = api.get_devices()
+    if args.json:
+        print(json.dumps(devices, indent=2, ensure_ascii=False))
+        return
+    for device in devices:
+        state = device.get("state") or {}
+        print(
+            f"{device['id']}  {device.get('name') or '':20}  "
+            f"{'online ' if device.get('connected') else 'offline'}  "
+            f"current {state.get('currentTemp')}°C  target {state.get('targetTemp')}°C  "
+            f"mode {state.get('targetMode')}"
+        )
+    print(f"{len(devices)} devices")
+
+
+def cmd_watch(api, args):
+    """Poll the devices and print every state change."""
+    previous = {}
+    end = time.monotonic() + args.duration if args.duration else None
+    while True:
+        now = datetime.now().isoformat(timespec="seconds")
+        for device in api.get_devices():
+            state = {
+                **(device.get("state") or {}),
+                **(device.get("unknown_state") or {}),
+                "connected": device.get("connected"),
+            }
+            if device["id"] not in previous:
+                print(f"{now} {device['id']} ({device.get('name')}): {len(state)} fields")
+            else:
+                for key, (old, new) in state_changes(previous[device["id"]], state).items():
+                    print(f"{now} {device['id']} {key}: {old} -> {new}")
+            previous[device["id"]] = state
+        if end is not None and time.monotonic() + args.interval > end:
+            break
+        time.sleep(args.interval)
+
+
+def cmd_set(api, args):
+    """Write a parameter, and optionally wait until the device reports it."""
+    value = parse_value(args.value)
+    start = time.monotonic()
+    try:
+        success = api.set_parameter(args.device_id, args.parameter, value)
+    except ValueError as err:
+        # Paramètre inconnu ou valeur hors bornes (commandes typées)
+        print(f"Invalid command: {err}", file=sys.stderr)
+        sys.exit(1)
+    if not success:
+        print(f"Failed to set {args.parameter}={value!r}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Set {args.parameter}={value!r} in {(time.monotonic() - start) * 1000:.0f} ms")
+    if not args.wait:
+        return
+    deadline = start + args.wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(args.wait_interval)
+        device = api.get_device(args.device_id)
+        if device and (device.get("state") or {}).get(args.parameter) == value:
+            print(f"Confirmed after {time.monotonic() - start:.1f} s")
+            return
+    print(f"Not confirmed after {args.wait_timeout:.0f} s", file=sys.stderr)
+    sys.exit(2)
+
+
+def cmd_load(api, args):
+    """Read the devices in a loop from several threads and report throughput."""
+    if args.rate:
+        api.limiter.configure(api, args.rate, args.burst or args.rate)
+    if args.device_id:
+        read = api.get_device if args.coalesce else api._get_device
+        call = lambda: read(args.device_id)  # noqa: E731
+    else:
+        read = api.get_devices if args.coalesce else api._get_devices
+        call = read
+
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    end = time.monotonic() + args.duration
+
+    def worker():
+        nonlocal failures
+        while time.monotonic() < end:
+            start = time.monotonic()
+            result = call()
+            elapsed = (time.monotonic() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not result:
+                    failures += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    stats = api.metrics.stats()
+    report = {
+        "duration_s": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "calls": len(latencies),
+        "failures": failures,
+        "calls_per_s": round(len(latencies) / elapsed, 1),
+        "http_requests_per_s": round(stats["requests"] / elapsed, 1),
+        "latency_ms": {
+            f"p{pct}": round(percentile(latencies, pct), 1) if latencies else None
+            for pct in (50, 90, 95, 99)
+        },
+        "max_ms": round(latencies[-1], 1) if latencies else None,
+        "etag_hit_ratio": api.metrics.etag_hit_ratio,
+        "http": stats,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['calls']} calls in {report['duration_s']} s with {args.concurrency} threads "
+        f"({report['failures']} failed)"
+    )
+    print(f"Throughput: {report['calls_per_s']} calls/s, {report['http_requests_per_s']} HTTP requests/s")
+    latency = report["latency_ms"]
+    print(
+        f"Latency: p50 {latency['p50']} ms, p90 {latency['p90']} ms, p95 {latency['p95']} ms, "
+        f"p99 {latency['p99']} ms, max {report['max_ms']} ms"
+    )
+    print(f"304 ratio: {report['etag_hit_ratio']}%, status codes: {stats['status_codes']}")
+    for endpoint, summary in stats["latency"].items():
+        print(f"  {endpoint}: {summary}")
+
+
+def build_parser():
+    """Return the argument parser."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--base-url", default=None, help="URL du serveur (défaut : cloud GoodHome)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    login = commands.add_parser("login", help="se connecter et afficher la session")
+    login.add_argument("--show-token", action="store_true")
+    login.set_defaults(func=cmd_login)
+
+    devices = commands.add_parser("devices", help="lister les appareils")
+    devices.add_argument("--json", action="store_true", help="réponse complète en JSON")
+    devices.set_defaults(func=cmd_devices)
+
+    watch = commands.add_parser("watch", help="afficher les changements d'état")
+    watch.add_argument("--interval", type=float, default=30, help="intervalle entre deux lectures (s)")
+    watch.add_argument("--duration", type=float, default=0, help="durée (s, 0 = illimitée)")
+    watch.set_defaults(func=cmd_watch)
+
+    set_ = commands.add_parser("set", help="écrire un paramètre (ex. comfTemp 20.5, targetMode 8)")
+    set_.add_argument("device_id")
+    set_.add_argument("parameter")
+    set_.add_argument("value", help="valeur JSON (true, 19.5, 8) ou texte")
+    set_.add_argument("--wait", action="store_true", help="attendre que l'appareil confirme la valeur")
+    set_.add_argument("--wait-timeout", type=float, default=60)
+    set_.add_argument("--wait-interval", type=float, default=2)
+    set_.set_defaults(func=cmd_set)
+
+    load = commands.add_parser("load", help="boucle de charge : débit et percentiles de latence")
+    load.add_argument("--duration", type=float, default=30, help="durée (s)")
+    load.add_argument("--concurrency", type=int, default=4, help="nombre de threads")
+    load.add_argument("--device-id", default=None, help="lire un appareil au lieu de la liste")
+    load.add_argument("--rate", type=float, default=None,
+                      help="débit du limiteur (req/s, défaut : celui de l'intégration)")
+    load.add_argument("--burst", type=float, default=None)
+    load.add_argument("--coalesce", action="store_true",
+                      help="partager les lectures identiques comme l'intégration")
+    load.add_argument("--json", action="store_true", help="rapport en JSON")
+    load.set_defaults(func=cmd_load)
+    return parser
+
+
+def main():
+    """Run a command."""
+    args = build_parser().parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    goodhome_api = load_api_module()
+    password = os.environ.get("GOODHOME_PASSWORD") or getpass.getpass("Mot de passe GoodHome : ")
+
+    api = goodhome_api.GoodHomeAPI(
+        None, None, args.email, password, base_url=args.base_url or goodhome_api.BASE_URL
+    )
+    # Outil d'inspection de l'API : garder aussi les champs que l'intégration ignore
+    api.set_unknown_fields(True)
+    try:
+        if not api.login():
+            print("Login failed", file=sys.stderr)
+            sys.exit(1)
+        args.func(api, args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+
+
+if __name__ == "__main__":
+    main()
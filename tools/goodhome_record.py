@@ -0,0 +1,77 @@
+"""Enregistre le trafic réel de l'API GoodHome pour les tests de performance.
+
+Se connecte au cloud avec un compte, interroge la liste des appareils à
+intervalle régulier pendant la durée demandée et écrit les échanges
+(nettoyés des tokens, emails et identifiants) dans un fichier rejouable
+par `ReplayTransport` et `benchmarks/bench_replay.py`.
+
+    python tools/goodhome_record.py --email moi@example.com --duration 600 \\
+        --output recordings/maison.jsonl.gz
+
+Le mot de passe est lu dans `GOODHOME_PASSWORD` ou demandé. Home Assistant
+n'a pas besoin d'être installé.
+"""
+import argparse
+import getpass
+import logging
+import os
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, "custom_components", "goodhome")
+
+
+def load_api_module():
+    """Import `goodhome_api` without running the Home Assistant `__init__`."""
+    if "goodhome" not in sys.modules:
+        package = types.ModuleType("goodhome")
+        package.__path__ = [PACKAGE_DIR]
+        sys.modules["goodhome"] = package
+    from goodhome import goodhome_api
+
+    return goodhome_api
+
+
+def main():
+    """Record traffic from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--base-url", default=None, help="URL du serveur (défaut : cloud GoodHome)")
+    parser.add_argument("--duration", type=float, default=300, help="durée d'enregistrement (s)")
+    parser.add_argument("--interval", type=float, default=60, help="intervalle entre deux lectures (s)")
+    parser.add_argument("--output", default="goodhome_traffic.jsonl.gz")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    goodhome_api = load_api_module()
+    password = os.environ.get("GOODHOME_PASSWORD") or getpass.getpass("Mot de passe GoodHome : ")
+
+    api = goodhome_api.GoodHomeAPI(
+        None, None, args.email, password, base_url=args.base_url or goodhome_api.BASE_URL
+    )
+    api.start_recording(args.output)
+    try:
+        if not api.login():
+            print("Login failed", file=sys.stderr)
+            sys.exit(1)
+        end = time.monotonic() + args.duration
+        polls = 0
+        while True:
+            devices = api.get_devices()
+            polls += 1
+            print(f"Poll {polls}: {len(devices)} devices")
+            if time.monotonic() + args.interval > end:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+    print(f"Traffic written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""Simulateur local du cloud GoodHome.
+
+Implémente le sous-ensemble de l'API utilisé par l'intégration pour pouvoir
+la tester et la mesurer sans accès réseau :
+
+- POST  /v1/auth/login, /v1/auth/refresh
+- GET   /socket.io-v2/ (handshake engine.io v3 en long-polling)
+- GET   /v1/users/{id}/devices et /v1/devices/{id}/ (ETag / 304)
+- PATCH /v1/devices/{id}/state (appliqué après un délai configurable)
+- GET   /_sim/stats (compteurs de requêtes, pour les benchmarks)
+
+Utilisation :
+
+    python tools/goodhome_simulator.py --devices 20 --command-lag 2
+
+puis configurer l'intégration (mode avancé) ou la CLI avec
+`--base-url http://127.0.0.1:8080`.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Consigne appliquée selon targetMode (voir select.TARGET_MODES)
+_COMFORT_MODES = {1, 9, 60, 70}
+_ECO_MODES = {2, 10, 30, 61}
+_ANTIFREEZE_MODES = {0, 3, 5, 12}
+_OVERRIDE_MODES = {8}
+
+_POWERS = [500, 750, 1000, 1250, 1500, 1800, 2000]
+_ROOMS = ["Salon", "Cuisine", "Chambre", "Bureau", "Salle de bain", "Entrée", "Couloir"]
+
+
+def make_device(index, rng):
+    """Build a realistic device payload."""
+    comf = rng.choice([19.0, 19.5, 20.0, 20.5, 21.0])
+    return {
+        "_id": f"sim{index:05d}{secrets.token_hex(6)}",
+        "name": f"Radiateur {index + 1}",
+        "type": "heater",
+        "connected": True,
+        "state": {
+            "currentTemp": round(rng.uniform(16.0, 21.0), 1),
+            "targetTemp": comf,
+            "humidity": rng.randint(35, 60),
+            "targetMode": 1,
+            "comfTemp": comf,
+            "ecoTemp": 17.0,
+            "antifTemp": 7.0,
+            "overrideTemp": comf,
+            "overrideTime": 0,
+            "holidayTimeout": 0,
+            "dutyCycle": 0,
+            "window": True,
+            "windowTimeOut": 30,
+            "occupancyStatus": False,
+            "selfLearning": False,
+            "selfLearningImprove": False,
+            "selfLearningCountDay": 0,
+            "noprog": True,
+            "fwVer": "2.4.7",
+            "HwVer": "1.2",
+            "codeName": f"DLRIRFH{rng.choice(_POWERS)}",
+            "roomName": rng.choice(_ROOMS),
+            "faultSystem": 0,
+            "ping": 0,
+        },
+    }
+
+
+class SimulatedCloud:
+    """State of the simulated GoodHome cloud (thread-safe)."""
+
+    def __init__(self, devices=5, command_lag=2.0, token_ttl=86400, tick=30.0,
+                 latency=0.0, seed=None):
+        """Create the simulated account and its devices."""
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.command_lag = command_lag
+        self.token_ttl = token_ttl
+        self.tick = tick
+        self.latency = latency
+        self.user_id = "sim-user"
+        self.devices = {}
+        for index in range(devices):
+            device = make_device(index, self._rng)
+            self.devices[device["_id"]] = device
+        self.tokens = {}  # token -> expiration
+        self.refresh_tokens = set()
+        self.sids = set()
+        self.pending = []  # (apply_at, device_id, parameters)
+        self.version = 0
+        self.last_tick = time.monotonic()
+        self.stats = Counter()
+
+    # --- Authentification -------------------------------------------------
+
+    def issue_token(self):
+        """Return a new (token, refresh_token) pair."""
+        with self._lock:
+            token = secrets.token_hex(16)
+            refresh = secrets.token_hex(16)
+            self.tokens[token] = time.time() + self.token_ttl
+            self.refresh_tokens.add(refresh)
+            return token, refresh
+
+    def refresh(self, refresh_token):
+        """Exchange a refresh token, or return None."""
+        with self._lock:
+            if refresh_token not in self.refresh_tokens:
+                return None
+            self.refresh_tokens.discard(refresh_token)
+        return self.issue_token()
+
+    def token_valid(self, token):
+        """Return True if the access token is known and not expired."""
+        with self._lock:
+            expiry = self.tokens.get(token)
+            return expiry is not None and expiry > time.time()
+
+    def expire_tokens(self):
+        """Invalidate every access token (to exercise the 401 path)."""
+        with self._lock:
+            self.tokens.clear()
+
+    # --- Simulation thermique ---------------------------------------------
+
+    def _advance(self):
+        """Apply due commands and advance the thermal model (lock held)."""
+        now = time.monotonic()
+        changed = False
+
+        due = [p for p in self.pending if p[0] <= now]
+        if due:
+            self.pending = [p for p in self.pending if p[0] > now]
+            for _, device_id, parameters in due:
+                state = self.devices[device_id]["state"]
+                state.update(parameters)
+                if "overrideTemp" in parameters and "targetMode" not in parameters:
+                    state["targetMode"] = 8
+                self._update_target(state)
+                changed = True
+
+        if now - self.last_tick >= self.tick:
+            # tick <= 0 : l'état évolue à chaque lecture (pas de 304)
+            if self.tick > 0:
+                steps = int((now - self.last_tick) // self.tick)
+                self.last_tick += steps * self.tick
+            else:
+                steps = 1
+            for device in self.devices.values():
+                state = device["state"]
+                delta = state["targetTemp"] - state["currentTemp"]
+                state["currentTemp"] = round(
+                    state["currentTemp"] + max(-0.5, min(0.5, delta * 0.3)) * min(steps, 5)
+                    + self._rng.uniform(-0.1, 0.1), 1
+                )
+                state["dutyCycle"] = max(0, min(100, int(delta * 40))) if delta > 0 else 0
+            changed = True
+
+        if changed:
+            self.version += 1
+
+    @staticmethod
+    def _update_target(state):
+        """Derive targetTemp from targetMode."""
+        mode = state.get("targetMode")
+        if mode in _COMFORT_MODES:
+            state["targetTemp"] = state["comfTemp"]
+        elif mode in _ECO_MODES:
+            state["targetTemp"] = state["ecoTemp"]
+        elif mode in _ANTIFREEZE_MODES:
+            state["targetTemp"] = state["antifTemp"]
+        elif mode in _OVERRIDE_MODES:
+            state["targetTemp"] = state["overrideTemp"]
+
+    def snapshot(self, device_id=None):
+        """Return (payload, etag) for the device list or a single device."""
+        with self._lock:
+            self._advance()
+            if device_id is None:
+                payload = {"devices": list(self.devices.values())}
+            elif device_id in self.devices:
+                payload = self.devices[device_id]
+            else:
+                return None, None
+            body = json.dumps(payload).encode()
+            etag = 'W/"%s"' % hashlib.sha1(body).hexdigest()[:20]
+            return body, etag
+
+    def patch(self, device_id, parameters):
+        """Queue a state change, applied after the command lag."""
+        with self._lock:
+            if device_id not in self.devices:
+                return False
+            if "ping" in parameters:
+                return True
+            self.pending.append((time.monotonic() + self.command_lag, device_id, dict(parameters)))
+            return True
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """HTTP front-end of the simulated cloud."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "GoodHomeSimulator/1.0"
+
+    @property
+    def cloud(self):
+        """Return the simulated cloud."""
+        return self.server.cloud
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Silence per-request logging."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode())
+
+    def _read_json(self):
+        if not self._body:
+            return {}
+        try:
+            return json.loads(self._body)
+        except ValueError:
+            return None
+
+    def _authorized(self):
+        token = self.headers.get("access-token")
+        if token is None:
+            authorization = self.headers.get("authorization", "")
+            token = authorization[7:] if authorization.startswith("Bearer ") else None
+        return token is not None and self.cloud.token_valid(token)
+
+    def _count(self, endpoint, status):
+        with self.cloud._lock:
+            self.cloud.stats[f"{self.command} {endpoint}"] += 1
+            self.cloud.stats[f"status_{status}"] += 1
+
+    def _dispatch(self):
+        if self.cloud.latency:
+            time.sleep(self.cloud.latency)
+        path = urlsplit(self.path).path
+
+        if self.command == "POST" and path == "/v1/auth/login":
+            return self._login()
+        if self.command == "POST" and path == "/v1/auth/refresh":
+            return self._refresh()
+        if self.command == "GET" and path.startswith("/socket.io-v2"):
+            return self._socket()
+        if self.command == "GET" and path == "/_sim/stats":
+            with self.cloud._lock:
+                stats = dict(self.cloud.stats)
+            return self._send_json(200, stats), None
+
+        match = re.fullmatch(r"/v1/users/([^/]+)/devices", path)
+        if self.command == "GET" and match:
+            return self._devices(None, "/v1/users/{id}/devices")
+        match = re.fullmatch(r"/v1/devices/([^/]+)/", path)
+        if self.command == "GET" and match:
+            return self._devices(match.group(1), "/v1/devices/{id}/")
+        match = re.fullmatch(r"/v1/devices/([^/]+)/state", path)
+        if self.command == "PATCH" and match:
+            return self._patch(match.group(1))
+
+        self._send_json(404, {"error": "not found"})
+        return "unknown", 404
+
+    def _login(self):
+        data = self._read_json()
+        if not data or not data.get("email") or not data.get("password"):
+            self._send_json(401, {"error": "invalid credentials"})
+            return "/v1/auth/login", 401
+        token, refresh = self.cloud.issue_token()
+        self._send_json(200, {"token": token, "refresh_token": refresh, "id": self.cloud.user_id})
+        return "/v1/auth/login", 200
+
+    def _refresh(self):
+        data = self._read_json() or {}
+        pair = self.cloud.refresh(data.get("refresh_token"))
+        if pair is None:
+            self._send_json(401, {"error": "invalid refresh token"})
+            return "/v1/auth/refresh", 401
+        self._send_json(200, {"token": pair[0], "refresh_token": pair[1]})
+        return "/v1/auth/refresh", 200
+
+    def _socket(self):
+        if not self._authorized():
+            self._send_json(401, {"error": "unauthorized"})
+            return "/socket.io-v2/", 401
+        query = parse_qs(urlsplit(self.path).query)
+        if "sid" in query:
+            body = b"1:6"
+        else:
+            sid = secrets.token_urlsafe(15)
+            with self.cloud._lock:
+                self.cloud.sids.add(sid)
+            handshake = json.dumps({
+                "sid": sid,
+                "upgrades": ["websocket"],
+                "pingInterval": 25000,
+                "pingTimeout": 60000,
+            }, separators=(",", ":"))
+            body = f"{len(handshake) + 1}:0{handshake}2:40".encode()
+        self._send(200, body, "text/plain; charset=UTF-8")
+        return "/socket.io-v2/", 200
+
+    def _devices(self, device_id, endpoint):
+        if not self._authorized():
+            self._send_json(401, {"error": "unauthorized"})
+            return endpoint, 401
+        body, etag = self.cloud.snapshot(device_id)
+        if body is None:
+            self._send_json(404, {"error": "unknown device"})
+            return endpoint, 404
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return endpoint, 304
+        self._send(200, body, headers={"ETag": etag})
+        return endpoint, 200
+
+    def _patch(self, device_id):
+        endpoint = "/v1/devices/{id}/state"
+        if not self._authorized():
+            self._send_json(401, {"error": "unauthorized"})
+            return endpoint, 401
+        data = self._read_json()
+        if not data or not isinstance(data.get("parameters"), dict):
+            self._send_json(400, {"error": "invalid body"})
+            return endpoint, 400
+        if not self.cloud.patch(device_id, data["parameters"]):
+            self._send_json(404, {"error": "unknown device"})
+            return endpoint, 404
+        self._send_json(200, {})
+        return endpoint, 200
+
+    def _handle(self):
+        # Toujours consommer le corps pour garder la connexion keep-alive utilisable
+        length = int(self.headers.get("Content-Length") or 0)
+        self._body = self.rfile.read(length) if length else b""
+        result = self._dispatch()
+        if isinstance(result, tuple) and result[0] is not None:
+            self._count(*result)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PATCH = _handle
+
+
+class GoodHomeSimulator:
+    """Run the simulated cloud in a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, verbose=False, **cloud_options):
+        """Create the server; `port=0` picks a free port."""
+        self.cloud = SimulatedCloud(**cloud_options)
+        self._server = ThreadingHTTPServer((host, port), SimulatorHandler)
+        self._server.daemon_threads = True
+        self._server.cloud = self.cloud
+        self._server.verbose = verbose
+        self._thread = None
+
+    @property
+    def url(self):
+        """Return the base URL of the simulator."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=5, help="nombre de thermostats simulés")
+    parser.add_argument("--command-lag", type=float, default=2.0,
+                        help="délai avant qu'une commande soit visible dans l'état (s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence ajoutée à chaque réponse (s)")
+    parser.add_argument("--tick", type=float, default=30.0,
+                        help="pas de la simulation thermique (s), 0 pour changer à chaque lecture")
+    parser.add_argument("--token-ttl", type=float, default=86400, help="durée de vie des tokens (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    simulator = GoodHomeSimulator(
+        host=args.host,
+        port=args.port,
+        verbose=args.verbose,
+        devices=args.devices,
+        command_lag=args.command_lag,
+        latency=args.latency,
+        tick=args.tick,
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+    )
+    print(f"GoodHome simulator listening on {simulator.url} ({args.devices} devices)")
+    try:
+        simulator._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator._server.server_close()
+
+
+if __name__ == "__main__":
+    main()